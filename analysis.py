@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:02:29
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import os
+import re
+import json
+import time
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import yaml
+from percept_durations import reported_durations, percept_presses
+from event_stream import rebuild_events
+
+# <sub>_<ses>_Logs_<task>, main.py adds a date if the directory already existed
+log_directory_pattern = re.compile(r'(?P<subject>sub-[^_]+)_(?P<session>ses-[^_]+)_Logs_(?P<task>[A-Z]+)(?P<rerun>\d*)$')
+
+
+def log_files(directory):
+    """ The files the analysis of a log directory reads (the events and the settings of the session) """
+    match = log_directory_pattern.match(os.path.basename(os.path.normpath(directory)))
+    output_str = f'{match["subject"]}_{match["session"]}'
+    files = {'events': os.path.join(directory, output_str + '_events.tsv'),
+             'stream': os.path.join(directory, output_str + '_events.jsonl'),
+             'settings': os.path.join(directory, output_str + '_expsettings.yml')}
+    return {name: filename for name, filename in files.items() if os.path.exists(filename)}
+
+
+def signature(directory):
+    """ Size and modification time of the files of a log directory, to notice new or changed logs """
+    return {os.path.basename(filename): [os.stat(filename).st_size, os.stat(filename).st_mtime_ns]
+            for filename in sorted(log_files(directory).values())}
+
+
+def stats(values, name):
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return {f'{name}_mean': np.nan, f'{name}_median': np.nan, f'{name}_sd': np.nan}
+    return {f'{name}_mean': values.mean(), f'{name}_median': np.median(values), f'{name}_sd': values.std()}
+
+
+def analyse_block(phases, responses, block_type, response_interval):
+    """ One summary row for the phases and button presses of one block """
+    start = phases['onset'].iloc[0]
+    end = phases['onset'].iloc[-1] + phases['duration'].iloc[-1]
+    onsets = responses['onset'].to_numpy(dtype=np.float64)
+    keys = responses['response'].astype(str).to_numpy()
+
+    # the percepts the participant reported (a switch is a press of another button than before)
+    percepts = reported_durations(onsets, keys, start, end) if len(onsets) > 0 else np.array([end-start])
+    row = {'start': start, 'duration': end-start, 'n_responses': len(onsets), 'n_switches': len(percepts)-1,
+           'switch_rate': (len(percepts)-1)/(end-start)*60, **stats(percepts, 'percept')}
+
+    # the stimulus switches of an unambiguous block are the starts of its trials (not the first one),
+    # a response counts if it is given within the response interval after the switch
+    latencies = np.array([])
+    if block_type == 'unambiguous':
+        switches = phases.groupby('trial_nr', sort=False)['onset'].min().to_numpy()[1:]
+        first = np.searchsorted(onsets, switches + response_interval[0])
+        candidates = np.where(first < len(onsets), onsets[np.minimum(first, len(onsets)-1)], np.inf) - switches
+        latencies = candidates[candidates <= response_interval[1]]
+        row['n_stimulus_switches'] = len(switches)
+        row['n_detected'] = len(latencies)
+    row.update(stats(latencies, 'latency'))
+    row.update(stats(responses['key_duration'], 'key_duration'))
+    return row
+
+
+def analyse_directory(directory, settings_dir='.'):
+    """ Summary rows (one per ambiguous and unambiguous block) of one log directory """
+    match = log_directory_pattern.match(os.path.basename(os.path.normpath(directory)))
+    files = log_files(directory)
+    if 'events' in files:
+        events = pd.read_csv(files['events'], sep='\t')
+    elif 'stream' in files:
+        # the session did not end, the events file is rebuilt from the event stream
+        events = rebuild_events(files['stream'])
+    else:
+        raise FileNotFoundError(f'no events in {directory}')
+
+    # the settings of the session if exptools2 saved them, otherwise the settings of the task
+    settings_file = files.get('settings', os.path.join(settings_dir, f'settings_{match["task"]}.yml'))
+    with open(settings_file) as f:
+        task_settings = yaml.safe_load(f)['Task settings']
+    response_interval = task_settings['Response interval']
+
+    is_response = events['response'].notna()
+    phases = events[~is_response]
+    # the pause, the keys pressed during it and the break buttons are no percepts (the same presses as in the percept playback)
+    responses = events[is_response & percept_presses(events['event_type'], events['response'].astype(str), task_settings['Break buttons'])]
+    responses = responses.sort_values('onset', kind='mergesort')
+    rows = []
+    for (block_ID, block_type), block_phases in phases[phases['block_type'].isin(['ambiguous', 'unambiguous'])].groupby(['block_ID', 'block_type'], sort=False):
+        block_responses = responses[(responses['block_ID'] == block_ID) & (responses['block_type'] == block_type)]
+        rows.append({'directory': os.path.basename(os.path.normpath(directory)), 'subject': match['subject'], 'session': match['session'],
+                     'task': match['task'], 'block_ID': int(block_ID), 'block_type': block_type,
+                     **analyse_block(block_phases, block_responses, block_type, response_interval)})
+    return pd.DataFrame(rows)
+
+
+def read_summary(filename):
+    if not os.path.exists(filename):
+        return None
+    if filename.endswith('.parquet'):
+        return pd.read_parquet(filename)
+    return pd.read_csv(filename, sep='\t')
+
+
+def write_summary(summary, filename):
+    """ Parquet if pyarrow (or fastparquet) is installed, otherwise a tsv file. Returns the filename. """
+    if filename.endswith('.parquet'):
+        try:
+            summary.to_parquet(filename, index=False)
+            return filename
+        except ImportError:
+            filename = filename[:-len('.parquet')] + '.tsv'
+            print(f'no parquet engine installed, the summary is written to {filename}')
+    summary.to_csv(filename, sep='\t', index=False)
+    return filename
+
+
+def run_analysis(log_root='./output_data', output=None, n_workers=None, force=False, settings_dir='.'):
+    """
+    Analyses all log directories in log_root in a process pool and writes one summary file.
+    Only directories that are new or whose files changed since the last run (see the manifest
+    next to the summary) are analysed again, the rows of the others are kept.
+    """
+    output = output or os.path.join(log_root, 'analysis_summary.parquet')
+    manifest_file = os.path.splitext(output)[0] + '_manifest.json'
+    directories = sorted(directory for directory in glob.glob(os.path.join(log_root, '*_Logs_*'))
+                         if os.path.isdir(directory) and log_directory_pattern.match(os.path.basename(directory)))
+
+    # the manifest knows the signatures of the analysed directories and where their rows are
+    # (the summary is a tsv file without a parquet engine)
+    manifest = {}
+    previous = None
+    if not force and os.path.exists(manifest_file):
+        with open(manifest_file) as f:
+            manifest = json.load(f)
+        previous = read_summary(manifest.pop('summary_file', output))
+    if previous is None:
+        manifest = {}
+
+    signatures = {os.path.basename(directory): signature(directory) for directory in directories}
+    todo = [directory for directory in directories if manifest.get(os.path.basename(directory)) != signatures[os.path.basename(directory)]]
+    print(f'{len(directories)} log directories, {len(todo)} new or changed')
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(n_workers) as executor:
+        futures = {directory: executor.submit(analyse_directory, directory, settings_dir) for directory in todo}
+        for directory, future in futures.items():
+            name = os.path.basename(directory)
+            try:
+                results.append(future.result())
+                manifest[name] = signatures[name]
+            except Exception as error:
+                # analysed again next time
+                print(f'{name}: {error!r}')
+                manifest.pop(name, None)
+    print(f'analysed in {time.perf_counter()-start:.1f} s')
+
+    # rows of unchanged directories that still exist are kept
+    if previous is not None and len(previous) > 0:
+        keep = previous['directory'].isin(set(signatures) - set(os.path.basename(directory) for directory in todo))
+        results.insert(0, previous[keep])
+    manifest = {name: value for name, value in manifest.items() if name in signatures}
+    summary = pd.concat([table for table in results if len(table) > 0], ignore_index=True) if results else pd.DataFrame()
+    if len(summary) > 0:
+        summary = summary.sort_values(['directory', 'block_ID'], kind='mergesort').reset_index(drop=True)
+
+    written = write_summary(summary, output)
+    with open(manifest_file, 'w') as f:
+        json.dump({'summary_file': written, **manifest}, f, indent=1)
+    print(f'{len(summary)} blocks of {summary["directory"].nunique() if len(summary) else 0} sessions written to {written}')
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Percept durations, switch rates, response latencies and key durations of all sessions')
+    parser.add_argument('log_root', nargs='?', default='./output_data', help='directory with the <sub>_<ses>_Logs_<task> directories')
+    parser.add_argument('--output', help='summary file (default <log_root>/analysis_summary.parquet)')
+    parser.add_argument('--workers', type=int, help='number of processes (default: number of cpus)')
+    parser.add_argument('--force', action='store_true', help='analyse all directories again')
+    args = parser.parse_args()
+    run_analysis(args.log_root, args.output, args.workers, args.force)
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:04:23
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import io
+import os
+import re
+import time
+import argparse
+from itertools import islice
+import numpy as np
+import pandas as pd
+
+# messages of trial.py (exptools2 sends the phase onsets as start_type-stim_trial-<nr>_phase-<phase>)
+message_pattern = re.compile(r'start_type-(?P<event_type>.+?)_trial-(?P<trial_nr>\d+)_phase-(?P<phase>\d+)'
+                             r'(?:_key-(?P<key>.+?)_time-(?P<time>[^_]+)_duration-(?P<duration>\S+))?')
+# MSG <time> [<offset>] <text>
+msg_pattern = re.compile(r'MSG\s+(?P<time>\d+)\s+(?:(?P<offset>-?\d+)\s+)?(?P<text>.*)')
+
+
+class PhaseSums():
+    """ Per phase sums of the gaze samples, the arrays grow with the number of phases """
+
+    names = ['n_samples', 'n_valid', 'x', 'y', 'pupil', 'n_slow', 'slow_velocity', 'n_right', 'n_left']
+
+    def __init__(self):
+        self.sums = {name: np.zeros(0) for name in self.names}
+
+    def add(self, name, segments, n_phases, weights=None):
+        counts = np.bincount(segments, weights, minlength=n_phases)
+        values = self.sums[name]
+        if len(values) < n_phases:
+            values = np.concatenate([values, np.zeros(n_phases-len(values))])
+        values[:len(counts)] += counts
+        self.sums[name] = values
+
+
+class AscParser():
+    """
+    Reads an EyeLink asc export in chunks of chunk_lines lines, so a recording of several GB
+    never has to be in memory.
+
+    The phase messages of the session split the recording into phases (a sample belongs to the
+    last phase that started before it). Per phase the gaze samples are summed up: mean position
+    and pupil size, the share of missing samples and the horizontal velocity of the slow eye
+    movements (samples slower than saccade_velocity in pixels/s). For the rotating sphere the
+    slow phases of the optokinetic nystagmus follow the rotation, so okn_direction (+1 right,
+    -1 left) is the direction most of the slow samples moved in.
+    Messages sent through the tracker queue start with the time they waited (in ms), which is
+    subtracted from the message time (the asc file has the time the message arrived). Such a
+    message arrives after the first samples of its phase, so the samples of the last max_offset ms
+    of a chunk are only summed up with the next chunk. Binocular samples are averaged over both eyes.
+    """
+
+    def __init__(self, chunk_lines=1000000, saccade_velocity=1500, max_offset=1000):
+        self.chunk_lines = chunk_lines
+        self.saccade_velocity = saccade_velocity
+        self.max_offset = max_offset
+
+    def parse(self, filename):
+        self.binocular = False
+        self.phase_times = []
+        self.phase_info = []
+        self.keys = []
+        self.sums = PhaseSums()
+        self.last_sample = (np.nan, np.nan)
+        self.last_time = np.nan
+        # t, x, y and pupil of the samples that wait for the messages of the next chunk
+        self.pending = np.zeros((0, 4))
+        self.n_late_messages = 0
+
+        with open(filename, 'r', errors='replace') as f:
+            while True:
+                lines = list(islice(f, self.chunk_lines))
+                if not lines:
+                    break
+                self.parse_chunk(lines)
+        self.add_samples(self.pending)
+        if self.n_late_messages > 0:
+            print(f'{self.n_late_messages} phase messages waited longer than {self.max_offset} ms, some of their samples may be in the phase before')
+        return self.phase_table(), pd.DataFrame(self.keys, columns=['time', 'event_type', 'trial_nr', 'phase', 'key', 'rt', 'key_duration'])
+
+    def parse_chunk(self, lines):
+        samples = []
+        for line in lines:
+            first = line[:1]
+            if first.isdigit():
+                samples.append(line)
+            elif first == 'M':
+                self.parse_message(line)
+            elif line.startswith('START'):
+                self.binocular = 'LEFT' in line and 'RIGHT' in line
+        if samples:
+            data = np.concatenate([self.pending, self.parse_samples(''.join(samples))])
+        else:
+            data = self.pending
+        # the samples of the last max_offset ms can still belong to a phase whose message comes later
+        hold = np.searchsorted(data[:, 0], data[-1, 0] - self.max_offset, side='right') if len(data) else 0
+        self.add_samples(data[:hold])
+        self.pending = data[hold:]
+
+    def parse_message(self, line):
+        match = msg_pattern.match(line)
+        if match is None:
+            return
+        message = message_pattern.search(match['text'])
+        if message is None:
+            return
+        offset = int(match['offset'] or 0)
+        timestamp = int(match['time']) - offset
+        if message['key'] is None:
+            if offset > self.max_offset:
+                self.n_late_messages += 1
+            self.phase_times.append(timestamp)
+            self.phase_info.append((message['event_type'], int(message['trial_nr']), int(message['phase'])))
+        else:
+            self.keys.append((timestamp, message['event_type'], int(message['trial_nr']), int(message['phase']), message['key'],
+                              float(message['time']), float(message['duration']) if message['duration'] != 'None' else np.nan))
+
+    def parse_samples(self, text):
+        """ t, x, y and pupil of the sample lines """
+        n_columns = 7 if self.binocular else 4
+        data = pd.read_csv(io.StringIO(text), sep='\t', header=None, usecols=range(n_columns), na_values='.',
+                           skipinitialspace=True, dtype=np.float64, engine='c').to_numpy()
+        if self.binocular:
+            with np.errstate(invalid='ignore'):
+                return np.column_stack([data[:, 0]] + [np.nanmean(data[:, [i, i+3]], axis=1) for i in (1, 2, 3)])
+        return data
+
+    def add_samples(self, data):
+        """ Adds the samples to the sums of their phases """
+        if len(data) == 0:
+            return
+        t, x, y, pupil = data.T
+        self.last_time = t[-1]
+
+        # horizontal velocity in pixels/s (the first sample uses the last one of the previous chunk)
+        previous_t = np.concatenate([[self.last_sample[0]], t[:-1]])
+        previous_x = np.concatenate([[self.last_sample[1]], x[:-1]])
+        self.last_sample = (t[-1], x[-1])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            velocity = (x - previous_x)/(t - previous_t)*1000
+
+        # samples before the first phase are not part of the session
+        segments = np.searchsorted(np.asarray(self.phase_times), t, side='right') - 1
+        in_session = segments >= 0
+        if not in_session.any():
+            return
+        segments, x, y, pupil, velocity = segments[in_session], x[in_session], y[in_session], pupil[in_session], velocity[in_session]
+        valid = ~np.isnan(x)
+        with np.errstate(invalid='ignore'):
+            slow = np.abs(velocity) < self.saccade_velocity
+
+        n_phases = len(self.phase_times)
+        add = self.sums.add
+        add('n_samples', segments, n_phases)
+        add('n_valid', segments[valid], n_phases)
+        add('x', segments[valid], n_phases, x[valid])
+        add('y', segments[valid], n_phases, y[valid])
+        add('pupil', segments[valid], n_phases, pupil[valid])
+        add('n_slow', segments[slow], n_phases)
+        add('slow_velocity', segments[slow], n_phases, velocity[slow])
+        add('n_right', segments[slow & (velocity > 0)], n_phases)
+        add('n_left', segments[slow & (velocity < 0)], n_phases)
+
+    def phase_table(self):
+        n_phases = len(self.phase_times)
+        sums = {name: np.concatenate([values, np.zeros(n_phases-len(values))]) for name, values in self.sums.sums.items()}
+        times = np.asarray(self.phase_times, dtype=np.float64)
+        event_type, trial_nr, phase = zip(*self.phase_info) if n_phases else ((), (), ())
+        with np.errstate(invalid='ignore', divide='ignore'):
+            table = pd.DataFrame({'time': times,
+                                  'duration': np.append(np.diff(times), self.last_time - times[-1]) if n_phases else times,
+                                  'event_type': event_type,
+                                  'trial_nr': np.array(trial_nr, dtype=np.int64),
+                                  'phase': np.array(phase, dtype=np.int64),
+                                  # every trial starts with phase 0, the index counts the trials as in the trial list
+                                  'trial_index': np.cumsum(np.array(phase) == 0) - 1,
+                                  'n_samples': sums['n_samples'].astype(np.int64),
+                                  'missing': 1 - sums['n_valid']/sums['n_samples'],
+                                  'x': sums['x']/sums['n_valid'],
+                                  'y': sums['y']/sums['n_valid'],
+                                  'pupil': sums['pupil']/sums['n_valid'],
+                                  'slow_velocity': sums['slow_velocity']/sums['n_slow'],
+                                  'okn_direction': np.sign(sums['n_right'] - sums['n_left']).astype(np.int8)})
+        return table
+
+
+def add_schedule(table, plan_file):
+    """ Adds the stimulus index and name of every phase from the session plan (the stimulus_index_list of the trials) """
+    from session_plan import SessionPlan
+    plan = SessionPlan.load(plan_file)
+    n_phases = np.diff(plan.offsets)
+    trial_index = table['trial_index'].to_numpy()
+    phase = table['phase'].to_numpy()
+    known = (trial_index >= 0) & (trial_index < len(plan))
+    known[known] = phase[known] < n_phases[trial_index[known]]
+    stimulus_index = np.full(len(table), -1, dtype=np.int64)
+    stimulus_index[known] = plan.stimulus_indices[plan.offsets[trial_index[known]] + phase[known]]
+    table['stimulus_index'] = stimulus_index
+    table['stimulus'] = np.where(known, plan.lookup_list[np.maximum(stimulus_index, 0)], '')
+    return table
+
+
+def save_table(table, filename):
+    """ Column arrays in a npz file, or a parquet file (tsv without a parquet engine) """
+    if filename.endswith('.npz'):
+        arrays = {name: table[name].to_numpy() for name in table.columns}
+        # strings as unicode arrays, so the file loads without pickle
+        np.savez(filename, **{name: values.astype(str) if values.dtype == object else values for name, values in arrays.items()})
+        return filename
+    from analysis import write_summary
+    return write_summary(table, filename)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Per phase gaze summaries of an EyeLink asc file')
+    parser.add_argument('asc_file')
+    parser.add_argument('output', nargs='?', help='.npz or .parquet file (default <asc>_phases.npz), the key presses go to <output>_keys')
+    parser.add_argument('--plan', help='session plan of the session, adds the stimulus of every phase')
+    parser.add_argument('--chunk-lines', type=int, default=1000000)
+    parser.add_argument('--saccade-velocity', type=float, default=1500, help='in pixels/s, faster samples are not part of the slow eye movements')
+    parser.add_argument('--max-offset', type=int, default=1000, help='in ms, longest time a phase message waited in the tracker queue')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    phases, keys = AscParser(args.chunk_lines, args.saccade_velocity, args.max_offset).parse(args.asc_file)
+    if args.plan:
+        phases = add_schedule(phases, args.plan)
+    output = args.output or os.path.splitext(args.asc_file)[0] + '_phases.npz'
+    base, extension = os.path.splitext(output)
+    print(f'{len(phases)} phases, {int(phases["n_samples"].sum())} samples and {len(keys)} key presses in {time.perf_counter()-start:.1f} s')
+    print('written to', save_table(phases, output), 'and', save_table(keys, base + '_keys' + extension))
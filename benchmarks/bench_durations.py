@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 10:58:38
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import os
+import sys
+import time
+import random
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from percept_durations import PerceptDurations
+
+# the rotating sphere settings: 120 Hz, 4 screenticks per frame, 2.5 s +- 0.5 s percepts
+frames_per_second = 30
+mean_frames = 2.5*frames_per_second
+jitter_frames = int(0.5*frames_per_second)
+
+
+def while_loop(nr_frames_total):
+    """ The jittered branch create_duration_array used before """
+    phase_durations = []
+    while True:
+        percept_duration = mean_frames + random.randrange(-jitter_frames, jitter_frames)
+        current_duration = np.array(phase_durations).sum() + percept_duration
+        if current_duration > nr_frames_total:
+            break
+        phase_durations.append(int(percept_duration))
+    phase_durations.append(int(nr_frames_total - np.array(phase_durations).sum()))
+    return phase_durations
+
+
+def main():
+    rng = np.random.default_rng(0)
+    samples = np.concatenate([[405, 240, 105, 450, 315, 540, 270, 255, 210, 120, 330, 360]]*2)
+    generators = {'uniform': PerceptDurations('uniform', mean_frames, jitter_frames),
+                  'gamma': PerceptDurations('gamma', samples.mean(), 0, samples),
+                  'lognormal': PerceptDurations('lognormal', samples.mean(), 0, samples)}
+
+    for block_seconds in [120, 600, 3600]:
+        nr_frames_total = block_seconds*frames_per_second
+        start = time.perf_counter()
+        durations = while_loop(nr_frames_total)
+        print(f'{block_seconds:5d} s block  while loop          {(time.perf_counter()-start)*1e3:9.2f} ms, {len(durations)} percepts')
+
+        for name, generator in generators.items():
+            start = time.perf_counter()
+            durations = generator.block(rng, nr_frames_total)
+            elapsed = time.perf_counter() - start
+            # the block has to be filled exactly, without empty percepts
+            assert durations.sum() == nr_frames_total and durations.min() >= 1, name
+            print(f'{block_seconds:5d} s block  {name:10s} {elapsed*1e3:18.2f} ms, {len(durations)} percepts, mean {durations[:-1].mean():.0f} frames')
+            if block_seconds == 3600:
+                assert elapsed < 0.05, f'the 1 h block took {elapsed*1e3:.1f} ms'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:06:00
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import os
+import sys
+import time
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from input_thread import InputThread
+
+
+class Clock():
+    def __init__(self):
+        self.start = time.perf_counter()
+
+    def getTime(self):
+        return time.perf_counter() - self.start
+
+
+class Key():
+    def __init__(self, name, duration=None):
+        self.name = name
+        self.rt = None
+        self.duration = duration
+
+
+class SyntheticKeyboard():
+    """
+    Key presses at given times (in s) that only show up once they happened. Like a keyboard without
+    timestamps the keys have no rt, so the time a key is seen is the time it is timestamped with.
+    Polling costs poll_cost seconds (the psychopy keyboard is not free either).
+    """
+
+    def __init__(self, onsets, durations, poll_cost=0.0002):
+        self.clock = Clock()
+        self.onsets = onsets
+        self.durations = durations
+        self.keys = [Key('1') for _ in onsets]
+        self.released = np.zeros(len(onsets), dtype=bool)
+        self.poll_cost = poll_cost
+
+    def getKeys(self, waitRelease=True, clear=True):
+        end = time.perf_counter() + self.poll_cost
+        while time.perf_counter() < end:
+            pass
+        now = self.clock.getTime()
+        keys = []
+        for i in range(np.searchsorted(self.onsets, now, side='right')):
+            if self.released[i]:
+                continue
+            released = self.onsets[i] + self.durations[i] <= now
+            if released:
+                self.keys[i].duration = self.durations[i]
+            elif waitRelease:
+                continue
+            keys.append(self.keys[i])
+            if clear and released:
+                self.released[i] = True
+        return keys
+
+
+def frame_loop(keyboard, input_thread, duration, frame_rate=120):
+    """ Takes the key downs once per frame, like the trial, returns the time the downs were stamped with and the poll time per frame """
+    stamped = []
+    poll_times = []
+    frame = 1/frame_rate
+    next_flip = keyboard.clock.getTime() + frame
+    while keyboard.clock.getTime() < duration:
+        start = time.perf_counter()
+        # without the thread (threaded=False) the keyboard is polled here, in the frame loop
+        stamped += [event.rt for event in input_thread.events() if event.kind == 'down']
+        poll_times.append(time.perf_counter() - start)
+        # the flip
+        while keyboard.clock.getTime() < next_flip:
+            time.sleep(0.0002)
+        next_flip += frame
+    return np.array(stamped), np.array(poll_times)
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    rng = np.random.default_rng(0)
+    onsets = 0.2 + np.cumsum(rng.uniform(0.1, 0.4, int(duration/0.25)))
+    onsets = onsets[onsets < duration - 0.5]
+    durations = rng.uniform(0.05, 0.2, len(onsets))
+
+    # the Input poll interval of the settings, 0 polls in the frame loop
+    for poll_interval in [0, 0.005, 0.001]:
+        keyboard = SyntheticKeyboard(onsets, durations)
+        input_thread = InputThread(keyboard, poll_interval, threaded=poll_interval > 0)
+        stamped, poll_times = frame_loop(keyboard, input_thread, duration)
+        input_thread.close()
+        error = (stamped - onsets[:len(stamped)])*1e3
+        name = f'thread {poll_interval*1e3:g} ms' if poll_interval > 0 else 'frame loop'
+        print(f'{name:13s} {len(stamped)} presses, timestamp error mean {error.mean():5.2f} ms, max {error.max():5.2f} ms, '
+              f'input cost per frame {poll_times.mean()*1e6:7.1f} us')
+
+
+if __name__ == '__main__':
+    main()
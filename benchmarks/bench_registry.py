@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 10:36:13
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import os
+import sys
+import time
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stimulus_registry import StimulusRegistry
+
+
+def rs_lookup_list(nr_of_frames):
+    """ Same names and order as RSStimulus.create_lookup_list """
+    ambiguous_names = [f'ambiguous_{i}' for i in range(nr_of_frames)]
+    unambiguous_left_names = [f'unambiguous_left_{i}' for i in range(nr_of_frames)]
+    unambiguous_right_names = [f'unambiguous_right_{i}' for i in range(nr_of_frames)]
+    tracking_names = [f'tracking_test_{i}' for i in range(4)]
+    return ambiguous_names + unambiguous_left_names + unambiguous_right_names + ['button_instructions', 'fixation_screen'] + tracking_names
+
+
+def block_plan(n_blocks, nr_phases_ambig, unambiguous_durations):
+    """ Alternating ambiguous and unambiguous blocks (even subject) """
+    plan = []
+    for block_ID in range(1, n_blocks+1):
+        if block_ID % 2 == 0:
+            plan.append(('ambiguous', nr_phases_ambig))
+        else:
+            plan.append(('unambiguous', unambiguous_durations))
+    return plan
+
+
+def build_lookup_list(plan, lookup_list, nr_of_frames):
+    """ Index construction as done before the registry (linear lookup_list.index scans) """
+    index_lists = []
+    trial_nr = 1
+    for block_type, durations in plan:
+        if block_type == 'ambiguous':
+            stimulus_index_list = []
+            for phase_index in range(durations):
+                frame_index = (phase_index+1)%nr_of_frames
+                stimulus_index_list.append(lookup_list.index(f'ambiguous_{frame_index}'))
+            index_lists.append(stimulus_index_list)
+        else:
+            last_frame_previous = 0
+            for stim_duration in durations:
+                trial_type = 'right' if trial_nr % 2 == 0 else 'left'
+                stimulus_index_list = []
+                for phase_index in range(int(stim_duration)):
+                    frame_index = (phase_index+last_frame_previous+1)%nr_of_frames
+                    stimulus_index_list.append(lookup_list.index('unambiguous_' + trial_type + f'_{frame_index}'))
+                index_lists.append(stimulus_index_list)
+                last_frame_previous = int(stim_duration)
+                trial_nr += 1
+    return index_lists
+
+
+def build_registry(plan, registry):
+    """ Index construction with the vectorized registry """
+    index_lists = []
+    trial_nr = 1
+    for block_type, durations in plan:
+        if block_type == 'ambiguous':
+            index_lists.append(registry.frames('ambiguous', np.arange(1, durations+1)))
+        else:
+            last_frame_previous = 0
+            for stim_duration in durations:
+                trial_type = 'right' if trial_nr % 2 == 0 else 'left'
+                phase_indices = np.arange(int(stim_duration)) + last_frame_previous + 1
+                index_lists.append(registry.frames('unambiguous_' + trial_type, phase_indices))
+                last_frame_previous = int(stim_duration)
+                trial_nr += 1
+    return index_lists
+
+
+def timeit(function, *args, repeats=5):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(*args)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    # RS defaults from settings_RS.yml: 120 Hz, screentick conversion 30, 120 s ambiguous blocks
+    n_blocks = 4
+    monitor_refreshrate = 120
+    screentick_conversion = 30
+    stim_dur_ambiguous = 120
+    screenticks_per_frame = int(monitor_refreshrate/screentick_conversion)
+    nr_phases_ambig = int(stim_dur_ambiguous*monitor_refreshrate/screenticks_per_frame)
+    unambiguous_durations = [405, 240, 105, 450, 315, 540, 270, 255, 210, 120, 330, 360]
+
+    print(f'{n_blocks}-block RS session, {nr_phases_ambig} phases per ambiguous block')
+    print('frames  lookup_list.index [ms]  registry [ms]  speed-up')
+    for nr_of_frames in [95, 190, 380, 760]:
+        lookup_list = rs_lookup_list(nr_of_frames)
+        registry = StimulusRegistry(lookup_list)
+        for prefix in ['ambiguous', 'unambiguous_left', 'unambiguous_right']:
+            registry.register_sequence(prefix, nr_of_frames, cyclic=True)
+        plan = block_plan(n_blocks, nr_phases_ambig, unambiguous_durations)
+
+        t_before, before = timeit(build_lookup_list, plan, lookup_list, nr_of_frames, repeats=1)
+        t_after, after = timeit(build_registry, plan, registry)
+        assert all(np.array_equal(a, b) for a, b in zip(before, after))
+        print(f'{nr_of_frames:6d}  {t_before*1000:22.1f}  {t_after*1000:13.2f}  {t_before/t_after:8.0f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 10:37:22
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from response_recorder import ResponseRecorder
+
+
+def simulated_keys(n_events, seed=0):
+    rng = np.random.default_rng(seed)
+    onsets = np.cumsum(rng.uniform(0.2, 2, n_events))
+    durations = rng.uniform(0.05, 0.3, n_events)
+    names = rng.choice(['up', 'down'], n_events)
+    return list(zip(onsets, durations, names))
+
+
+def parameters(trial_nr):
+    return {'block_type': 'ambiguous', 'trial_type': 'ambiguous', 'trial_nr': trial_nr,
+            'block_ID': 2, 'color_comb': np.nan, 'phase_length': 3600}
+
+
+def log_with_loc(keys):
+    """ The per-cell global_log writes BPTrial.get_events used before """
+    global_log = pd.DataFrame(columns=['trial_nr', 'onset', 'event_type', 'phase', 'response', 'nr_frames'])
+    worst = 0
+    for i, (t, duration, name) in enumerate(keys):
+        start = time.perf_counter()
+        idx = global_log.shape[0]
+        global_log.loc[idx, 'event_type'] = 'ambiguous'
+        global_log.loc[idx, 'trial_nr'] = 1
+        global_log.loc[idx, 'onset'] = t
+        global_log.loc[idx, 'key_duration'] = duration
+        global_log.loc[idx, 'phase'] = i
+        global_log.loc[idx, 'response'] = name
+        global_log.loc[idx, 'response_button'] = 'upper_stim1'
+        global_log.loc[idx, 'nr_frames'] = 0
+        for param, val in parameters(1).items():
+            global_log.loc[idx, param] = val
+        worst = max(worst, time.perf_counter() - start)
+    return global_log, worst
+
+
+def log_with_recorder(keys):
+    """ The preallocated recorder, converted to a DataFrame at the end (as in close) """
+    recorder = ResponseRecorder()
+    params = parameters(1)
+    worst = 0
+    for i, (t, duration, name) in enumerate(keys):
+        start = time.perf_counter()
+        recorder.append('ambiguous', 1, t, duration, i, name, 'upper_stim1', params)
+        worst = max(worst, time.perf_counter() - start)
+    return recorder.to_dataframe(), worst
+
+
+def main():
+    n_events = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    keys = simulated_keys(n_events)
+
+    for name, function in [('global_log.loc', log_with_loc), ('ResponseRecorder', log_with_recorder)]:
+        start = time.perf_counter()
+        global_log, worst = function(keys)
+        total = time.perf_counter() - start
+        print(f'{name:17s} {n_events} key events: total {total:8.3f} s, '
+              f'mean {total/n_events*1e6:9.1f} us/event, worst {worst*1e3:7.2f} ms/event, rows {len(global_log)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:11:27
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import os
+import sys
+import time
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rotation_phase import RotationPhase
+
+nr_of_frames = 190
+
+
+def old_loop(stim_duration_list):
+    """ The frame numbers create_unambiguous_block computed before (trial_nr starts even, so right first) """
+    last_frame_previous = 0
+    dummy = 0
+    trial_nr = 0
+    frames = []
+    for stim_duration in stim_duration_list:
+        trial_type = 'right' if trial_nr % 2 == 0 else 'left'
+        nr_phases_unambig = int(stim_duration)
+        last_frame_previous = (last_frame_previous+dummy) % nr_of_frames
+        if trial_type == 'right':
+            last_frame_previous = nr_of_frames - last_frame_previous
+        elif trial_type == 'left':
+            last_frame_previous = abs(last_frame_previous - nr_of_frames)
+        trial_nr += 1
+        frames.append(np.mod(np.arange(nr_phases_unambig) + last_frame_previous + 1, nr_of_frames))
+        dummy = last_frame_previous
+        last_frame_previous = nr_phases_unambig
+    return frames
+
+
+def directions_of(n):
+    return np.where(np.arange(n) % 2 == 0, 1, -1)
+
+
+def positions_of(frames):
+    """ Back from the frame numbers of the left and right sequences to the positions of the sphere """
+    directions = directions_of(len(frames))
+    return np.concatenate([f if d > 0 else nr_of_frames - 1 - f for f, d in zip(frames, directions)])
+
+
+def steps_of(positions, start=0):
+    """ Movement between consecutive frames in positions, -nr_of_frames/2 .. nr_of_frames/2 """
+    steps = np.diff(np.concatenate([[start], positions]))
+    return (steps + nr_of_frames//2) % nr_of_frames - nr_of_frames//2
+
+
+def check_continuity(rng, n_blocks=2000):
+    """ Random blocks (1-400 percepts of 1-500 frames): every frame moves the sphere by exactly one position """
+    for _ in range(n_blocks):
+        n = int(rng.integers(1, 400))
+        n_frames = rng.integers(1, 500, n)
+        start = int(rng.integers(nr_of_frames))
+        rotation = RotationPhase(nr_of_frames, start)
+        frames = rotation.block(n_frames, directions_of(n))
+        assert [len(f) for f in frames] == n_frames.tolist()
+        assert all(((f >= 0) & (f < nr_of_frames)).all() for f in frames)
+        positions = positions_of(frames)
+        steps = steps_of(positions, start)
+        assert (np.abs(steps) == 1).all()
+        # the steps go in the direction of the percept
+        assert (steps == np.repeat(directions_of(n), n_frames)).all()
+        assert rotation.position == positions[-1]
+    # a block that is created in two parts is the same block
+    n_frames = rng.integers(1, 500, 300)
+    rotation = RotationPhase(nr_of_frames)
+    parts = rotation.block(n_frames[:150], directions_of(300)[:150]) + rotation.block(n_frames[150:], directions_of(300)[150:])
+    whole = RotationPhase(nr_of_frames).block(n_frames, directions_of(300))
+    assert all((a == b).all() for a, b in zip(parts, whole))
+
+
+def main():
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    check_continuity(rng)
+    print(f'continuity checks passed ({time.perf_counter()-start:.1f} s)')
+
+    for n_switches in [10, 100, 500, 2000]:
+        n_frames = rng.integers(45, 105, n_switches)
+        old_time = min(timed(old_loop, n_frames) for _ in range(5))
+        new_time = min(timed(lambda d: RotationPhase(nr_of_frames).block(d, directions_of(len(d))), n_frames) for _ in range(5))
+        old_steps = steps_of(positions_of(old_loop(n_frames)))
+        print(f'{n_switches:5d} switches: old loop {old_time*1e3:7.2f} ms, rotation phase {new_time*1e3:6.2f} ms, '
+              f'frames the old loop skipped or repeated: {int((np.abs(old_steps) != 1).sum())}')
+
+
+def timed(function, n_frames):
+    start = time.perf_counter()
+    function(n_frames)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    main()
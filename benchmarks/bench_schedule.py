@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 10:41:37
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from phase_schedule import PhaseSchedule
+
+
+def ambiguous_lists(nr_phases, seconds_per_frame, nr_of_frames):
+    """ One ambiguous RS trial as it was built before (Python lists) """
+    phase_durations = [seconds_per_frame]*nr_phases
+    stimulus_index_list = [(phase_index+1)%nr_of_frames for phase_index in range(nr_phases)]
+    phase_names = ['stim']*nr_phases # made by exptools2 for every trial
+    return phase_durations, stimulus_index_list, phase_names
+
+
+def ambiguous_schedule(nr_phases, seconds_per_frame, nr_of_frames):
+    return PhaseSchedule(seconds_per_frame, np.arange(1, nr_phases+1) % nr_of_frames, 'seconds')
+
+
+def measure(function, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args)
+    duration = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, duration, memory
+
+
+def main():
+    nr_of_frames = 190
+    print('protocol                                   phases   lists [MB]  schedule [MB]  lists [ms]  schedule [ms]')
+    for minutes, refreshrate, screentick_conversion in [(2, 120, 30), (10, 240, 30), (10, 240, 240), (20, 240, 240)]:
+        screenticks_per_frame = int(refreshrate/screentick_conversion)
+        seconds_per_frame = 1/refreshrate*screenticks_per_frame
+        nr_phases = int(minutes*60/seconds_per_frame)
+
+        _, t_lists, m_lists = measure(ambiguous_lists, nr_phases, seconds_per_frame, nr_of_frames)
+        _, t_schedule, m_schedule = measure(ambiguous_schedule, nr_phases, seconds_per_frame, nr_of_frames)
+        protocol = f'{minutes:2d} min ambiguous, {refreshrate} Hz, {screenticks_per_frame} ticks/frame'
+        print(f'{protocol:40s} {nr_phases:8d} {m_lists/1e6:12.2f} {m_schedule/1e6:14.3f} {t_lists*1e3:11.1f} {t_schedule*1e3:14.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:13:27
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import os
+import sys
+import time
+import types
+import tracemalloc
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sphere_generator import SphereGenerator
+from smooth_sphere import SmoothSphere
+
+
+class ElementArray():
+    """ Takes the arrays like an ElementArrayStim, without a window """
+
+    def __init__(self, win, **kwargs):
+        pass
+
+    def draw(self):
+        pass
+
+
+class CopyingElementArray(ElementArray):
+    """
+    Setters that copy and check the arrays like the ones of the psychopy ElementArrayStim: xys and
+    sizes become new Nx2 float arrays, the colours are checked and turned into rgba
+    """
+
+    def __init__(self, win, nElements, xys, sizes, colors, **kwargs):
+        self.nElements = nElements
+        self.xys = xys
+        self.sizes = sizes
+        self.colors = colors
+
+    def nx2(self, value):
+        value = np.array(value, dtype=float)
+        if value.ndim == 1:
+            value = np.repeat(value[:, None], 2, axis=1)
+        if value.shape != (self.nElements, 2):
+            raise ValueError('wrong shape')
+        return value
+
+    @property
+    def xys(self):
+        return self._xys
+
+    @xys.setter
+    def xys(self, value):
+        self._xys = self.nx2(value)
+        self.need_vertex_update = True
+
+    @property
+    def sizes(self):
+        return self._sizes
+
+    @sizes.setter
+    def sizes(self, value):
+        self._sizes = self.nx2(value)
+        self.need_vertex_update = True
+
+    @property
+    def colors(self):
+        return self._colors
+
+    @colors.setter
+    def colors(self, value):
+        value = np.array(value, dtype=float)
+        if value.shape != (self.nElements, 3) or np.abs(value).max() > 1:
+            raise ValueError('wrong colours')
+        self._colors = value
+        self.rgbas = np.hstack([(value + 1)/2, np.ones((self.nElements, 1))])
+
+
+def main():
+    visual_module = types.SimpleNamespace(ElementArrayStim=ElementArray)
+    nr_of_frames = 190
+    stim_size = 5
+
+    for nr_of_dots in [350, 1000, 5000]:
+        sphere = SphereGenerator(nr_of_dots, 5, 0.02, contrasts=(0.25, 0.75, 0, 1), dot_size_range=(0.012, 0.028))
+        smooth = SmoothSphere(None, sphere, nr_of_frames, stim_size, 360/nr_of_frames, visual_module)
+
+        # at the angles of the rendered frames the dots are the ones of the frames
+        xys, sizes, luminances = sphere.elements(nr_of_frames)
+        error = 0
+        for frame in range(1, nr_of_frames+1):
+            smooth.draw(1)
+            frame = frame % nr_of_frames
+            error = max(error, np.abs(smooth.xys - xys[frame]*stim_size).max(), np.abs(smooth.sizes - sizes[frame]*stim_size).max(),
+                        np.abs(smooth.colors[:, 0] - (2*luminances[frame] - 1)).max())
+
+        # a speed sweep at 240 Hz
+        times = []
+        for speed in [30, 60, 90, 120]:
+            smooth.step = np.deg2rad(speed/240)
+            start = time.perf_counter()
+            for _ in range(240):
+                smooth.draw(1)
+            times.append((time.perf_counter() - start)/240)
+
+        # the same ticks with setters that copy like psychopy
+        copying = SmoothSphere(None, sphere, nr_of_frames, stim_size, 360/nr_of_frames, types.SimpleNamespace(ElementArrayStim=CopyingElementArray))
+        start = time.perf_counter()
+        for _ in range(960):
+            copying.draw(1)
+        copy_time = (time.perf_counter() - start)/960
+
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        for _ in range(1000):
+            smooth.draw(-1)
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename') if stat.size_diff > 0)
+        print(f'{nr_of_dots:5d} dots: largest difference to the rendered frames {error:.1e}, '
+              f'{np.mean(times)*1e6:6.1f} us per tick, {copy_time*1e6:6.1f} us with copying setters, {allocated} bytes kept after 1000 ticks')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:15:51
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+from PIL import Image
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stimulus_store import StimulusStore
+
+
+def write_stimuli(directory, nr_fading_stimuli, resolution):
+    """ Noise houses and faces, the fading images blend them like the real ones (step 0 is the house, the last step the face) """
+    rng = np.random.default_rng(0)
+    images = {name: rng.integers(0, 256, (resolution, resolution, 3), dtype=np.uint8) for name in ['house_blue', 'face_red', 'house_red', 'face_blue']}
+    for name, image in images.items():
+        Image.fromarray(image).save(os.path.join(directory, name + '.bmp'))
+    os.makedirs(os.path.join(directory, 'fading'))
+    for fading, start, end in [('hb2fr', 'house_blue', 'face_red'), ('hr2fb', 'house_red', 'face_blue')]:
+        for step in range(nr_fading_stimuli):
+            weight = step/(nr_fading_stimuli-1)
+            image = np.round((1-weight)*images[start] + weight*images[end]).astype(np.uint8)
+            Image.fromarray(image).save(os.path.join(directory, 'fading', f'fading_{fading}_{step}.bmp'))
+
+
+def fading_files(directory, nr_fading_stimuli, transition_length, reversed_steps):
+    """
+    The files of the four fading sequences. With reversed_steps the reversed sequences open the steps
+    counted from the end (nr_fading_stimuli-1-step, other files than the forward ones), otherwise
+    they are the forward files in reverse order (BRStimulus.load_stimuli)
+    """
+    steps = np.arange(transition_length)*int(nr_fading_stimuli/transition_length)
+    reversed_files = nr_fading_stimuli - 1 - steps if reversed_steps else steps[::-1]
+    files = [os.path.join(directory, 'fading', f'fading_{fading}_{step}.bmp') for fading, sequence in
+             [('hb2fr', steps), ('hr2fb', reversed_files), ('hb2fr', reversed_files), ('hr2fb', steps)] for step in sequence]
+    return [os.path.join(directory, name + '.bmp') for name in ['house_red', 'house_blue', 'face_red', 'face_blue']] + files
+
+
+def create(pixels):
+    # stands in for the texture upload of an ImageStim (a copy of the pixels)
+    return np.array(pixels)
+
+
+def main():
+    resolution = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+    transition_length = 20
+    nr_fading_stimuli = 255
+    with tempfile.TemporaryDirectory() as directory:
+        write_stimuli(directory, nr_fading_stimuli, resolution)
+
+        # before: the reversed sequences open other steps and every entry is its own stimulus
+        files = fading_files(directory, nr_fading_stimuli, transition_length, reversed_steps=True)
+        start = time.perf_counter()
+        stims = [create(np.asarray(Image.open(filename).convert('RGB'))) for filename in files]
+        old_time = time.perf_counter() - start
+        old_bytes = sum(stim.nbytes for stim in stims)
+
+        files = fading_files(directory, nr_fading_stimuli, transition_length, reversed_steps=False)
+        store = StimulusStore(create)
+        start = time.perf_counter()
+        stims = store.image_stims(files)
+        store_time = time.perf_counter() - start
+        store_bytes = sum(stim.nbytes for stim in store.stims.values())
+
+        print(f'{len(files)} stimuli: one stimulus per entry {old_time:.2f} s {old_bytes/2**20:.0f} MB, '
+              f'store with the reversed files {store_time:.2f} s {store_bytes/2**20:.0f} MB ({len(store.stims)} files)')
+
+
+if __name__ == '__main__':
+    main()
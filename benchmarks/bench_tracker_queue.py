@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 10:50:47
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import os
+import sys
+import time
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tracker_queue import TrackerMessageQueue
+
+
+class SlowTracker():
+    """ Fake EyeLink: most messages take 0.1 ms, some block for much longer (loaded link) """
+
+    def __init__(self, slow_fraction=0.05, slow_delay=0.01, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.slow_fraction = slow_fraction
+        self.slow_delay = slow_delay
+        self.messages = []
+
+    def sendMessage(self, msg):
+        time.sleep(self.slow_delay if self.rng.random() < self.slow_fraction else 0.0001)
+        self.messages.append(msg)
+
+
+def frame_loop(send, n_frames, monitor_refreshrate, screenticks_per_frame, key_frames):
+    """
+    Message part of the frame loop of an ambiguous RS block: a phase message every
+    screenticks_per_frame flips and a message for every key press. The loop waits for the
+    next screen tick like the flip would. Returns the time of the message part of every frame.
+    """
+    frame_times = np.zeros(n_frames)
+    next_flip = time.perf_counter()
+    for frame in range(n_frames):
+        next_flip += 1/monitor_refreshrate
+        start = time.perf_counter()
+        if frame % screenticks_per_frame == 0:
+            send(f'start_type-stim_trial-1_phase-{frame//screenticks_per_frame}')
+        if key_frames[frame]:
+            send(f'start_type-ambiguous_trial-1_phase-{frame//screenticks_per_frame}_key-1_time-{frame/120:.4f}_duration-0.2')
+        frame_times[frame] = time.perf_counter() - start
+        time.sleep(max(next_flip - time.perf_counter(), 0))
+    return frame_times
+
+
+def main():
+    # 10 s of an ambiguous RS block at 120 Hz (4 ticks per frame) with 2 button presses per second
+    monitor_refreshrate = 120
+    n_frames = 10*monitor_refreshrate
+    rng = np.random.default_rng(1)
+    key_frames = rng.random(n_frames) < 2/monitor_refreshrate
+
+    print('                  messages  mean [ms]  p99 [ms]  max [ms]')
+    results = {}
+    for mode in ['direct', 'queue']:
+        tracker = SlowTracker()
+        if mode == 'direct':
+            frame_times = frame_loop(tracker.sendMessage, n_frames, monitor_refreshrate, 4, key_frames)
+        else:
+            tracker_queue = TrackerMessageQueue(tracker)
+            frame_times = frame_loop(tracker_queue.send, n_frames, monitor_refreshrate, 4, key_frames)
+            tracker_queue.close()
+        results[mode] = tracker.messages
+        print(f'{mode:16s} {len(tracker.messages):9d} {frame_times.mean()*1e3:10.3f} {np.percentile(frame_times, 99)*1e3:9.3f} {frame_times.max()*1e3:9.3f}')
+
+    # the queue sends the same messages in the same order, with the waiting time in ms in front (if it is not 0)
+    queued = [msg.split(' ', 1) if not msg.startswith('start_type') else ['0', msg] for msg in results['queue']]
+    assert [msg for _, msg in queued] == results['direct']
+    offsets = np.array([int(offset) for offset, _ in queued])
+    print(f'all messages arrived in order, {np.count_nonzero(offsets)} with an offset, offset mean {offsets.mean():.1f} ms, max {offsets.max()} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 10:48:29
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import os
+import io
+import sys
+import json
+import time
+import types
+import shutil
+import platform
+import argparse
+import tempfile
+import contextlib
+from datetime import datetime
+import yaml
+import numpy as np
+from PIL import Image
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from headless import HeadlessSession, NullWindow, VirtualTime, ScriptedKeyboard, null_visual, random_keys
+from sphere_generator import spheres_from_settings
+from stimulus_rotating_sphere import RSStimulus
+from stimulus_rivalry import BRStimulus
+from timing_modes import timing_modes
+
+repository = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+settings_files = {task: os.path.join(repository, f'settings_{task}.yml') for task in ['BR', 'RS']}
+
+
+def load_settings(task, overrides):
+    with open(settings_files[task]) as f:
+        settings = yaml.safe_load(f)
+    for section, values in overrides.items():
+        settings[section].update(values)
+    return settings
+
+
+def write_fixtures(directory, resolution, nr_of_frames):
+    """
+    Synthetic bmps with the filenames the stimulus classes expect: the rotating sphere frames are
+    rendered with the sphere generator, the BR images are noise. Returns the settings overrides
+    that point the stimulus classes to the fixtures.
+    """
+    rs_path = os.path.join(directory, 'RS') + '/'
+    br_path = os.path.join(directory, 'BR') + '/'
+    os.makedirs(rs_path)
+    os.makedirs(br_path + 'fading')
+
+    rs_overrides = {'Stimulus path': rs_path, 'Stimulus resolution': resolution, 'Number frames': nr_of_frames,
+                    'Stimulus source': 'bmp', 'Stimulus cache': os.path.join(directory, 'cache')}
+    settings = load_settings('RS', {'Stimulus settings': rs_overrides})['Stimulus settings']
+    # the filename methods only need the settings attributes
+    names = types.SimpleNamespace(stimulus_resolution=resolution, nr_of_frames=nr_of_frames, nr_of_dots=settings['Number dots'],
+                                  dot_size=settings['Dot size'], sphere_number_ambiguous=settings['Sphere number ambiguous'],
+                                  sphere_number_unambiguous=settings['Sphere number unambiguous'], black_at_back=settings['Black at back'],
+                                  white_at_back=settings['White at back'], black_at_front=settings['Black at front'],
+                                  white_at_front=settings['White at front'], dot_size_min=settings['Dot size min'], dot_size_max=settings['Dot size max'])
+    ambiguous, unambiguous = spheres_from_settings(settings)
+    for sphere, filename in [(ambiguous, RSStimulus.ambiguous_filename), (unambiguous, RSStimulus.unambiguous_filename)]:
+        for i, frame in enumerate(sphere.render(nr_of_frames, resolution, settings['Background luminance'])):
+            Image.fromarray(frame).save(rs_path + filename(names, i+1))
+    Image.fromarray(np.full((resolution, resolution), 255, dtype=np.uint8)).save(rs_path + 'FixDot.bmp')
+
+    br_settings = load_settings('BR', {})['Stimulus settings']
+    rng = np.random.default_rng(0)
+    br_files = ['house_red', 'house_blue', 'face_red', 'face_blue', 'rivalry_redface', 'rivalry_redhouse', 'fixation_screen']
+    # only the fading steps that BRStimulus.load_stimuli opens
+    nr_fading_stimuli = br_settings['Nr fading stimuli']
+    images_per_combi = int(br_settings['Transition length'])
+    for step in range(0, images_per_combi*(nr_fading_stimuli//images_per_combi), nr_fading_stimuli//images_per_combi):
+        br_files += [f'fading/fading_{fading}_{step}' for fading in ['hb2fr', 'hr2fb']]
+    for filename in br_files:
+        Image.fromarray(rng.integers(0, 256, (resolution, resolution, 3), dtype=np.uint8)).save(br_path + filename + '.bmp')
+
+    return {'RS': {'Stimulus settings': rs_overrides}, 'BR': {'Stimulus settings': {'Stimulus path': br_path}}}
+
+
+def quiet(function, *args, **kwargs):
+    """ The session prints every block and trial duration """
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+def summary(values):
+    values = np.asarray(values, dtype=float)
+    return {'n': int(len(values)), 'mean': float(values.mean()), 'p50': float(np.percentile(values, 50)),
+            'p99': float(np.percentile(values, 99)), 'max': float(values.max())}
+
+
+class TimedSession(HeadlessSession):
+    """ Headless session that times the stimulus and trial creation """
+
+    def create_stimuli(self):
+        start = time.perf_counter()
+        super().create_stimuli()
+        self.create_stimuli_time = time.perf_counter() - start
+
+    def create_trials(self):
+        start = time.perf_counter()
+        super().create_trials()
+        self.create_trials_time = time.perf_counter() - start
+
+
+class TimedNullWindow(NullWindow):
+    """ Takes the wall clock time of every flip, the interval is the cost of one frame of the trial loop """
+
+    def __init__(self, virtual_time, size):
+        super().__init__(virtual_time, size)
+        self.flip_times = []
+
+    def flip(self, clearBuffer=True):
+        self.flip_times.append(time.perf_counter())
+        return super().flip(clearBuffer)
+
+
+class DrawTimedSession(HeadlessSession):
+
+    def setup(self, subject_ID, task, plan_file=None):
+        self.draw_times = []
+        super().setup(subject_ID, task, plan_file)
+
+    def draw_stimulus(self):
+        start = time.perf_counter()
+        super().draw_stimulus()
+        self.draw_times.append(time.perf_counter() - start)
+
+
+def bench_construction(fixture_overrides, output_dir, quick):
+    """ Session __init__ (stimuli and trials) over blocks, refresh rates and screentick conversions """
+    blocks = [2, 4] if quick else [2, 4, 8]
+    refreshrates = [60, 120] if quick else [60, 120, 144, 240]
+    screentick_conversions = [30] if quick else [15, 30, 60]
+
+    results = []
+    for task in ['BR', 'RS']:
+        for n_blocks in blocks:
+            for refreshrate in refreshrates:
+                for screentick_conversion in screentick_conversions:
+                    if screentick_conversion > refreshrate:
+                        continue
+                    overrides = {'Task settings': {'Blocks': n_blocks, 'Monitor refreshrate': refreshrate,
+                                                   'Screentick conversion': screentick_conversion,
+                                                   # the predefined durations only cover two unambiguous blocks
+                                                   'Previous percept duration': 3, 'Percept duration jitter': 0.5},
+                                 **fixture_overrides[task]}
+                    start = time.perf_counter()
+                    session = quiet(TimedSession, f'bench_{task}', output_dir, settings_files[task], 2, task, settings_overrides=overrides)
+                    total = time.perf_counter() - start
+                    results.append({'task': task, 'blocks': n_blocks, 'refreshrate': refreshrate, 'screentick_conversion': screentick_conversion,
+                                    'trials': len(session.trial_list), 'phases': int(sum(len(trial.schedule) for trial in session.trial_list)),
+                                    'init': total, 'create_stimuli': session.create_stimuli_time, 'create_trials': session.create_trials_time})
+                    print(f'construction {task} {n_blocks} blocks {refreshrate} Hz conversion {screentick_conversion}: '
+                          f'{total*1e3:.1f} ms ({session.create_trials_time*1e3:.1f} ms create_trials)')
+    return results
+
+
+def bench_loading(fixture_overrides, use_window, repeats):
+    """ Stimulus loading from the bmp fixtures: without cache, cache miss (writes the cache) and cache hit """
+    if use_window:
+        from psychopy import visual
+        win = visual.Window(size=[800, 600], units='deg', fullscr=False, visible=False, monitor='testMonitor')
+        visual_module = visual
+    else:
+        win = NullWindow(VirtualTime(120))
+        visual_module = null_visual
+
+    results = []
+    for task, stimulus_class in [('BR', BRStimulus), ('RS', RSStimulus)]:
+        cache = fixture_overrides[task]['Stimulus settings'].get('Stimulus cache')
+        conditions = [('no cache', False), ('cache miss', cache), ('cache hit', cache)] if task == 'RS' else [('images', None), ('blend', None)]
+        for condition, stimulus_cache in conditions:
+            overrides = {section: dict(values) for section, values in fixture_overrides[task].items()}
+            if task == 'RS':
+                overrides['Stimulus settings']['Stimulus cache'] = stimulus_cache
+            else:
+                overrides['Stimulus settings']['Fading mode'] = condition
+            settings = load_settings(task, overrides)
+
+            times = []
+            for _ in range(1 if condition == 'cache miss' else repeats):
+                if condition == 'cache miss':
+                    shutil.rmtree(cache, ignore_errors=True)
+                start = time.perf_counter()
+                stimuli = quiet(stimulus_class, settings, win, 'instructions', visual_module)
+                times.append(time.perf_counter() - start)
+            result = {'task': task, 'condition': condition, 'window': use_window, 'stimuli': len(stimuli.unique_stimulus_list), 'load': summary(times)}
+            if task == 'RS':
+                result['steps'] = dict(stimuli.load_times)
+            results.append(result)
+            print(f'loading {task} {condition}: {min(times)*1e3:.1f} ms')
+
+    if use_window:
+        win.close()
+    return results
+
+
+def bench_frame_loop(fixture_overrides, output_dir, quick):
+    """ Cost of one frame of the trial loop (draw_stimulus, flip of the null window, get_events) """
+    results = []
+    for task in ['BR', 'RS']:
+        for timing_mode in timing_modes:
+            for rate in [0, 2]:
+                overrides = {'Task settings': {'Blocks': 2, 'Timing mode': timing_mode, 'Stimulus duration ambiguous': 20 if quick else 120},
+                             **fixture_overrides[task]}
+                session = quiet(DrawTimedSession, f'bench_{task}', output_dir, settings_files[task], 2, task, settings_overrides=overrides)
+                session.win = TimedNullWindow(session.virtual_time, session.win.size)
+                session.kb = ScriptedKeyboard(session.virtual_time, random_keys(session.planned_duration(), rate, ['1', '2']))
+
+                start = time.perf_counter()
+                quiet(session.run)
+                duration = time.perf_counter() - start
+
+                frame_times = np.diff(session.win.flip_times)
+                results.append({'task': task, 'timing_mode': timing_mode, 'key_rate': rate, 'flips': session.virtual_time.n_flips,
+                                'session_time': session.virtual_time.now(), 'run': duration,
+                                'frame': summary(frame_times), 'draw_stimulus': summary(session.draw_times)})
+                print(f'frame loop {task} {timing_mode} {rate} keys/s: {frame_times.mean()*1e6:.1f} us per frame '
+                      f'(p99 {np.percentile(frame_times, 99)*1e6:.1f} us), {session.virtual_time.now()/duration:.0f}x real time')
+    return results
+
+
+def bench_onset_precision(fixture_overrides, output_dir, quick):
+    """
+    Phase onsets of the timing modes on the same trial list (same seed), with exact flips, dropped
+    flips and flip jitter. The onset errors are in ticks relative to the start of every trial, the
+    first trial is left out (exptools2 shortens its first phase by one frame).
+    """
+    results = []
+    for task in ['BR', 'RS']:
+        overrides = {'Task settings': {'Blocks': 2, 'Random seed': 1, 'Event stream': False, 'Input poll interval': 0,
+                                       'Stimulus duration ambiguous': 20 if quick else 120},
+                     **fixture_overrides[task]}
+        session = quiet(HeadlessSession, f'bench_{task}', output_dir, settings_files[task], 2, task, settings_overrides=overrides)
+        n_flips = int(session.planned_duration()*session.settings['Task settings']['Monitor refreshrate'])
+        # one flip in 200 takes two ticks
+        dropped_flips = np.random.default_rng(0).choice(n_flips, n_flips//200, replace=False)
+        conditions = {'exact flips': {}, 'dropped flips': {'dropped_flips': dropped_flips}, 'flip jitter 0.1': {'flip_jitter': 0.1}}
+        for timing_mode in timing_modes:
+            for condition, flips in conditions.items():
+                overrides['Task settings']['Timing mode'] = timing_mode
+                session = quiet(HeadlessSession, f'bench_{task}', output_dir, settings_files[task], 2, task, settings_overrides=overrides, **flips)
+                quiet(session.run)
+                errors = session.schedule_report()['max_onset_error'].to_numpy()[1:]
+                results.append({'task': task, 'timing_mode': timing_mode, 'condition': condition, 'trials': len(errors),
+                                'trials_off': int(np.count_nonzero(errors > 0.5)), 'max_onset_error': float(np.nanmax(errors))})
+                print(f'onset precision {task} {timing_mode} {condition}: {results[-1]["trials_off"]} of {len(errors)} trials '
+                      f'with a phase off by a tick or more, largest error {results[-1]["max_onset_error"]:.2f} ticks')
+    return results
+
+
+def compare(results, previous_file):
+    """ Prints the ratio to a previous result file for the construction and loading times """
+    with open(previous_file) as f:
+        previous = json.load(f)
+    keys = {'construction': ('task', 'blocks', 'refreshrate', 'screentick_conversion'), 'loading': ('task', 'condition', 'window'),
+            'frame_loop': ('task', 'timing_mode', 'key_rate')}
+    values = {'construction': lambda r: r['init'], 'loading': lambda r: r['load']['p50'], 'frame_loop': lambda r: r['frame']['mean']}
+    print(f'\ncompared to {previous_file} ({previous["machine"]["node"]}, {previous["date"]}):')
+    for benchmark, key in keys.items():
+        before = {tuple(r[k] for k in key): values[benchmark](r) for r in previous.get(benchmark, [])}
+        for result in results.get(benchmark, []):
+            name = tuple(result[k] for k in key)
+            if name in before:
+                print(f'{benchmark} {" ".join(str(n) for n in name)}: {values[benchmark](result)/before[name]:.2f}x')
+
+
+def machine():
+    info = {'node': platform.node(), 'platform': platform.platform(), 'processor': platform.processor(),
+            'cpu_count': os.cpu_count(), 'python': platform.python_version(), 'numpy': np.__version__}
+    try:
+        import psychopy
+        info['psychopy'] = psychopy.__version__
+    except ImportError:
+        pass
+    return info
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks for session construction, stimulus loading, the trial loop and the timing modes')
+    parser.add_argument('--output', help='json file for the results (default: benchmarks/results/<computer>_<date>.json)')
+    parser.add_argument('--compare', help='json file of an earlier run to compare with')
+    parser.add_argument('--quick', action='store_true', help='smaller grid and shorter sessions')
+    parser.add_argument('--window', action='store_true', help='create the stimuli in an invisible psychopy window instead of the null window')
+    parser.add_argument('--resolution', type=int, default=400, help='resolution of the bmp fixtures')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    date = datetime.now()
+    output = args.output or os.path.join(repository, 'benchmarks', 'results', f'{platform.node()}_{date.strftime("%Y%m%d-%H%M%S")}.json')
+    directory = tempfile.mkdtemp(prefix='bistable_benchmark_')
+    try:
+        print(f'writing bmp fixtures to {directory}')
+        fixture_overrides = write_fixtures(directory, args.resolution, 190)
+        output_dir = os.path.join(directory, 'output')
+        results = {'date': date.isoformat(timespec='seconds'), 'machine': machine(), 'arguments': vars(args)}
+        results['loading'] = bench_loading(fixture_overrides, args.window, args.repeats)
+        results['construction'] = bench_construction(fixture_overrides, output_dir, args.quick)
+        results['frame_loop'] = bench_frame_loop(fixture_overrides, output_dir, args.quick)
+        results['onset_precision'] = bench_onset_precision(fixture_overrides, output_dir, args.quick)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'\nresults saved to {output}')
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
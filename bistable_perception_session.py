@@ -7,23 +7,39 @@
 '''
 
 import numpy as np
+import pandas as pd
 import os
 import time
 import re
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from psychopy import visual
 from psychopy.hardware import keyboard
 from exptools2.core import PylinkEyetrackerSession
 from trial import BPTrial
+from phase_schedule import PhaseSchedule
+from timing_modes import create_timing
+from response_recorder import ResponseRecorder
+from frame_timing import FrameTimer
+from tracker_queue import TrackerMessageQueue, QueuedTracker
+from input_thread import InputThread
+from session_state import SessionState
+from rotation_phase import RotationPhase
+from screenshot_capture import ScreenshotCapture
+from event_stream import EventStream
+from session_plan import SessionPlan
+from percept_durations import PerceptDurations, reported_durations, playback_block, percept_presses
 from stimulus_rivalry import BRStimulus
 from stimulus_rotating_sphere import RSStimulus
-import random
 
 opj = os.path.join
 
 class BistablePerceptionSession(PylinkEyetrackerSession):
 
-    def __init__(self, output_str, output_dir, settings_file, subject_ID, eyetracker_on, task):
+    # the stimuli are created with this module (the headless session replaces it)
+    visual_module = visual
+
+    def __init__(self, output_str, output_dir, settings_file, subject_ID, eyetracker_on, task, plan_file=None):
         """
         Parameters
         ----------
@@ -40,9 +56,23 @@ class BistablePerceptionSession(PylinkEyetrackerSession):
             Determines if the cablibration process is getting started.
         task : string
             BR or RS
+        plan_file : str
+            Session plan (see session_plan.py) with the trial list, instead of creating the trials 
+            (default: None)
+
+        The phase timing (frames, seconds or frame-locked seconds) is chosen with 
+        'Timing mode' in the settings file.
         """
 
         super().__init__(output_str, output_dir, settings_file, eyetracker_on=eyetracker_on)
+        self.setup(subject_ID, task, plan_file)
+
+
+    def setup(self, subject_ID, task, plan_file=None):
+        """
+        Reads the task settings and creates the stimuli and trials. This only needs the window and 
+        settings that exptools2 created, so the headless session (see headless.py) can use it as well.
+        """
     	
         self.subject_ID = subject_ID
         self.task = task
@@ -51,59 +81,146 @@ class BistablePerceptionSession(PylinkEyetrackerSession):
         self.stimulus_names = self.settings['Task settings']['Stimulus names']
         self.previous_percept_duration = self.settings['Task settings']['Previous percept duration']
         self.percept_jitter = self.settings['Task settings']['Percept duration jitter']
+        self.percept_distribution = self.settings['Task settings']['Percept duration distribution']
+        self.percept_playback = self.settings['Task settings']['Percept playback']
         self.stim_dur_ambiguous = self.settings['Task settings']['Stimulus duration ambiguous']
         self.n_blocks = self.settings['Task settings']['Blocks'] 
         self.n_practice_blocks = self.settings['Task settings']['Blocks practice']         
         self.response_interval = self.settings['Task settings']['Response interval']
         self.break_duration = self.settings['Task settings']['Break duration']
+        self.fixation_duration = self.settings['Task settings']['Fixation duration']
         self.exit_key = self.settings['Task settings']['Exit key']
         self.break_buttons = self.settings['Task settings']['Break buttons'] 
         self.monitor_refreshrate = self.settings['Task settings']['Monitor refreshrate']
         self.screentick_conversion = self.settings['Task settings']['Screentick conversion']
         self.test_eyetracker = self.settings['Task settings']['Test eyetracker']
         self.break_stim_name = self.settings['Stimulus settings']['Break stimulus name']
+        self.fixation_stim_name = self.settings['Stimulus settings']['Fixation stimulus name']
+        self.timing_mode = self.settings['Task settings']['Timing mode']
+        self.record_frame_timing = self.settings['Task settings']['Frame timing']
+        self.tracker_queue_size = self.settings['Task settings']['Tracker queue size']
+        self.stream_events = self.settings['Task settings']['Event stream']
+        self.input_poll_interval = self.settings['Task settings']['Input poll interval']
+        self.seed = self.settings['Task settings']['Random seed']
+
+        # all randomization of the session (button assignment, colors, durations) is drawn from
+        # one generator with this seed, a session plan brings the seed it was compiled with
+        self.plan = SessionPlan.load(plan_file) if plan_file is not None else None
+        if self.plan is not None:
+            self.seed = self.plan.meta['seed']
+        elif self.seed is None:
+            self.seed = int(np.random.default_rng().integers(2**32))
+        self.rng = np.random.default_rng(self.seed)
         
 
+        self.screenshots = None
         if self.settings['Task settings']['Screenshot']==True:
-            self.screen_dir=output_dir+'/'+output_str+'_Screenshots'
+            self.screen_dir=self.output_dir+'/'+self.output_str+'_Screenshots'
             if not os.path.exists(self.screen_dir):
-                os.mkdir(self.screen_dir)
-
-        # this determines how fast our stimulus images change, so the speed of the rotation 
+                os.makedirs(self.screen_dir)
+            # the screenshots are read into a few preallocated buffers and saved by a thread pool
+            self.screenshot_burst = self.settings['Task settings']['Screenshot burst']
+            self.screenshots = ScreenshotCapture(self.win, self.screen_dir, self.settings['Task settings']['Screenshot buffers'],
+                                                 self.settings['Task settings']['Screenshot region'])
+        
+        # even though we don't define our phases in frames we need to separate it according to the right number of frames!
         self.screenticks_per_frame = int(self.monitor_refreshrate/self.screentick_conversion)
+        # this determines how fast our stimulus images change, so the speed of the rotation 
+        self.seconds_per_frame = 1/self.monitor_refreshrate*self.screenticks_per_frame 
+        # the timing mode converts durations into phases and tells exptools2 how to count them
+        self.timing = create_timing(self.timing_mode, self.monitor_refreshrate, self.screenticks_per_frame)
+        self.frame_duration = self.timing.frame_duration
+
+        # the percept durations of the unambiguous blocks (in frames)
+        frames_per_second = self.monitor_refreshrate/self.screenticks_per_frame
+        jitter_in_frames = int(self.percept_jitter*frames_per_second)
+        # a BR percept has to be long enough for the transition to the next one
+        self.min_percept_duration = self.settings['Stimulus settings']['Transition length'] if self.task == 'BR' else 1
+        self.percept_durations = None
+        if isinstance(self.previous_percept_duration, list):
+            # the predefined durations are shuffled, unless a distribution is fitted to all of them
+            if self.percept_distribution is not None:
+                samples = np.concatenate(self.previous_percept_duration)
+                self.percept_durations = PerceptDurations(self.percept_distribution, samples.mean(), jitter_in_frames, samples, self.min_percept_duration)
+        else:
+            self.percept_durations = PerceptDurations(self.percept_distribution or 'uniform', self.previous_percept_duration*frames_per_second, 
+                                                      jitter_in_frames, minimum=self.min_percept_duration)
 
         # randomly choose if the participant responds with the right BUTTON to stimulus 1 or 2
-        if random.uniform(1,100) < 50:
+        if self.rng.uniform(1,100) < 50:
             self.response_button = 'upper_stim1'
         else:
             self.response_button = 'upper_stim2'
+        if self.plan is not None:
+            self.response_button = self.plan.meta['response_button']
+
+        if self.response_button == 'upper_stim1':
+            self.button_instructions = f'Upper - {self.stimulus_names[0]}\n Lower - {self.stimulus_names[1]}'
+        else:
+            self.button_instructions = f'Upper - {self.stimulus_names[1]}\n Lower - {self.stimulus_names[0]}'
+            
 
         # initialize the keyboard for the button presses
-        self.kb = keyboard.Keyboard()
+        self.kb = self.create_keyboard()
+        # the thread that polls the keyboard is started with the experiment (see create_input)
+        self.input = None
+        # running, paused or aborting (see run_pause), created with the experiment on the keyboard clock
+        self.state = None
+        self.pause_stim = self.visual_module.TextStim(self.win, text='Pause\n\nPress p to continue')
 
         # count the subjects responses for each condition
         self.unambiguous_responses = 0 
         self.ambiguous_responses = 0 
         self.total_responses = 0  
+        # the button presses are collected here during the session (see close)
+        self.responses = ResponseRecorder()
+        # (key, onset) -> index in the responses of the responses whose key is still down
+        self.pressed = {}
+        # flip times of every frame, to check for dropped frames (opt-in, see settings)
+        self.frame_timer = FrameTimer(self.monitor_refreshrate) if self.record_frame_timing else None
+        # the eyetracker messages of the trials are sent from a background thread, so that a slow link does not block the frame loop
+        self.tracker_queue = TrackerMessageQueue(self.tracker, self.tracker_queue_size) if self.eyetracker_on and self.tracker_queue_size > 0 else None
+        if self.tracker_queue is not None:
+            # pylink is not thread-safe, exptools2 has to use the tracker through the queue as well
+            self.tracker = QueuedTracker(self.tracker_queue)
+        # every event is also appended to <output>_events.jsonl right away, in case the session crashes
+        self.event_stream = None
+        if self.stream_events:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self.event_stream = EventStream(opj(self.output_dir, self.output_str+'_events.jsonl'))
         
+        # with percept playback the unambiguous blocks are created during the break before them
+        self.next_playback_block = None
+        self.ambiguous_start_time = None
+        self.playback_executor = ThreadPoolExecutor(1, thread_name_prefix='percept playback') if self.percept_playback else None
+        self.playback_log = []
+
         # variables needed for trial and block creation
         self.trial_list = []
         self.stimulus_index_list = []
         self.practice_blocks = []
         self.trial_nr = 0
+        # position in the trial list (for the texture residency)
+        self.trial_index = 0
+        self.residency_position = None
 
-        # ambiguous phase durations 
-        self.nr_phases_ambig = int(self.stim_dur_ambiguous*self.monitor_refreshrate/self.screenticks_per_frame)
-        self.amb_phase_dur = [self.screenticks_per_frame]*self.nr_phases_ambig
-        self.break_phase_durations = [self.screenticks_per_frame]*int(self.break_duration*self.monitor_refreshrate/self.screenticks_per_frame)
+        # number of phases (every phase shows one frame) of the ambiguous blocks, breaks and fixations
+        self.nr_phases_ambig = self.timing.n_phases(self.stim_dur_ambiguous)
+        self.nr_phases_break = self.timing.n_phases(self.break_duration)
+        self.nr_phases_fixation = self.timing.n_phases(self.fixation_duration)
 
         # define which condition starts (equal subjects are 0, unequal 1)
         # either start with ambiguous or unambiguous 
         self.start_condition = 0 if self.subject_ID % 2 == 0 else 1 
 
+        
         # make all the trials beforehand and load experiment specific stimuli
         self.create_stimuli()        
-        self.create_trials()
+        if self.plan is not None:
+            print('Trials are loaded from the session plan')
+            self.trial_list = self.plan.create_trials(self)
+        else:
+            self.create_trials()
 
 
     def create_trials(self):
@@ -116,131 +233,158 @@ class BistablePerceptionSession(PylinkEyetrackerSession):
         if self.test_eyetracker:
             for d, test_dot in enumerate(self.stimuli.eyetracking_test_names):
                 print(test_dot)
-                index = self.stimuli.lookup_list.index(test_dot)
-                self.trial_list.append(BPTrial(self, 0, 0, 'tracking_test', str(d), 'tracking_test', [5*self.monitor_refreshrate], 'frames', [index]))
+                index = self.stimuli.registry.index(test_dot)
+                self.trial_list.append(BPTrial(self, 0, 0, 'tracking_test', str(d), 'tracking_test', [self.timing.single_phase(3)], self.timing.exptools_timing, [index]))
             
 
         self.trial_nr = 1
-        
+        self.block_ID_unambiguous = 0
         for i in range(self.n_blocks):  
-            # we start counting with 1 because the blocks with ID 0 are breaks!
-            block_ID = i + 1 
+            if self.is_playback_block(i):
+                # the remaining blocks are created during the session (see start_playback)
+                self.next_playback_block = i
+                break
+            self.trial_list += self.create_block(i)
 
-            print("\ncurrent block is", block_ID)
-            print("start condition", self.start_condition)
-            
-            # start off with a break
-            self.trial_list.append(BPTrial(self, 0, block_ID, 'break', 'break', 'break', self.break_phase_durations, 'frames', self.stimulus_index_list_break))
+
+    def is_playback_block(self, block):
+        ''' With percept playback, every unambiguous block after an ambiguous one replays its percepts '''
+        return self.percept_playback and block > 0 and (block + 1 + self.start_condition) % 2 != 0
+
+
+    def create_block(self, block, phase_durations_unambiguous=None):
+        '''
+        Creates the trials of one block (fixation, ambiguous or unambiguous trials and the break).
+        The durations of an unambiguous block can be given, otherwise they come from create_duration_array.
+        '''
+        trials = []
+        # we start counting with 1 because the blocks with ID 0 are breaks!
+        block_ID = block + 1 
+
+        print("\ncurrent block is", block_ID)
+        print("start condition", self.start_condition)
+        
+        # start off with a fixation break
+        trials.append(BPTrial(self, 0, block_ID, 'fixation', 'fixation', 'fixation', self.fixation_schedule, self.timing.exptools_timing))
+        
+        # equal subjects start with rivarly, unequal with unambiguous
+        if (block_ID + self.start_condition) % 2 == 0:
+            block_type = 'ambiguous'
+            trial_type = 'ambiguous'
+
+            if self.task == 'BR':
+                # determine type and color combination
+                self.rng.shuffle(self.colors_rivalry)
+                color_comb = 'rivalry_' + self.colors_rivalry[0] 
+                self.colors_rivalry = self.colors_rivalry[1:]
+                # add the fitting stimuli indices to the stimulus list
+                stimulus_index = self.stimuli.registry.index(color_comb)
+                schedule = self.frame_schedule(stimulus_index, self.nr_phases_ambig)
             
-            # equal subjects start with rivarly, unequal with unambiguous
-            if (block_ID + self.start_condition) % 2 == 0:
-                block_type = 'ambiguous'
-                trial_type = 'ambiguous'
-
-                if self.task == 'BR':
-                    # determine type and color combination
-                    np.random.shuffle(self.colors_rivalry)
-                    color_comb = 'rivalry_' + self.colors_rivalry[0] 
-                    self.colors_rivalry = self.colors_rivalry[1:]
-                    # add the fitting stimuli indices to the stimulus list
-                    stimulus_index = self.stimuli.lookup_list.index(color_comb)
-                    stimulus_index_list = [stimulus_index]*len(self.amb_phase_dur)
-                
-                elif self.task == 'RS':
-                    print('ambiguous block!')
-                    # the rotating globe has no color combination 
-                    color_comb = np.NaN
-                    # add the fitting stimuli indices to the stimulus list
-                    stimulus_index_list = []
-                    # loop over the phase duration array 
-                    for phase_index in range(len(self.amb_phase_dur)):
-                        frame_index = (phase_index+1)%self.stimuli.nr_of_frames
-                        stimulus_index = self.stimuli.lookup_list.index(f'ambiguous_{frame_index}')
-                        stimulus_index_list.append(stimulus_index)
-
-                
-                self.trial_list.append(BPTrial(self, self.trial_nr, block_ID, block_type, trial_type, color_comb, self.amb_phase_dur, 'frames', stimulus_index_list))
-                self.trial_nr += 1 
+            elif self.task == 'RS':
+                print('ambiguous block!')
+                # the rotating globe has no color combination 
+                color_comb = np.nan
+                # add the fitting stimuli indices to the stimulus list, the rotation 
+                # starts at frame 1 and the frame numbers wrap around after a full rotation
+                phase_indices = np.arange(1, self.nr_phases_ambig+1)
+                schedule = self.frame_schedule(self.stimuli.registry.frames('ambiguous', phase_indices))
+
+            print('ambiguous phase durations', self.frame_duration, 'length', self.nr_phases_ambig)
+            trials.append(BPTrial(self, self.trial_nr, block_ID, block_type, trial_type, color_comb, schedule, self.timing.exptools_timing))
+            self.trial_nr += 1 
 
 
-            else:
-                block_type = 'unambiguous'
-
-                phase_durations_unambiguous = self.create_duration_array()
-                print("durations unambiguous:", phase_durations_unambiguous)
-
-                if self.task == 'BR':
-                    np.random.shuffle(self.colors_ambiguous)
-                    color_comb = self.colors_ambiguous[0] 
-                    self.colors_ambiguous = self.colors_ambiguous[1:]
-
-                    for i, phase_duration in enumerate(phase_durations_unambiguous):
-                        trial_type = 'house' if self.trial_nr % 2 == 0 else 'face'
-                        # we have to insert the transition period here (except for the last trial)
-                        # the trial nr, block ID and block and trial type stay the same as for the previous trial 
-                        # get the correct color combination
-                        if (trial_type=='house') & (color_comb=='redface'):
-                            fading_color = 'hb2fr'
-                            stimulus_color = 'house_blue'
-                        elif (trial_type=='face') & (color_comb=='redface'):
-                            fading_color = 'fr2hb'
-                            stimulus_color = 'face_red'
-                        elif (trial_type=='house') & (color_comb=='redhouse'):
-                            fading_color = 'hr2fb'
-                            stimulus_color = 'house_red'
+        else:
+            block_type = 'unambiguous'
+            check_unambiguous_durations = []
+
+            if phase_durations_unambiguous is None:
+                phase_durations_unambiguous = self.create_duration_array(self.block_ID_unambiguous)
+            print("\ndurations unambiguous:", phase_durations_unambiguous, 'sum:', np.array(phase_durations_unambiguous).sum())
+
+            if self.task == 'BR':
+                self.rng.shuffle(self.colors_ambiguous)
+                color_comb = self.colors_ambiguous[0] 
+                self.colors_ambiguous = self.colors_ambiguous[1:]
+
+                for i, phase_duration in enumerate(phase_durations_unambiguous):
+                    trial_type = 'house' if self.trial_nr % 2 == 0 else 'face'
+                    # we have to insert the transition period here (except for the last trial)
+                    # the trial nr, block ID and block and trial type stay the same as for the previous trial 
+                    # get the correct color combination
+                    if (trial_type=='house') & (color_comb=='redface'):
+                        fading_color = 'hb2fr'
+                        stimulus_color = 'house_blue'
+                    elif (trial_type=='face') & (color_comb=='redface'):
+                        fading_color = 'fr2hb'
+                        stimulus_color = 'face_red'
+                    elif (trial_type=='house') & (color_comb=='redhouse'):
+                        fading_color = 'hr2fb'
+                        stimulus_color = 'house_red'
+                    else:
+                        fading_color = 'fb2hr'
+                        stimulus_color = 'face_blue'
+                    
+                    # choose the stimuli from the fading sequence depending on fading color
+                    fading_index_list = self.stimuli.registry.frames(fading_color, np.arange(self.nr_transition_phases))
+                    fading_schedule = self.frame_schedule(fading_index_list)
+                    unambiguous_stimulus_index = self.stimuli.registry.index(stimulus_color)
+
+                    # the blend mode does not use the fading bmps, its transitions only need frames
+                    if self.nr_transition_phases > 0 and (self.stimuli.fading_mode == 'blend' or self.stimuli.nr_fading_stimuli != 0):
+                        # cut out the beginning and end of trial because the transition takes time (but the e)
+                        if ((i == len(phase_durations_unambiguous)-1) or (i == 0)):
+                            phase_duration_total = phase_duration - (self.stimuli.transition_length/2) # in the beginning/end only cut half 
+                            prefading_schedule = self.frame_schedule(unambiguous_stimulus_index, int(phase_duration_total))
+
+                            # make trial for the period before the fading begins
+                            check_unambiguous_durations.append(prefading_schedule.total_duration)
+                            trials.append(BPTrial(self, self.trial_nr, block_ID, block_type, trial_type, color_comb, prefading_schedule, self.timing.exptools_timing))
+                            if i == 0:
+                                print('/ntransition duration:', fading_schedule.total_duration)
+                                # make fading trial
+                                trials.append(BPTrial(self, self.trial_nr, block_ID, block_type, trial_type, fading_color, fading_schedule, self.timing.exptools_timing))
+                            self.trial_nr += 1
                         else:
-                            fading_color = 'fb2hr'
-                            stimulus_color = 'face_blue'
-                        
-                        fading_index_list = []
-                        for fading_index in range(self.stimuli.images_per_combi):
-                            # choose stimulus from list depending on fading color
-                            stimulus_index = self.stimuli.lookup_list.index(fading_color+f'_{fading_index}')
-                            fading_index_list.append(stimulus_index)
-
-                        if self.stimuli.nr_fading_stimuli != 0:
-                            unambiguous_stimulus_index = self.stimuli.lookup_list.index(stimulus_color)
+                            phase_duration_total = phase_duration - self.stimuli.transition_length
+                            prefading_schedule = self.frame_schedule(unambiguous_stimulus_index, int(phase_duration_total))
                             
-                            # cut out the beginning and end of trial because the transition takes time (but the e)
-                            if ((i == len(phase_durations_unambiguous)-1) or (i == 0)):
-                                print('last or first')
-                                phase_duration_total = phase_duration - int(self.stimuli.transition_length/2) # in the beginning/end only cut half 
-                                prefading_phases = [self.screenticks_per_frame]*int(phase_duration_total)
-                                print('phases before fading', prefading_phases)
-                                
-                                stimulus_index_list = [unambiguous_stimulus_index]*len(prefading_phases)
-
-                                # make trial for the period before the fading begins
-                                self.trial_list.append(BPTrial(self, self.trial_nr, block_ID, block_type, trial_type, color_comb, prefading_phases, 'frames', stimulus_index_list))
-                                if i == 0:
-                                    print('first transition')
-                                    print('transition phases', self.transition_phases)
-                                    # make fading trial
-                                    self.trial_list.append(BPTrial(self, self.trial_nr, block_ID, block_type, trial_type, fading_color, self.transition_phases, 'frames', fading_index_list))
-                                
-                            else:
-                                print('phase duration before', phase_duration)
-                                phase_duration_total = phase_duration - self.stimuli.transition_length
-                                prefading_phases = [self.screenticks_per_frame]*int(phase_duration_total)
-                                stimulus_index_list = [unambiguous_stimulus_index]*len(prefading_phases)
-
-                                self.trial_list.append(BPTrial(self, self.trial_nr, block_ID, block_type, trial_type, color_comb, prefading_phases, 'frames', stimulus_index_list))
-                                self.trial_list.append(BPTrial(self, self.trial_nr, block_ID, block_type, trial_type, fading_color, self.transition_phases, 'frames', fading_index_list))
-                                
-                        else:
-                            unambiguous_phases = [self.screenticks_per_frame]*int(phase_duration)
-                            stimulus_index_list = [unambiguous_stimulus_index]*len(unambiguous_phases)
-                            self.trial_list.append(BPTrial(self, self.trial_nr, block_ID, block_type, trial_type, color_comb, [phase_duration], 'frames', stimulus_index_list))
+                            check_unambiguous_durations.append(prefading_schedule.total_duration)
+                            check_unambiguous_durations.append(fading_schedule.total_duration)
+                            trials.append(BPTrial(self, self.trial_nr, block_ID, block_type, trial_type, color_comb, prefading_schedule, self.timing.exptools_timing))
+                            trials.append(BPTrial(self, self.trial_nr, block_ID, block_type, trial_type, fading_color, fading_schedule, self.timing.exptools_timing))
+                            self.trial_nr += 1
+                    else:
+                        unambiguous_schedule = self.frame_schedule(unambiguous_stimulus_index, int(phase_duration))
+                        check_unambiguous_durations.append(unambiguous_schedule.total_duration)
+                        trials.append(BPTrial(self, self.trial_nr, block_ID, block_type, trial_type, color_comb, unambiguous_schedule, self.timing.exptools_timing))
                         self.trial_nr += 1
+                print('total duration of unambiguous BR block:', sum(check_unambiguous_durations))
 
-                elif self.task == 'RS':
+            elif self.task == 'RS':
 
-                    print('create rotating sphere unambiguous!')
+                print('create rotating sphere unambiguous!')
 
-                    # create the unambiguous trials 
-                    unambiguous_block = self.create_unambiguous_block(phase_durations_unambiguous, block_ID, block_type)
-                    # .. and append it to the trial list
-                    self.trial_list = [*self.trial_list, *unambiguous_block]
+                # create the unambiguous trials 
+                unambiguous_block = self.create_unambiguous_block(phase_durations_unambiguous, block_ID, block_type)
+                # .. and append it to the trial list
+                trials += unambiguous_block
+            self.block_ID_unambiguous += 1
+
+        # make a longer break to show button presses again
+        trials.append(BPTrial(self, 0, block_ID, 'break', 'break', 'break', self.break_schedule, self.timing.exptools_timing))
+        return trials
+            
+
+
+    def create_keyboard(self):
+        return keyboard.Keyboard()
+
+
+    def create_input(self):
+        ''' The keyboard is polled on a background thread, unless the poll interval is 0 (then the trial polls it every frame) '''
+        return InputThread(self.kb, self.input_poll_interval, threaded=self.input_poll_interval > 0)
 
 
     def create_stimuli(self):
@@ -249,7 +393,7 @@ class BistablePerceptionSession(PylinkEyetrackerSession):
         if self.task == 'BR':
 
             # create an experiment specific stimulus object, which creates a list of all unique stimuli
-            self.stimuli = BRStimulus(self.settings, self.win, self.button_instructions)
+            self.stimuli = BRStimulus(self.settings, self.win, self.button_instructions, self.visual_module)
 
             # build an array with the possible color combinations 
             # (has to be done BEFORE we construct the trials below)
@@ -259,7 +403,7 @@ class BistablePerceptionSession(PylinkEyetrackerSession):
             for i in range(int(self.n_blocks/2)):
                 # if there is an odd nr. of trials we should choose the last block randomly!
                 if ((self.n_blocks%2) != 0) and (i == self.n_blocks-1):
-                    idx = 0 if random.uniform(1,100) < 50 else 1
+                    idx = 0 if self.rng.uniform(1,100) < 50 else 1
                 else:
                     idx = 0 if (i%2)==0 else 1 
                     
@@ -267,18 +411,20 @@ class BistablePerceptionSession(PylinkEyetrackerSession):
 
             self.colors_rivalry = np.array(colors_list)
             self.colors_ambiguous = np.array(colors_list)
-            self.transition_phases = [self.screenticks_per_frame]*int(self.stimuli.transition_length/self.screenticks_per_frame)
+            self.nr_transition_phases = int(self.stimuli.transition_length)
 
         elif self.task == 'RS':
-            self.stimuli = RSStimulus(self.settings, self.win)
+            self.stimuli = RSStimulus(self.settings, self.win, self.button_instructions, self.visual_module)
         
         else:    
             print('Invalid experiment ID entered!')
             self.close()
 
         # get the stimulus index for the breaks
-        stimulus_index_break = self.stimuli.lookup_list.index(self.break_stim_name)
-        self.stimulus_index_list_break = [stimulus_index_break]*len(self.break_phase_durations)
+        stimulus_index_break = self.stimuli.registry.index(self.break_stim_name)
+        self.break_schedule = self.frame_schedule(stimulus_index_break, self.nr_phases_break)
+        stimulus_index_fixation = self.stimuli.registry.index(self.fixation_stim_name)
+        self.fixation_schedule = self.frame_schedule(stimulus_index_fixation, self.nr_phases_fixation)
 
 
     def create_unambiguous_block(self, stim_duration_list, block_ID, block_type):
@@ -286,90 +432,210 @@ class BistablePerceptionSession(PylinkEyetrackerSession):
         This function creates a list full of left and right rotation unambiguous trials.
         It is used for creating practice and actual experiment blocks.
         '''
-        # the block will start at the beginning of the total frames of the stimulus
-        last_frame_previous = 0 
-        dummy = 0 # need this to add the previous last frame from the trial before
         block_list = [] # this is where we store the trials prior to concatenating them to the suitable trial list
-
-        # the durations should determine the switch between left and right rotation
-        for i, stim_duration in enumerate(stim_duration_list):
-            # determine if next trial shows house or face
-            trial_type = 'right' if self.trial_nr % 2 == 0 else 'left'
-
-            # create the phase durations depending on the duration of the stimulus
-            nr_phases_unambig = int(stim_duration)
-            phase_durations_unambiguous = [self.screenticks_per_frame]*nr_phases_unambig
-            
-            # the number of phases also tells us which image was the last one, so that
-            # the next rotation can start from there
-            last_frame_previous = (last_frame_previous+dummy)%self.stimuli.nr_of_frames
-            if trial_type == 'right':
-                last_frame_previous = self.stimuli.nr_of_frames - last_frame_previous 
-            elif trial_type == 'left':
-                last_frame_previous = abs(last_frame_previous - self.stimuli.nr_of_frames)
+        check_unambiguous_durations = [] 
+
+        # the durations should determine the switch between left and right rotation, 
+        # the first trial is a right rotation if the trial nr is even
+        n_frames = np.array(stim_duration_list).astype(np.int64)
+        trial_types = np.where((self.trial_nr + np.arange(len(n_frames))) % 2 == 0, 'right', 'left')
+        # the block starts at the starting position of the sphere, after a switch the rotation 
+        # goes on from the frame that was shown last
+        rotation = RotationPhase(self.stimuli.nr_of_frames)
+        frames = rotation.block(n_frames, np.where(trial_types == 'right', 1, -1))
+
+        for trial_type, phase_indices in zip(trial_types, frames):
             self.trial_nr += 1 
-            
-            # TODO: write function for computing the indice lists! (reocurring snippet..)
             # get the right stimulus index for the look-up table 
-            stimulus_index_list = []
-            for phase_index in range(len(phase_durations_unambiguous)):
-                frame_index = (phase_index+last_frame_previous+1)%self.stimuli.nr_of_frames
-                stimulus_index = self.stimuli.lookup_list.index('unambiguous_' + trial_type + f'_{frame_index}')
-                stimulus_index_list.append(stimulus_index)
-
-            block_list.append(BPTrial(self, self.trial_nr, block_ID, block_type, trial_type, np.NaN, phase_durations_unambiguous,'frames', stimulus_index_list))
-            # save old value and update new one
-            dummy = last_frame_previous
-            last_frame_previous = nr_phases_unambig
+            schedule = self.frame_schedule(self.stimuli.registry.frames('unambiguous_' + trial_type, phase_indices))
+
+            check_unambiguous_durations.append(schedule.total_duration)
+            block_list.append(BPTrial(self, self.trial_nr, block_ID, block_type, str(trial_type), np.nan, schedule, self.timing.exptools_timing))
+
+        print('total duration of unambiguous RS block:', sum(check_unambiguous_durations))
         return block_list
 
 
-    def create_duration_array(self):
+    def create_duration_array(self, block):
         """
         Function that takes the duration entries from the setting file and constructs the 
         phase duration (duration of trial and ISI) for all trials. 
-        The jitter is added to the mean percept duration from previous studies. If the jitter is
-        0.1s, a random nr between -0.1 and 0.1 is added. 
+        The predefined durations of the block are shuffled. Otherwise the durations are drawn
+        from the percept duration distribution (by default the mean percept duration from previous
+        studies plus a uniform jitter, if the jitter is 0.1s a random nr between -0.1 and 0.1 is added)
+        until the block is full, the last percept gets what is left of the block. 
         """
 
-        if isinstance(self.previous_percept_duration, list):
+        if isinstance(self.previous_percept_duration, list) and self.percept_durations is None:
             print('Use predefined phase durations')
-            phase_durations = [elem*self.screenticks_per_frame for elem in self.previous_percept_duration]
-            np.random.shuffle(phase_durations)
+            phase_durations = self.rng.permutation(self.previous_percept_duration[block]).tolist()
         else:
-            # while the number is not above the trial duration, generate more trial durations
-            max_duration = self.stim_dur_ambiguous
-            nr_frames_total = max_duration*self.monitor_refreshrate
-            frames_percept_duration = self.previous_percept_duration*self.monitor_refreshrate
-            jitter_in_frames = int(self.percept_jitter*self.monitor_refreshrate)
-            current_duration = 0 
-            phase_durations = []
-            while True:
-                percept_duration = frames_percept_duration + random.randrange(-jitter_in_frames, jitter_in_frames)
-                current_duration = np.array(phase_durations).sum() + percept_duration
-                if current_duration > nr_frames_total:
-                    break
-                
-                phase_durations.append(int(percept_duration))
-                
-            current_duration = np.array(phase_durations).sum()
-            duration_difference = int(nr_frames_total - current_duration)
-            # append whats missing to the last trial
-            phase_durations.append(duration_difference)
-
-        print("duration unambiguous block:", np.array(phase_durations).sum(), "and length:", len(phase_durations))
+            nr_frames_total = self.stim_dur_ambiguous*self.monitor_refreshrate/self.screenticks_per_frame
+            phase_durations = self.percept_durations.block(self.rng, nr_frames_total).tolist()
+
+        print("\nduration unambiguous block:", np.array(phase_durations).sum(), "and length:", len(phase_durations))
         print(phase_durations)
         return phase_durations
 
 
+    def frame_schedule(self, stimulus_indices, n_phases=None):
+        """
+        Phase schedule in which every phase shows one stimulus frame, in the units of the timing mode.
+        """
+        return PhaseSchedule(self.frame_duration, stimulus_indices, self.timing.exptools_timing, n_phases)
+
+
     def draw_stimulus(self):
         """
         Depending on what phase we are in, this function draws the apropriate stimulus.
         """
-        index = self.current_trial.stimulus_index_list[self.current_trial.phase]
+        index = self.current_trial.schedule.stimulus_indices[self.current_trial.phase]
+        if self.stimuli.residency is not None:
+            self.update_residency()
         self.stimuli.unique_stimulus_list[index].draw()
+
+
+    def update_residency(self):
+        '''
+        Tells the texture residency which stimuli the next phases show when the phase changes. 
+        At the end of a trial the first phases of the next trial are added.
+        '''
+        position = (self.trial_index, self.current_trial.phase)
+        if position == self.residency_position:
+            return
+        self.residency_position = position
+
+        n_phases = self.stimuli.residency.prefetch
+        phase = self.current_trial.phase
+        upcoming = self.current_trial.schedule.stimulus_indices[phase:phase+n_phases]
+        if len(upcoming) < n_phases and self.trial_index+1 < len(self.trial_list):
+            next_indices = self.trial_list[self.trial_index+1].schedule.stimulus_indices[:n_phases-len(upcoming)]
+            upcoming = np.concatenate([upcoming, next_indices])
+        self.stimuli.residency.update(upcoming)
         
 
+    def start_playback(self):
+        '''
+        Starts creating the next blocks from the percepts the participant reported in the ambiguous
+        block that just ended. This runs on a background thread while the break is shown.
+        '''
+        end = self.current_trial_start_time
+        responses = self.responses.snapshot(['event_type', 'onset', 'response'])
+        reported = (responses['event_type'] == 'ambiguous') & (responses['onset'] >= self.ambiguous_start_time)
+        reported &= percept_presses(responses['event_type'], responses['response'], self.break_buttons)
+        block = self.next_playback_block
+        return self.playback_executor.submit(self.create_playback_blocks, block, responses['onset'][reported], 
+                                             responses['response'][reported], self.ambiguous_start_time, end)
+
+
+    def create_playback_blocks(self, block, onsets, keys, start, end):
+        ''' Creates the playback block and the blocks after it, up to the next playback block '''
+        compute_start = time.perf_counter()
+        durations = reported_durations(onsets, keys, start, end)
+        if len(durations) > 1:
+            nr_frames_total = self.stim_dur_ambiguous*self.monitor_refreshrate/self.screenticks_per_frame
+            frames_per_second = self.monitor_refreshrate/self.screenticks_per_frame
+            phase_durations = playback_block(durations*frames_per_second, nr_frames_total, self.min_percept_duration).tolist()
+        else:
+            # without a switch there is nothing to replay
+            print('No percept switches reported, the unambiguous block uses the percept durations from the settings')
+            phase_durations = None
+
+        trials = self.create_block(block, phase_durations)
+        self.next_playback_block = None
+        for next_block in range(block+1, self.n_blocks):
+            if self.is_playback_block(next_block):
+                self.next_playback_block = next_block
+                break
+            trials += self.create_block(next_block)
+
+        info = {'block_ID': block+1, 'n_responses': len(onsets), 'n_percepts': len(durations) if phase_durations is not None else 0,
+                'n_phases': len(phase_durations) if phase_durations is not None else np.nan, 'latency': time.perf_counter()-compute_start}
+        return trials, info
+
+
+    def finish_playback(self, playback, break_start):
+        '''
+        Adds the trials of the playback blocks after the break and logs how long it took. If they are
+        not ready the session waits for them (this should not happen within the break duration).
+        '''
+        wait_start = time.perf_counter()
+        trials, info = playback.result()
+        info['wait'] = time.perf_counter() - wait_start
+        info['break_duration'] = wait_start - break_start
+        info['in_time'] = info['latency'] <= self.break_duration
+        self.trial_list += trials
+        self.playback_log.append(info)
+        print(f'percept playback of block {info["block_ID"]}: {info["n_percepts"]} percepts, computed in {info["latency"]*1e3:.1f} ms'
+              + ('' if info['in_time'] else f', longer than the break duration of {self.break_duration} s') 
+              + (f', waited {info["wait"]:.2f} s after the break' if info["wait"] > 0.01 else ''))
+        if self.event_stream is not None:
+            self.event_stream.write({'record': 'playback', **info})
+
+
+    def get_keys(self):
+        '''
+        The keys pressed since the last call, as soon as they go down (with the time they went down).
+        A key that was released already comes with its duration, otherwise the duration of the
+        response is filled in when the key goes up (see key_released).
+        '''
+        keys = []
+        for event in self.input.events():
+            if event.kind == 'down':
+                keys.append(event)
+                continue
+            pressed = [key for key in keys if key.name == event.name and key.rt == event.rt]
+            if len(pressed) > 0:
+                pressed[0].duration = event.duration
+            else:
+                self.key_released(event)
+        return keys
+
+
+    def key_released(self, event):
+        ''' Fills in the duration of a logged response when its key goes up '''
+        index = self.pressed.pop((event.name, event.rt), None)
+        if index is None:
+            return
+        self.responses.set_duration(index, event.duration)
+        if self.event_stream is not None:
+            self.event_stream.write({'record': 'release', 'onset': event.rt, 'response': event.name, 'key_duration': event.duration})
+
+
+    def run_pause(self):
+        '''
+        Shows the pause screen until p is pressed again (or the exit key). The window keeps flipping,
+        so the keyboard and the eyetracker keep working during the pause. In seconds timing the pause 
+        is added to the session timer, so the phase that was paused and the ones after it keep their
+        durations (in frames timing the frames of the pause are not counted anyway). The frame timer
+        leaves the pause out as well. The other keys pressed during the pause are logged as
+        paused_response (they are not used for the percept playback). Returns the start and the
+        duration of the pause.
+        '''
+        self.state.pause()
+        print('PAUSE. Press p to continue.')
+        while self.state.paused:
+            self.pause_stim.draw()
+            self.win.flip()
+            for key in self.get_keys():
+                if key == self.exit_key:
+                    self.state.abort()
+                    break
+                if key == 'p':
+                    self.state.resume()
+                    break
+                index = self.current_trial.log_event('paused_response', key.rt, key.duration, key.name)
+                if key.duration is None:
+                    self.pressed[(key.name, key.rt)] = index
+
+        start, end = self.state.pauses[-1]
+        if self.timing.exptools_timing == 'seconds':
+            self.timer.add(end - start)
+        if self.frame_timer is not None:
+            self.frame_timer.add_pause(end - start)
+        return start, end - start
+
+
     def wait_for_yesno(self, text):
         '''
         This function is used to implement a yes or no response. 
@@ -392,17 +658,51 @@ class BistablePerceptionSession(PylinkEyetrackerSession):
         return answer
 
 
+    def merge_responses(self):
+        '''
+        Adds the recorded button presses to the global log. The rows are sorted by onset, 
+        so that the responses end up between the phases they were given in.
+        '''
+        responses = self.responses.to_dataframe()
+        if len(responses) > 0:
+            global_log = pd.concat([self.global_log, responses], ignore_index=True)
+            self.global_log = global_log.sort_values('onset', kind='mergesort').reset_index(drop=True)
+        self.responses.clear()
+
+
+    def close(self):
+        if self.closed:
+            return
+        self.merge_responses()
+        if self.screenshots is not None:
+            self.screenshots.close()
+        if self.stimuli.residency is not None:
+            self.stimuli.residency.report()
+            self.stimuli.residency.close()
+        if self.event_stream is not None:
+            self.event_stream.write({'record': 'end', 'exp_stop': self.clock.getTime(), 'nr_frames': self.nr_frames})
+            self.event_stream.close()
+        # all messages have to arrive before exptools2 stops the recording
+        if self.tracker_queue is not None:
+            self.tracker_queue.close()
+        if self.playback_executor is not None:
+            self.playback_executor.shutdown(wait=False)
+        if self.input is not None:
+            self.input.close()
+        super().close()
+
+        if self.frame_timer is not None:
+            self.frame_timer.save(opj(self.output_dir, self.output_str+'_frame_timing.tsv'))
+        if len(self.playback_log) > 0:
+            pd.DataFrame(self.playback_log).to_csv(opj(self.output_dir, self.output_str+'_playback.tsv'), sep='\t', index=False)
+
+
     def run(self):
         print("-------------RUN SESSION---------------")
         
         if self.eyetracker_on:
             self.calibrate_eyetracker()
             self.start_recording_eyetracker()
-
-        if self.response_button == 'upper_stim1':
-            self.button_instructions = f'Upper - {self.stimulus_names[0]}\n Lower - {self.stimulus_names[1]}'
-        else:
-            self.button_instructions = f'Upper - {self.stimulus_names[1]}\n Lower - {self.stimulus_names[0]}'
         
         self.display_text(self.button_instructions, keys='space')
 
@@ -410,17 +710,40 @@ class BistablePerceptionSession(PylinkEyetrackerSession):
 
         # this method actually starts the timer which keeps track of trial onsets
         self.start_experiment()
+        if self.event_stream is not None:
+            self.event_stream.write({'record': 'start', 'exp_start': self.exp_start, 'output_str': self.output_str, 
+                                     'subject_ID': self.subject_ID, 'task': self.task, 'response_button': self.response_button})
         self.kb.clock.reset()
             
         self.kb.clock.reset()
-        for trial in self.trial_list:
+        self.input = self.create_input()
+        self.state = SessionState(self.kb.clock)
+        for self.trial_index, trial in enumerate(self.trial_list):
             self.current_trial = trial 
+            # the events of the block that just ended are synced to the disk during the break
+            if self.event_stream is not None and trial.block_type == 'break':
+                self.event_stream.sync()
             self.current_trial_start_time = self.kb.clock.getTime()
+            if trial.block_type == 'ambiguous':
+                self.ambiguous_start_time = self.current_trial_start_time
+            # the next block replays the percepts of this one, it is created during the break
+            playback = None
+            if trial.block_type == 'break' and self.next_playback_block == trial.block_ID:
+                playback = self.start_playback()
+                break_start = time.perf_counter()
             # the run function is implemented in the parent Trial class, so our Trial inherited it
             self.current_trial.run()
+            if playback is not None:
+                self.finish_playback(playback, break_start)
+            if self.state.aborting:
+                break
 
-        self.display_text('End. \n Well done!:)', keys='space')
-        self.close()
+        if self.state.aborting:
+            self.close()
+            self.quit()
+        else:
+            self.display_text('End. \n Well done!:)', keys='space')
+            self.close()
 
 
 
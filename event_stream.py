@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 10:52:50
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import os
+import sys
+import json
+import queue
+import threading
+import numpy as np
+import pandas as pd
+
+
+def to_json(value):
+    """ numpy values are not json serializable """
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+class EventStream():
+    """
+    Appends every event of the session (phase onsets and button presses) as one json line to
+    <output>_events.jsonl while the session runs, so nothing is lost if the experiment crashes.
+
+    write() only puts the event into a queue, a background thread serializes it and writes it to
+    the file. The file is flushed to the operating system whenever the queue runs empty and
+    synced to the disk (fsync) at every block boundary (sync) and when the session closes.
+    The events file of exptools2 can be rebuilt from the stream with rebuild_events.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, 'a', encoding='utf-8')
+        self.queue = queue.Queue()
+        self.closed = False
+        self.thread = threading.Thread(target=self.write_events, name='event stream', daemon=True)
+        self.thread.start()
+
+    def write(self, event):
+        self.queue.put(event)
+
+    def sync(self):
+        """ Makes sure everything written so far is on the disk (in the background) """
+        self.queue.put('sync')
+
+    def write_events(self):
+        while True:
+            event = self.queue.get()
+            if event in ('sync', 'close'):
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                if event == 'close':
+                    return
+                continue
+            self.file.write(json.dumps(event, default=to_json) + '\n')
+            if self.queue.empty():
+                self.file.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put('close')
+        self.thread.join()
+        self.file.close()
+
+
+def read_stream(filename):
+    """ Reads all complete lines (a crash can leave the last line unfinished) """
+    records = []
+    with open(filename, encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                print(f'skipping incomplete line: {line[:80]}')
+    return records
+
+
+def rebuild_events(filename):
+    """
+    Builds the events file the session writes on close (exptools2 global_log with the button
+    presses merged in) from the event stream. If the session did not end, the duration of the
+    last phase is unknown.
+    """
+    records = read_stream(filename)
+    start = [record for record in records if record['record'] == 'start']
+    end = [record for record in records if record['record'] == 'end']
+    exp_start = start[-1]['exp_start'] if start else np.nan
+    exp_stop = end[-1]['exp_stop'] if end else np.nan
+
+    phases = pd.DataFrame([record for record in records if record['record'] == 'phase'])
+    responses = pd.DataFrame([record for record in records if record['record'] == 'response'])
+    # the responses are written when the key goes down, the duration when it goes up
+    releases = [record for record in records if record['record'] == 'release']
+    if len(releases) > 0 and len(responses) > 0:
+        durations = {(record['response'], record['onset']): record['key_duration'] for record in releases}
+        released = [durations.get(key, np.nan) for key in zip(responses['response'], responses['onset'])]
+        responses['key_duration'] = responses['key_duration'].astype(float).fillna(pd.Series(released, dtype=float))
+    global_log = pd.concat([phases, responses], ignore_index=True).drop(columns='record')
+    global_log = global_log.sort_values('onset', kind='mergesort').reset_index(drop=True)
+
+    # the same steps as exptools2 when the session closes
+    global_log['onset_abs'] = global_log['onset'] + exp_start
+    nonresp_idx = ~global_log['event_type'].isin(['response', 'trigger', 'pulse'])
+    onsets = global_log.loc[nonresp_idx, 'onset']
+    global_log.loc[nonresp_idx, 'duration'] = np.append(onsets.diff().values[1:], exp_stop - onsets.iloc[-1])
+    last_nr_frames = end[-1]['nr_frames'] if end else global_log.loc[nonresp_idx, 'nr_frames'].iloc[-1]
+    global_log.loc[nonresp_idx, 'nr_frames'] = np.append(global_log.loc[nonresp_idx, 'nr_frames'].values[1:], last_nr_frames).astype(int)
+    return global_log.round({'onset': 5, 'onset_abs': 5, 'duration': 5})
+
+
+if __name__ == '__main__':
+    # python event_stream.py output_data/<output>_Logs_RS/<output>_events.jsonl [events.tsv]
+    stream_file = sys.argv[1]
+    events_file = sys.argv[2] if len(sys.argv) > 2 else stream_file.replace('.jsonl', '') + '_rebuilt.tsv'
+    events = rebuild_events(stream_file)
+    events.to_csv(events_file, sep='\t', index=False)
+    print(f'{len(events)} events written to {events_file}')
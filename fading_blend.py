@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:17:10
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import numpy as np
+
+# steepness of the sigmoid blend curve
+sigmoid_slope = 10
+
+
+def blend_weights(transition_length, curve='linear'):
+    """
+    Weight of the end image in every frame of a transition (0 is the start image). The frame after
+    the transition shows the end image, so the weights go from 0 up to (but not including) 1.
+    - 'linear': the same change in every frame
+    - 'sigmoid': slow at the start and the end, fast in the middle (a logistic curve scaled to 0-1)
+    """
+    steps = np.arange(transition_length)/transition_length
+    if curve == 'linear':
+        return steps
+    elif curve == 'sigmoid':
+        logistic = lambda x: 1/(1 + np.exp(-sigmoid_slope*(x - 0.5)))
+        return (logistic(steps) - logistic(0))/(logistic(1) - logistic(0))
+    raise ValueError(f'Unknown blend curve {curve}, choose linear or sigmoid')
+
+
+class BlendFrame():
+    """
+    Entry of the unique stimulus list for one frame of a fading transition: the start image is drawn
+    and the end image on top of it with the opacity of the frame, which gives
+    (1-weight)*start + weight*end. The two images are the plain stimuli, so the opacity of the end
+    image is set back after drawing.
+    """
+
+    def __init__(self, start, end, weight):
+        self.start = start
+        self.end = end
+        self.weight = float(weight)
+
+    def draw(self):
+        self.start.draw()
+        self.end.opacity = self.weight
+        self.end.draw()
+        self.end.opacity = 1
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 10:43:09
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import time
+import numpy as np
+import pandas as pd
+
+
+class FrameTimer():
+    """
+    Records the time of every flip into a preallocated ring buffer.
+
+    record() is called once per frame right after the flip and only writes two numbers into
+    the buffers. At the end of every trial the flip intervals are compared with the refresh
+    period and the phase onsets with the phase schedule of the trial:
+    - a dropped frame is a flip interval longer than 1.5 refresh periods
+    - a late phase is a phase that started more than half a refresh period after its planned onset
+    The statistics of all trials can be written to a tsv file next to the events file.
+    """
+
+    def __init__(self, monitor_refreshrate, capacity=65536, clock=time.perf_counter):
+
+        self.frame_period = 1/monitor_refreshrate
+        self.capacity = capacity
+        self.clock = clock
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.phases = np.zeros(capacity, dtype=np.int32)
+        self.n_frames = 0
+        self.trial_start = 0
+        # pauses are taken out of the flip times, so they do not count as dropped frames
+        self.paused = 0
+        self.trial_stats = []
+
+    def record(self, phase):
+        """ Stores the time of the flip that just happened and the phase it belongs to """
+        idx = self.n_frames % self.capacity
+        self.timestamps[idx] = self.clock() - self.paused
+        self.phases[idx] = phase
+        self.n_frames += 1
+
+    def add_pause(self, duration):
+        self.paused += duration
+
+    def start_trial(self):
+        self.trial_start = self.n_frames
+
+    def end_trial(self, trial):
+        """ Computes the jitter statistics of the trial that just ended """
+
+        n_frames = self.n_frames - self.trial_start
+        # if the trial had more frames than the buffer, only the last ones are evaluated
+        first = max(self.trial_start, self.n_frames - self.capacity)
+        indices = np.arange(first, self.n_frames) % self.capacity
+        timestamps = self.timestamps[indices]
+        phases = self.phases[indices]
+        intervals = np.diff(timestamps)
+
+        stats = {'trial_nr': trial.trial_nr,
+                 'block_ID': trial.block_ID,
+                 'trial_type': trial.trial_type,
+                 'timing': trial.timing,
+                 'n_frames': n_frames,
+                 'n_evaluated': len(timestamps),
+                 'mean_interval': np.nan,
+                 'p99_interval': np.nan,
+                 'max_interval': np.nan,
+                 'dropped_frames': 0,
+                 'late_phases': 0,
+                 'max_phase_delay': np.nan}
+
+        if len(intervals) > 0:
+            dropped = intervals > 1.5*self.frame_period
+            stats['mean_interval'] = intervals.mean()
+            stats['p99_interval'] = np.percentile(intervals, 99)
+            stats['max_interval'] = intervals.max()
+            # a long interval can hide more than one missed refresh
+            stats['dropped_frames'] = int(np.round(intervals[dropped]/self.frame_period).sum() - dropped.sum())
+
+        if first == self.trial_start and len(timestamps) > 0:
+            # planned onsets relative to the first flip of the trial
+            durations = np.asarray(trial.schedule.durations, dtype=np.float64)
+            if trial.timing == 'frames':
+                durations = durations*self.frame_period
+            planned_onsets = np.concatenate([[0], np.cumsum(durations)[:-1]])
+            # the first flip of every phase that was shown
+            phase_starts = np.flatnonzero(np.diff(phases, prepend=phases[0]-1))
+            shown_phases = phases[phase_starts]
+            delays = (timestamps[phase_starts] - timestamps[0]) - planned_onsets[shown_phases]
+            stats['late_phases'] = int(np.count_nonzero(delays > 0.5*self.frame_period))
+            stats['max_phase_delay'] = delays.max()
+
+        self.trial_stats.append(stats)
+        return stats
+
+    def to_dataframe(self):
+        return pd.DataFrame(self.trial_stats)
+
+    def save(self, filename):
+        self.to_dataframe().round(6).to_csv(filename, sep='\t', index=False)
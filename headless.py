@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 10:47:09
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import os
+import sys
+import time
+import types
+import yaml
+import numpy as np
+import pandas as pd
+from bistable_perception_session import BistablePerceptionSession
+from input_thread import InputThread
+
+
+class VirtualTime():
+    """
+    Time source of the headless session. Every flip of the null window advances it by one
+    refresh period (two for the flips in dropped_flips), nothing ever waits. With flip_jitter
+    every flip comes up to that fraction of a tick early or late (uniform).
+    """
+
+    def __init__(self, monitor_refreshrate, dropped_flips=(), flip_jitter=0, seed=0):
+        self.frame_period = 1/monitor_refreshrate
+        self.dropped_flips = set(dropped_flips)
+        self.flip_jitter = flip_jitter
+        self.rng = np.random.default_rng(seed)
+        self.jitter = 0.0
+        self.n_flips = 0
+        self.ticks = 0
+
+    def now(self):
+        # counted in ticks, so that the time does not drift over a long session
+        return (self.ticks + self.jitter)*self.frame_period
+
+    def flip(self):
+        self.ticks += 2 if self.n_flips in self.dropped_flips else 1
+        self.n_flips += 1
+        if self.flip_jitter > 0:
+            self.jitter = self.rng.uniform(-self.flip_jitter, self.flip_jitter)
+
+
+class VirtualClock():
+    """ psychopy Clock on the virtual time (getTime, reset and add behave the same) """
+
+    def __init__(self, virtual_time):
+        self.virtual_time = virtual_time
+        self.last_reset = virtual_time.now()
+
+    def getTime(self):
+        return self.virtual_time.now() - self.last_reset
+
+    def reset(self, newT=0.0):
+        self.last_reset = self.virtual_time.now() + newT
+
+    def add(self, t):
+        self.last_reset += t
+
+    def getLastResetTime(self):
+        return self.last_reset
+
+
+class NullWindow():
+    """ Window without a screen: flip advances the virtual time and calls the callOnFlip functions """
+
+    def __init__(self, virtual_time, size=(1920, 1080)):
+        self.virtual_time = virtual_time
+        self.size = size
+        self.recordFrameIntervals = True
+        self.frameIntervals = []
+        self.movieFrames = []
+        self.to_call = []
+
+    def callOnFlip(self, function, *args, **kwargs):
+        self.to_call.append((function, args, kwargs))
+
+    def flip(self, clearBuffer=True):
+        last_flip = self.virtual_time.now()
+        self.virtual_time.flip()
+        if self.recordFrameIntervals:
+            self.frameIntervals.append(self.virtual_time.now() - last_flip)
+        to_call, self.to_call = self.to_call, []
+        for function, args, kwargs in to_call:
+            function(*args, **kwargs)
+        return self.virtual_time.now()
+
+    def getActualFrameRate(self, *args, **kwargs):
+        return 1/self.virtual_time.frame_period
+
+    def clearBuffer(self):
+        pass
+
+    def getMovieFrame(self, buffer='front'):
+        self.movieFrames.append(None)
+
+    def saveMovieFrames(self, fileName, *args, **kwargs):
+        # there is nothing to save
+        self.movieFrames = []
+
+    def close(self):
+        pass
+
+
+class NullStim():
+    """ Takes the arguments of any psychopy stimulus, draw() only counts how often it was called """
+
+    def __init__(self, win, *args, **kwargs):
+        self.win = win
+        self.n_draws = 0
+
+    def draw(self, win=None):
+        self.n_draws += 1
+
+
+# used instead of psychopy.visual to create the stimuli of the headless session
+null_visual = types.SimpleNamespace(ImageStim=NullStim, TextStim=NullStim, Circle=NullStim, GratingStim=NullStim, ElementArrayStim=NullStim)
+
+
+class ScriptedKey():
+    """ Same attributes as a psychopy KeyPress, compares equal to its name """
+
+    def __init__(self, name, tDown, duration):
+        self.name = name
+        self.tDown = tDown
+        self.rt = tDown
+        self.duration = duration
+
+    def __eq__(self, other):
+        return self.name == other
+
+    def __ne__(self, other):
+        return self.name != other
+
+    def __repr__(self):
+        return f'ScriptedKey({self.name}, rt={self.rt:.4f}, duration={self.duration})'
+
+
+class ScriptedKeyboard():
+    """
+    Replaces the psychopy keyboard. The key presses are given as (onset, name, duration) with the
+    onset on the keyboard clock and are returned by getKeys once the virtual time has passed them
+    (with waitRelease once the key was released).
+    """
+
+    def __init__(self, virtual_time, keys=()):
+        self.clock = VirtualClock(virtual_time)
+        keys = sorted(keys, key=lambda key: key[0])
+        self.onsets = np.array([key[0] for key in keys], dtype=float)
+        self.names = [key[1] for key in keys]
+        self.durations = np.array([key[2] for key in keys], dtype=float)
+        self.returned = np.zeros(len(keys), dtype=bool)
+        # all keys before this one were returned already
+        self.first_pending = 0
+
+    def getKeys(self, keyList=None, waitRelease=True, clear=True):
+        now = self.clock.getTime()
+        pressed = np.searchsorted(self.onsets, now, side='right')
+        keys = []
+        for i in range(self.first_pending, pressed):
+            if self.returned[i] or (keyList is not None and self.names[i] not in keyList):
+                continue
+            released = self.onsets[i] + self.durations[i] <= now
+            if waitRelease and not released:
+                continue
+            keys.append(ScriptedKey(self.names[i], self.onsets[i], self.durations[i] if released else None))
+            if clear:
+                self.returned[i] = True
+
+        while self.first_pending < pressed and self.returned[self.first_pending]:
+            self.first_pending += 1
+        return keys
+
+    def clearEvents(self):
+        pressed = np.searchsorted(self.onsets, self.clock.getTime(), side='right')
+        self.returned[:pressed] = True
+        self.first_pending = max(self.first_pending, pressed)
+
+    @classmethod
+    def from_events(cls, virtual_time, events_file):
+        """ Replays the button presses of the events file of a previous session """
+        events = pd.read_csv(events_file, sep='\t')
+        responses = events[events['response'].notna()]
+        keys = zip(responses['onset'], responses['response'].astype(str), responses['key_duration'].fillna(0.1))
+        return cls(virtual_time, keys)
+
+
+def random_keys(duration, rate, names, seed=0, mean_key_duration=0.2):
+    """ Key presses at random times (on average rate per second) with random names from names """
+    rng = np.random.default_rng(seed)
+    n_keys = rng.poisson(rate*duration)
+    onsets = np.sort(rng.uniform(0, duration, n_keys))
+    key_durations = rng.exponential(mean_key_duration, n_keys)
+    return list(zip(onsets, rng.choice(names, n_keys), key_durations))
+
+
+class StubTracker():
+    """ Collects the messages and commands that would be sent to the EyeLink """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.messages = []
+        self.commands = []
+
+    def sendMessage(self, msg):
+        self.messages.append((self.clock.getTime(), msg))
+
+    def sendCommand(self, cmd):
+        self.commands.append(cmd)
+
+    def startRecording(self, *args):
+        pass
+
+    def stopRecording(self):
+        pass
+
+
+class HeadlessSession(BistablePerceptionSession):
+    """
+    The full session without screen, keyboard and eyetracker: the window is a NullWindow, the
+    keyboard a ScriptedKeyboard and the tracker a StubTracker, all on the same virtual clock.
+    The trials run with the exptools2 code as in the experiment, only as fast as the computer can.
+    settings_overrides changes single settings, e.g. {'Task settings': {'Blocks': 4}}.
+    """
+
+    visual_module = null_visual
+
+    def __init__(self, output_str, output_dir, settings_file, subject_ID, task, keys=(), eyetracker_on=True,
+                 settings_overrides=None, dropped_flips=(), flip_jitter=0, plan_file=None):
+
+        # the parts of the exptools2 session that the experiment uses (without window, mouse and tracker)
+        self.output_str = output_str
+        self.output_dir = output_dir
+        self.settings_file = settings_file
+        with open(settings_file) as f:
+            self.settings = yaml.safe_load(f)
+        for section, values in (settings_overrides or {}).items():
+            self.settings[section].update(values)
+
+        monitor_refreshrate = self.settings['Task settings']['Monitor refreshrate']
+        self.virtual_time = VirtualTime(monitor_refreshrate, dropped_flips, flip_jitter)
+        self.clock = VirtualClock(self.virtual_time)
+        self.timer = VirtualClock(self.virtual_time)
+        self.exp_start = None
+        self.exp_stop = None
+        self.current_trial = None
+        self.global_log = pd.DataFrame(columns=['trial_nr', 'onset', 'event_type', 'phase', 'response', 'nr_frames'])
+        self.nr_frames = 0
+        self.first_trial = True
+        self.closed = False
+        self.win = NullWindow(self.virtual_time, self.settings['window']['size'])
+        self.actual_framerate = monitor_refreshrate
+        self.mouse = None
+        self.mri_simulator = None
+        self.eyetracker_on = eyetracker_on
+        self.tracker = StubTracker(self.clock)
+        self.keys = keys
+
+        self.setup(subject_ID, task, plan_file)
+        if self.frame_timer is not None:
+            self.frame_timer.clock = self.virtual_time.now
+
+    def create_keyboard(self):
+        return ScriptedKeyboard(self.virtual_time, self.keys)
+
+    def create_input(self):
+        # polled when the trial takes the events, so that the run does not depend on the thread timing
+        return InputThread(self.kb, threaded=False)
+
+    def display_text(self, text, keys=None, duration=None, **kwargs):
+        # nobody has to read the instructions
+        pass
+
+    def calibrate_eyetracker(self):
+        pass
+
+    def quit(self):
+        # an aborted headless run only ends the run, not python
+        pass
+
+    def start_recording_eyetracker(self):
+        pass
+
+    def close(self):
+        if self.closed:
+            return
+        # the phases without the button presses, for the schedule report
+        self.phase_log = self.global_log.copy()
+        # there is no edf file to receive from the stub tracker
+        self.eyetracker_on = False
+        super().close()
+
+    def planned_duration(self):
+        """ Duration of the whole trial list in seconds """
+        frame_period = self.virtual_time.frame_period
+        return sum(trial.schedule.total_duration*(frame_period if trial.timing == 'frames' else 1) for trial in self.trial_list)
+
+    def schedule_report(self):
+        """
+        Compares the logged phases (after run) with the phase schedules of the trial list.
+        The onset errors are given in screen ticks, relative to the first phase of every trial.
+        The first phase of the session is one tick short, because exptools2 compensates for the
+        flip in start_experiment.
+        """
+        frame_period = self.virtual_time.frame_period
+        phases = self.phase_log['phase'].to_numpy(dtype=int)
+        onsets = self.phase_log['onset'].to_numpy(dtype=float)
+        # every trial logs its phase 0 first
+        trial_index = np.cumsum(phases == 0) - 1
+
+        report = []
+        for i, trial in enumerate(self.trial_list):
+            logged = trial_index == i
+            durations = np.asarray(trial.schedule.durations, dtype=np.float64)
+            if trial.timing == 'frames':
+                durations = durations*frame_period
+            planned_onsets = np.concatenate([[0], np.cumsum(durations)[:-1]])
+            # in whole ticks, the flip jitter is not an onset error
+            errors = np.round(((onsets[logged] - onsets[logged][:1]) - planned_onsets[phases[logged]])/frame_period)*frame_period
+            report.append({'trial_index': i,
+                           'trial_nr': trial.trial_nr,
+                           'block_type': trial.block_type,
+                           'planned_phases': len(trial.schedule),
+                           'logged_phases': int(np.count_nonzero(logged)),
+                           'planned_duration': durations.sum(),
+                           'max_onset_error': np.abs(errors).max()/frame_period if len(errors) > 0 else np.nan})
+        return pd.DataFrame(report)
+
+
+def main():
+    # python headless.py settings_RS.yml RS [button presses per second]
+    settings_file = sys.argv[1]
+    task = sys.argv[2]
+    rate = float(sys.argv[3]) if len(sys.argv) > 3 else 0.5
+
+    with open(settings_file) as f:
+        settings = yaml.safe_load(f)
+    overrides = {}
+    if task == 'RS' and not os.path.isdir(settings['Stimulus settings']['Stimulus path']):
+        print('Stimulus path not found, the sphere is computed instead')
+        overrides['Stimulus settings'] = {'Stimulus source': 'procedural', 'Stimulus cache': False}
+
+    output_str = f'headless_{task}'
+    session = HeadlessSession(output_str, f'./output_data/{output_str}_Logs', settings_file, 1, task, settings_overrides=overrides)
+    session.kb = ScriptedKeyboard(session.virtual_time, random_keys(session.planned_duration(), rate, ['1', '2']))
+
+    start = time.perf_counter()
+    session.run()
+    duration = time.perf_counter() - start
+
+    virtual_duration = session.virtual_time.now()
+    print(f'\n{session.virtual_time.n_flips} flips, {virtual_duration:.1f} s session time in {duration:.1f} s '
+          f'({virtual_duration/duration:.0f}x real time, {duration/session.virtual_time.n_flips*1e6:.1f} us per frame)')
+    report = session.schedule_report()
+    mismatches = report[report['planned_phases'] != report['logged_phases']]
+    print(f'trials with missing phases: {len(mismatches)} of {len(report)}')
+    print(f'largest onset error: {report["max_onset_error"].max():.2f} ticks')
+    print(f'eyetracker messages: {len(session.tracker.messages)}')
+
+
+if __name__ == '__main__':
+    main()
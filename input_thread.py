@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:06:00
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import time
+import threading
+import collections
+
+
+class KeyEvent():
+    """ A key going down or up. Like a psychopy KeyPress it compares equal to its name """
+
+    __slots__ = ['kind', 'name', 'rt', 'duration']
+
+    def __init__(self, kind, name, rt, duration=None):
+        self.kind = kind
+        self.name = name
+        self.rt = rt
+        self.duration = duration
+
+    def __eq__(self, other):
+        return self.name == other
+
+    def __ne__(self, other):
+        return self.name != other
+
+    def __repr__(self):
+        return f'KeyEvent({self.kind}, {self.name}, rt={self.rt:.4f}, duration={self.duration})'
+
+
+class InputThread():
+    """
+    Polls the keyboard every poll_interval seconds on a background thread and puts a 'down' event
+    for every key press and an 'up' event (with the duration) for every release into a deque
+    (append and popleft are thread-safe, no lock is needed). The trial only takes the events out
+    of the deque, so the keyboard is not polled in the frame loop. The thread holds the GIL while
+    it polls, a short interval takes that time from the frame loop.
+    The times are the ones of the keyboard (psychopy timestamps the presses itself), a keyboard
+    without timestamps gets the time of the poll. With threaded=False the keyboard is polled when
+    the events are taken out, once per frame (the session does that with an Input poll interval
+    of 0, the headless session always, so that a run is reproducible).
+    """
+
+    def __init__(self, keyboard, poll_interval=0.005, threaded=True):
+        self.keyboard = keyboard
+        self.poll_interval = poll_interval
+        self.threaded = threaded
+        self.queue = collections.deque()
+        # presses that went down but not up yet, with the time they went down
+        self.down = {}
+        self.n_polls = 0
+        self.stopped = threading.Event()
+        self.thread = None
+        if threaded:
+            self.thread = threading.Thread(target=self.poll_keys, name='input', daemon=True)
+            self.thread.start()
+
+    def poll_keys(self):
+        while not self.stopped.is_set():
+            self.poll()
+            self.stopped.wait(self.poll_interval)
+
+    def identify(self, key):
+        """ A press is identified by its name and onset, or (without timestamps) by the key object """
+        rt = getattr(key, 'rt', None)
+        return (key.name, rt) if rt is not None else id(key)
+
+    def poll(self):
+        self.n_polls += 1
+        # released keys are cleared from the keyboard, the ones that are still down stay in it
+        for key in self.keyboard.getKeys(waitRelease=True, clear=True):
+            rt = self.down.pop(self.identify(key), None)
+            if rt is None:
+                rt = key.rt if getattr(key, 'rt', None) is not None else self.keyboard.clock.getTime()
+                self.queue.append(KeyEvent('down', key.name, rt))
+            self.queue.append(KeyEvent('up', key.name, rt, key.duration))
+        for key in self.keyboard.getKeys(waitRelease=False, clear=False):
+            identity = self.identify(key)
+            if key.duration is None and identity not in self.down:
+                rt = key.rt if getattr(key, 'rt', None) is not None else self.keyboard.clock.getTime()
+                self.down[identity] = rt
+                self.queue.append(KeyEvent('down', key.name, rt))
+
+    def events(self):
+        """ All events since the last call """
+        if not self.threaded:
+            self.poll()
+        events = []
+        while self.queue:
+            events.append(self.queue.popleft())
+        return events
+
+    def close(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
@@ -10,8 +10,10 @@
 import sys
 import os
 import re
+import yaml
 from datetime import datetime
-from bistable_perception_session_seconds import BistablePerceptionSession
+from bistable_perception_session import BistablePerceptionSession
+from session_plan import plan_filename, compile_plan, SessionPlan
 datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
 
@@ -34,8 +36,22 @@ def main():
         print("Warning: output directory already exists. Renaming to avoid overwriting.")
         output_dir = output_dir + datetime.now().strftime('%Y%m%d%H%M%S')
     
+    # a precompiled session plan (python session_plan.py sub-xxx ses-x task-XX) is used if there is one
+    plan_file = plan_filename(output_str, task)
+    if os.path.exists(plan_file):
+        plan = SessionPlan.load(plan_file)
+        with open(settings_file) as f:
+            settings = yaml.safe_load(f)
+        if not plan.fits(settings):
+            # a stale plan would ignore the changed settings, it is compiled again with the same seed
+            print('The settings changed since the session plan was compiled, compiling it again')
+            compile_plan(subject, sess, task, plan.meta['seed'], settings_file)
+        print('Session plan:', plan_file)
+    else:
+        plan_file = None
+
     # instantiate and run the session 
-    experiment_session = BistablePerceptionSession(output_str, output_dir, settings_file, subject_ID, eyetracker_on, task)
+    experiment_session = BistablePerceptionSession(output_str, output_dir, settings_file, subject_ID, eyetracker_on, task, plan_file)
     experiment_session.run()
 
 
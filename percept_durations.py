@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 10:58:38
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import numpy as np
+
+
+class PerceptDurations():
+    """
+    Draws the percept durations (in frames) of the unambiguous blocks.
+
+    - 'uniform': the mean duration plus a uniform integer jitter in [-jitter, jitter)
+    - 'gamma' / 'lognormal': fitted to samples (e.g. all values of the predefined percept
+      durations) or, without samples, with the given mean and jitter as standard deviation
+
+    The durations are drawn in batches, the last one is cut so that a block has exactly the
+    total number of frames (like the while loop this replaces). No percept is shorter than
+    minimum frames (the BR transition needs that many), a rest that is too short is added to the
+    last percept.
+    """
+
+    distributions = ['uniform', 'gamma', 'lognormal']
+
+    def __init__(self, distribution, mean, jitter=0, samples=None, minimum=1):
+
+        if distribution not in self.distributions:
+            raise ValueError(f'Unknown percept duration distribution {distribution}, choose one of {self.distributions}')
+        self.distribution = distribution
+        self.mean = mean
+        self.jitter = int(jitter)
+        self.minimum = max(int(minimum), 1)
+
+        if samples is not None:
+            samples = np.asarray(samples, dtype=np.float64)
+            self.mean = samples.mean()
+            sd = samples.std()
+            log_samples = np.log(samples[samples > 0])
+            self.log_mean, self.log_sd = log_samples.mean(), log_samples.std()
+        else:
+            sd = max(jitter, 1e-9)
+            # log-normal with the given mean and standard deviation
+            self.log_sd = np.sqrt(np.log(1 + (sd/mean)**2))
+            self.log_mean = np.log(mean) - self.log_sd**2/2
+        # method of moments
+        self.gamma_shape = (self.mean/sd)**2
+        self.gamma_scale = sd**2/self.mean
+
+    def draw(self, rng, n):
+        if self.distribution == 'uniform':
+            jitter = rng.integers(-self.jitter, self.jitter, n) if self.jitter > 0 else np.zeros(n)
+            durations = self.mean + jitter
+        elif self.distribution == 'gamma':
+            durations = rng.gamma(self.gamma_shape, self.gamma_scale, n)
+        else:
+            durations = rng.lognormal(self.log_mean, self.log_sd, n)
+        return np.maximum(durations.astype(np.int64), self.minimum)
+
+    def block(self, rng, total):
+        """ Durations that add up to total frames, the last one is what is left """
+        total = int(total)
+        batch_size = int(total/self.mean*1.2) + 8
+        durations = np.zeros(0, dtype=np.int64)
+        # more than one batch is very rare
+        while durations.sum() <= total:
+            durations = np.concatenate([durations, self.draw(rng, batch_size)])
+
+        return cut_to_total(durations, total, self.minimum)
+
+
+def cut_to_total(durations, total, minimum=1):
+    """ The durations until total is reached, the last one is what is left (a rest shorter than minimum is added to the one before) """
+    ends = np.cumsum(durations)
+    n_complete = np.searchsorted(ends, total, side='right')
+    durations = durations[:n_complete]
+    rest = total - (ends[n_complete-1] if n_complete > 0 else 0)
+    if 0 < rest < minimum and n_complete > 0:
+        durations[-1] += rest
+    elif rest > 0:
+        durations = np.append(durations, rest)
+    return durations
+
+
+def percept_presses(event_types, keys, break_buttons):
+    """
+    Mask of the button presses that report a percept: not the pause key, the keys pressed during a
+    pause or the buttons that end a phase
+    """
+    return ~np.isin(event_types, ['pause', 'paused_response']) & ~np.isin(keys, [*break_buttons, 'p'])
+
+
+def reported_durations(onsets, keys, start, end):
+    """
+    Percept durations (in s) of an ambiguous block from the button presses in it. A percept lasts
+    from a switch (a press of another button than the one before) to the next one, the first one
+    starts with the block and the last one ends with it.
+    """
+    onsets = np.asarray(onsets, dtype=np.float64)
+    keys = np.asarray(keys)
+    switch = np.ones(len(keys), dtype=bool)
+    switch[1:] = keys[1:] != keys[:-1]
+    return np.diff(np.concatenate([[start], onsets[switch], [end]]))
+
+
+def playback_block(durations, total, minimum=1):
+    """ The reported durations (in frames) in their order, repeated until the block is full """
+    durations = np.maximum(np.asarray(durations).astype(np.int64), minimum)
+    repeats = int(total // durations.sum()) + 1
+    return cut_to_total(np.tile(durations, repeats), int(total), minimum)
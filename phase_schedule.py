@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 10:41:37
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import numpy as np
+
+
+class RepeatedName():
+    """ Behaves like ['stim']*n without storing n references """
+
+    def __init__(self, name, length):
+        self.name = name
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if not -self.length <= index < self.length:
+            raise IndexError('phase index out of range')
+        return self.name
+
+    def __iter__(self):
+        for _ in range(self.length):
+            yield self.name
+
+
+class PhaseSchedule():
+    """
+    Phase durations and stimulus indices of one trial as numpy arrays.
+
+    Durations are int32 for 'frames' timing and float32 for 'seconds' timing, stimulus
+    indices are int32. A value that is the same for every phase (e.g. the duration of one
+    frame, or the stimulus index of a break) can be given as a scalar. It is then stored as a
+    read-only broadcast view, which takes no memory no matter how many phases there are.
+    """
+
+    def __init__(self, durations, stimulus_indices, timing, n_phases=None):
+
+        self.timing = timing
+        dtype = np.int32 if timing == 'frames' else np.float32
+        durations = np.asarray(durations, dtype=dtype)
+        stimulus_indices = np.asarray(stimulus_indices, dtype=np.int32)
+
+        if n_phases is None:
+            arrays = [values for values in (durations, stimulus_indices) if values.ndim == 1]
+            if len(arrays) == 0:
+                raise ValueError('n_phases has to be given if durations and stimulus indices are both scalars')
+            n_phases = len(arrays[0])
+        # like [duration]*n_phases, a negative number (a percept shorter than the transition) gives no phases
+        n_phases = max(int(n_phases), 0)
+
+        self.durations = np.broadcast_to(durations, (n_phases,))
+        self.stimulus_indices = np.broadcast_to(stimulus_indices, (n_phases,))
+        self.names = RepeatedName('stim', n_phases)
+
+    def __len__(self):
+        return len(self.durations)
+
+    @property
+    def total_duration(self):
+        return self.durations.sum(dtype=np.float64)
+
+    @property
+    def nbytes(self):
+        """ Memory that is actually used by the arrays (broadcast values only count once) """
+        return sum(values.itemsize if values.strides == (0,) else values.nbytes for values in (self.durations, self.stimulus_indices))
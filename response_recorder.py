@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 10:37:22
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import numpy as np
+import pandas as pd
+
+
+class ResponseRecorder():
+    """
+    Collects the button presses of the session in preallocated, typed numpy buffers.
+
+    Writing single cells into the global_log DataFrame inside the refresh loop can
+    reallocate the whole frame on every press. Here a response only fills one slot
+    of every column. The buffers double their size when they are full, so this
+    practically never happens during a session. The responses are turned into a
+    DataFrame (with the same columns as before) when the session is closed.
+    """
+
+    # fixed columns of a response row in the order they used to be written to the global log
+    columns = [('event_type', object),
+               ('trial_nr', np.int64),
+               ('onset', np.float64),
+               ('key_duration', np.float64),
+               ('phase', np.int64),
+               ('response', object),
+               ('response_button', object),
+               ('nr_frames', np.int64)]
+
+    def __init__(self, capacity=4096):
+
+        self.capacity = capacity
+        self.n_responses = 0
+        self.buffers = {name: np.empty(capacity, dtype=dtype) for name, dtype in self.columns}
+        # the trial parameters are added as extra columns the first time they show up
+        self.parameter_names = []
+
+    def __len__(self):
+        return self.n_responses
+
+    def append(self, event_type, trial_nr, onset, key_duration, phase, response, response_button, parameters):
+        """ Stores one response (and the parameters of the current trial), returns its index """
+
+        if self.n_responses == self.capacity:
+            self._grow()
+
+        idx = self.n_responses
+        buffers = self.buffers
+        buffers['event_type'][idx] = event_type
+        buffers['trial_nr'][idx] = trial_nr
+        buffers['onset'][idx] = onset
+        buffers['key_duration'][idx] = np.nan if key_duration is None else key_duration
+        buffers['phase'][idx] = phase
+        buffers['response'][idx] = response
+        buffers['response_button'][idx] = response_button
+        buffers['nr_frames'][idx] = 0
+
+        for param, val in parameters.items():
+            if param not in buffers:
+                self.parameter_names.append(param)
+                buffers[param] = np.full(self.capacity, np.nan, dtype=object)
+            buffers[param][idx] = val
+
+        self.n_responses += 1
+        return idx
+
+    def set_duration(self, idx, key_duration):
+        """ The key duration of a response that was stored while the key was down """
+        self.buffers['key_duration'][idx] = key_duration
+
+    def _grow(self):
+        """ Doubles the size of all buffers """
+        self.capacity *= 2
+        for name, buffer in self.buffers.items():
+            fill = np.nan if buffer.dtype == object else 0
+            new_buffer = np.full(self.capacity, fill, dtype=buffer.dtype)
+            new_buffer[:len(buffer)] = buffer
+            self.buffers[name] = new_buffer
+
+    def to_dataframe(self):
+        """ Returns the recorded responses in the format of the exptools2 global_log """
+        data = {name: self.buffers[name][:self.n_responses] for name, _ in self.columns}
+        for param in self.parameter_names:
+            data[param] = self.buffers[param][:self.n_responses]
+        return pd.DataFrame(data)
+
+    def snapshot(self, names):
+        """ Copies of some columns of the responses so far, e.g. for a background thread """
+        return {name: self.buffers[name][:self.n_responses].copy() for name in names}
+
+    def clear(self):
+        self.n_responses = 0
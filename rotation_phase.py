@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:11:27
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import numpy as np
+
+
+class RotationPhase():
+    """
+    Angular position of the unambiguous sphere, as the number of the unambiguous frame that is shown
+    (frame 0 is the starting position, nr_of_frames positions per full turn).
+
+    Every frame of a percept moves the sphere one position in the direction of the percept (+1 right,
+    -1 left), so the positions of a whole block are one cumulative sum over the repeated directions.
+    At a switch the sphere turns back from the last position it was shown in, the rotation never jumps.
+    The position after the last frame is kept, a following block continues from there.
+    """
+
+    def __init__(self, nr_of_frames, position=0):
+        self.nr_of_frames = nr_of_frames
+        self.position = position
+
+    def positions(self, n_frames, directions):
+        """ Positions of all frames of the percepts (n_frames per percept), continuing from the current position """
+        steps = np.repeat(np.asarray(directions, dtype=np.int64), np.asarray(n_frames, dtype=np.int64))
+        positions = np.mod(self.position + np.cumsum(steps), self.nr_of_frames)
+        if len(positions) > 0:
+            self.position = int(positions[-1])
+        return positions
+
+    def block(self, n_frames, directions):
+        """
+        Frame numbers of every percept in the sequence of its direction, the left sequence is the
+        unambiguous sequence in reverse (left frame k is frame nr_of_frames-1-k).
+        Returns one array per percept.
+        """
+        n_frames = np.asarray(n_frames, dtype=np.int64)
+        directions = np.asarray(directions, dtype=np.int64)
+        if len(n_frames) == 0:
+            return []
+        positions = self.positions(n_frames, directions)
+        left = np.repeat(directions < 0, n_frames)
+        frames = np.where(left, self.nr_of_frames - 1 - positions, positions)
+        return np.split(frames, np.cumsum(n_frames)[:-1])
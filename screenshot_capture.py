@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 10:51:44
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import ctypes
+import collections
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+
+
+class ScreenshotCapture():
+    """
+    Screenshots that do not wait for the GPU in the frame loop.
+
+    on_flip() is called right after every flip. If a screenshot or a burst of screenshots was
+    requested, the frame that is on the screen (front buffer) is read into one of n_pbos pixel
+    buffer objects. glReadPixels into a pixel buffer only starts the copy on the GPU and returns,
+    the buffer is mapped read_lag flips later, when the copy is done. What still runs in the frame
+    loop is the copy of the mapped pixels into one of n_buffers preallocated numpy buffers
+    (a memcpy of width*height*3 bytes, about 0.6 ms for a full hd frame, set region to the stimulus to
+    make it smaller). The png encoding runs in a thread pool, the buffer is given back when the
+    png is written, so there are never more than n_buffers frames in memory.
+    If all pixel buffers or numpy buffers are in use the frame is skipped instead of waiting
+    (counted in n_skipped).
+    region is the [width, height] in pixels around the centre of the window (None for everything).
+    """
+
+    def __init__(self, win, directory, n_buffers=16, region=None, n_workers=2, n_pbos=3, read_lag=2):
+
+        self.win = win
+        self.directory = directory
+        window_width, window_height = getattr(win, 'frameBufferSize', win.size)
+        width, height = region if region else (window_width, window_height)
+        self.rect = ((window_width-width)//2, (window_height-height)//2, width, height)
+        self.buffers = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(n_buffers)]
+        # deque.append and popleft are thread-safe, the workers give the buffers back
+        self.free_buffers = collections.deque(range(n_buffers))
+        self.executor = ThreadPoolExecutor(n_workers, thread_name_prefix='screenshots')
+        self.requests = collections.deque()
+        # the pixel buffers are made on the first screenshot (they need the GL context)
+        self.n_pbos = n_pbos
+        self.pbos = None
+        self.free_pbos = collections.deque(range(n_pbos))
+        self.read_lag = read_lag
+        # [flips since the read, pbo, numpy buffer, name] of the reads that are not copied yet, oldest first
+        self.reads = collections.deque()
+        self.n_saved = 0
+        self.n_skipped = 0
+        self.closed = False
+
+    def request(self, name, n_frames=1):
+        """ Captures the next n_frames flips as <name>.png (or <name>_<frame>.png for more frames) """
+        self.requests.extend(f'{name}_{i:03d}' if n_frames > 1 else name for i in range(n_frames))
+
+    def capture_now(self, name):
+        """ Captures the frame that is on the screen now """
+        self.requests.appendleft(name)
+        self.on_flip()
+
+    def on_flip(self):
+        for read in self.reads:
+            read[0] += 1
+        while self.reads and self.reads[0][0] >= self.read_lag:
+            self.copy_read()
+        if not self.requests:
+            return
+        name = self.requests.popleft()
+        if not self.free_pbos or not self.free_buffers:
+            self.n_skipped += 1
+            return
+        if self.pbos is None:
+            self.pbos = self.create_pbos(self.n_pbos)
+        pbo = self.free_pbos.popleft()
+        self.start_read(self.pbos[pbo])
+        self.reads.append([0, pbo, self.free_buffers.popleft(), name])
+
+    def copy_read(self):
+        """ Copies the oldest read into a numpy buffer and encodes it in the thread pool """
+        _, pbo, index, name = self.reads.popleft()
+        self.copy_pbo(self.pbos[pbo], self.buffers[index])
+        self.free_pbos.append(pbo)
+        self.executor.submit(self.encode, index, f'{self.directory}/{name}.png')
+
+    def create_pbos(self, n_pbos):
+        from pyglet import gl as GL
+        _, _, width, height = self.rect
+        pbos = (GL.GLuint*n_pbos)()
+        GL.glGenBuffers(n_pbos, pbos)
+        for pbo in pbos:
+            GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, pbo)
+            GL.glBufferData(GL.GL_PIXEL_PACK_BUFFER, width*height*3, None, GL.GL_STREAM_READ)
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, 0)
+        return list(pbos)
+
+    def start_read(self, pbo):
+        from pyglet import gl as GL
+        x, y, width, height = self.rect
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, pbo)
+        GL.glReadBuffer(GL.GL_FRONT)
+        GL.glPixelStorei(GL.GL_PACK_ALIGNMENT, 1)
+        # with a bound pixel pack buffer the last argument is the offset in the buffer
+        GL.glReadPixels(x, y, width, height, GL.GL_RGB, GL.GL_UNSIGNED_BYTE, 0)
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, 0)
+
+    def copy_pbo(self, pbo, buffer):
+        from pyglet import gl as GL
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, pbo)
+        pixels = GL.glMapBuffer(GL.GL_PIXEL_PACK_BUFFER, GL.GL_READ_ONLY)
+        ctypes.memmove(buffer.ctypes.data, pixels, buffer.nbytes)
+        GL.glUnmapBuffer(GL.GL_PIXEL_PACK_BUFFER)
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, 0)
+
+    def delete_pbos(self):
+        from pyglet import gl as GL
+        GL.glDeleteBuffers(len(self.pbos), (GL.GLuint*len(self.pbos))(*self.pbos))
+
+    def encode(self, index, filename):
+        try:
+            # OpenGL starts with the bottom row
+            Image.fromarray(self.buffers[index][::-1]).save(filename)
+            self.n_saved += 1
+        finally:
+            self.free_buffers.append(index)
+
+    def close(self):
+        """ Waits until all screenshots are written """
+        if self.closed:
+            return
+        self.closed = True
+        self.requests.clear()
+        # the last reads are mapped right away (this waits for the GPU, the session is over)
+        while self.reads:
+            self.copy_read()
+        if self.pbos is not None:
+            self.delete_pbos()
+        self.executor.shutdown(wait=True)
+        if self.n_skipped > 0:
+            print(f'{self.n_skipped} screenshots were skipped because all {len(self.buffers)} buffers were in use')
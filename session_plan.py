@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 10:55:41
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import hashlib
+import tempfile
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from trial import BPTrial
+from phase_schedule import PhaseSchedule
+
+# the trial attributes that are stored per trial
+trial_columns = ['trial_nr', 'block_ID', 'block_type', 'trial_type', 'color_comb']
+# task settings that compile_plan overrides, they are left out of the settings hash
+# (the seed comes with the plan, the others do not change the trials)
+compile_overrides = ['Random seed', 'Event stream', 'Screenshot', 'Frame timing']
+
+
+def settings_hash(settings):
+    """ Hash of the task and stimulus settings, to notice if the settings changed after compiling """
+    relevant = {section: settings[section] for section in ['Task settings', 'Stimulus settings']}
+    relevant['Task settings'] = {key: value for key, value in relevant['Task settings'].items() if key not in compile_overrides}
+    return hashlib.sha1(json.dumps(relevant, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def plan_filename(output_str, task, directory='./session_plans'):
+    return os.path.join(directory, f'{output_str}_{task}.npz')
+
+
+class SessionPlan():
+    """
+    The trial list of one session (all randomization done) as numpy arrays.
+
+    The phase durations and stimulus indices of all trials are concatenated into two arrays,
+    offsets[i]:offsets[i+1] are the phases of trial i. The names of the unique stimulus list are
+    stored as well, so that the stimulus indices can be checked when the plan is loaded.
+    """
+
+    def __init__(self, meta, trials, offsets, durations, stimulus_indices, lookup_list):
+        self.meta = meta
+        self.trials = trials
+        self.offsets = offsets
+        self.durations = durations
+        self.stimulus_indices = stimulus_indices
+        self.lookup_list = lookup_list
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @classmethod
+    def from_session(cls, session):
+        if session.percept_playback:
+            raise ValueError('With percept playback the trial list is only complete at the end of the session')
+        trial_list = session.trial_list
+        trials = {'trial_nr': np.array([trial.trial_nr for trial in trial_list], dtype=np.int32),
+                  'block_ID': np.array([trial.block_ID for trial in trial_list], dtype=np.int32),
+                  'block_type': np.array([trial.block_type for trial in trial_list], dtype=str),
+                  'trial_type': np.array([trial.trial_type for trial in trial_list], dtype=str),
+                  # np.nan (rotating sphere) is stored as 'nan'
+                  'color_comb': np.array([str(trial.parameters['color_comb']) for trial in trial_list], dtype=str)}
+        offsets = np.concatenate([[0], np.cumsum([len(trial.schedule) for trial in trial_list])]).astype(np.int64)
+        durations = np.concatenate([trial.schedule.durations for trial in trial_list])
+        stimulus_indices = np.concatenate([trial.schedule.stimulus_indices for trial in trial_list])
+        meta = {'subject_ID': session.subject_ID,
+                'task': session.task,
+                'output_str': session.output_str,
+                'seed': session.seed,
+                'response_button': session.response_button,
+                'start_condition': session.start_condition,
+                'timing': session.timing.exptools_timing,
+                'timing_mode': session.timing_mode,
+                'settings_hash': settings_hash(session.settings),
+                'created': datetime.now().isoformat(timespec='seconds')}
+        return cls(meta, trials, offsets, durations, stimulus_indices, np.array(session.stimuli.lookup_list, dtype=str))
+
+    def save(self, filename):
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        np.savez_compressed(filename, meta=np.array(json.dumps(self.meta)), offsets=self.offsets, durations=self.durations,
+                            stimulus_indices=self.stimulus_indices, lookup_list=self.lookup_list,
+                            **{f'trial_{name}': values for name, values in self.trials.items()})
+
+    @classmethod
+    def load(cls, filename):
+        with np.load(filename, allow_pickle=False) as data:
+            trials = {name: data[f'trial_{name}'] for name in trial_columns}
+            return cls(json.loads(str(data['meta'])), trials, data['offsets'], data['durations'], data['stimulus_indices'], data['lookup_list'])
+
+    def check(self, session):
+        """ Raises if the plan does not fit the stimuli and timing of the session """
+        if session.percept_playback:
+            raise ValueError('With percept playback the unambiguous blocks are created during the session, this does not work with a session plan')
+        if self.meta['task'] != session.task:
+            raise ValueError(f'The session plan was compiled for {self.meta["task"]}, not {session.task}')
+        # frame-locked seconds and seconds have the same exptools2 timing, but not the same durations
+        if self.meta['timing_mode'] != session.timing_mode:
+            raise ValueError(f'The session plan was compiled with {self.meta["timing_mode"]} timing, the settings use {session.timing_mode}')
+        if list(self.lookup_list) != list(session.stimuli.lookup_list):
+            raise ValueError('The stimuli of the session plan do not match the stimulus settings, compile the plan again')
+        if not self.fits(session.settings):
+            raise ValueError('The settings changed since the session plan was compiled, compile the plan again')
+
+    def fits(self, settings):
+        """ True if the plan was compiled with these task and stimulus settings """
+        return self.meta['settings_hash'] == settings_hash(settings)
+
+    def create_trials(self, session):
+        """ The trial list of the plan, the schedules are views into the plan arrays """
+        self.check(session)
+        trial_list = []
+        for i in range(len(self)):
+            start, end = self.offsets[i], self.offsets[i+1]
+            schedule = PhaseSchedule(self.durations[start:end], self.stimulus_indices[start:end], self.meta['timing'])
+            color_comb = self.trials['color_comb'][i]
+            trial_list.append(BPTrial(session, int(self.trials['trial_nr'][i]), int(self.trials['block_ID'][i]), str(self.trials['block_type'][i]),
+                                      str(self.trials['trial_type'][i]), np.nan if color_comb == 'nan' else str(color_comb), schedule, self.meta['timing']))
+        return trial_list
+
+    def to_dataframe(self):
+        """ One row per trial, to inspect the plan """
+        table = pd.DataFrame(self.trials)
+        table['phases'] = np.diff(self.offsets)
+        table['duration'] = np.add.reduceat(self.durations.astype(np.float64), self.offsets[:-1]) if len(self.durations) else []
+        table['first_stimulus'] = self.lookup_list[self.stimulus_indices[self.offsets[:-1]]]
+        return table
+
+
+def compile_plan(subject, sess, task, seed=None, settings_file=None, directory='./session_plans'):
+    """
+    Creates the trial list of the session with the headless session (no window needed) and saves it.
+    Without a seed the seed is derived from subject, session and task, so compiling again gives the same plan.
+    """
+    from headless import HeadlessSession
+
+    output_str = subject + '_' + sess
+    subject_ID = int(re.findall(r'(?<=-)\d+', subject)[0])
+    settings_file = settings_file or './settings_' + task + '.yml'
+    if seed is None:
+        seed = zlib.crc32(f'{output_str}_{task}'.encode())
+    overrides = {'Task settings': {'Random seed': seed, 'Event stream': False, 'Screenshot': False, 'Frame timing': False}}
+
+    start = time.perf_counter()
+    session = HeadlessSession(output_str, tempfile.gettempdir(), settings_file, subject_ID, task, eyetracker_on=False, settings_overrides=overrides)
+    plan = SessionPlan.from_session(session)
+    filename = plan_filename(output_str, task, directory)
+    plan.save(filename)
+    print(f'\n{len(plan)} trials, {len(plan.durations)} phases compiled in {time.perf_counter()-start:.1f} s, '
+          f'saved to {filename} ({os.path.getsize(filename)/1e3:.0f} kB)')
+    return filename
+
+
+if __name__ == '__main__':
+    # python session_plan.py sub-xxx ses-x task-RS [seed]    compiles the plan of the session
+    # python session_plan.py session_plans/<plan>.npz        shows the trials of a plan
+    if sys.argv[1].endswith('.npz'):
+        plan = SessionPlan.load(sys.argv[1])
+        print(json.dumps(plan.meta, indent=2))
+        with pd.option_context('display.max_rows', None, 'display.width', 200):
+            print(plan.to_dataframe())
+    else:
+        compile_plan(sys.argv[1], sys.argv[2], sys.argv[3][5:], int(sys.argv[4]) if len(sys.argv) > 4 else None)
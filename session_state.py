@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:10:07
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+
+class SessionState():
+    """
+    State of the running session: 'running', 'paused' or 'aborting'.
+
+    running -> paused (pause), paused -> running (resume), running or paused -> aborting (abort).
+    Aborting is final, the session closes after the current trial. The pauses are kept as
+    (start, end) intervals on the given clock.
+    """
+
+    states = ['running', 'paused', 'aborting']
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.state = 'running'
+        self.pause_start = None
+        self.pauses = []
+
+    @property
+    def running(self):
+        return self.state == 'running'
+
+    @property
+    def paused(self):
+        return self.state == 'paused'
+
+    @property
+    def aborting(self):
+        return self.state == 'aborting'
+
+    def transition(self, action, allowed, new_state):
+        if self.state not in allowed:
+            raise ValueError(f'Cannot {action} the session while it is {self.state}')
+        self.state = new_state
+
+    def pause(self):
+        """ Returns the start of the pause """
+        self.transition('pause', ['running'], 'paused')
+        self.pause_start = self.clock.getTime()
+        return self.pause_start
+
+    def resume(self):
+        """ Returns the duration of the pause """
+        self.transition('resume', ['paused'], 'running')
+        return self.end_pause()
+
+    def abort(self):
+        was_paused = self.paused
+        self.transition('abort', ['running', 'paused'], 'aborting')
+        if was_paused:
+            self.end_pause()
+
+    def end_pause(self):
+        end = self.clock.getTime()
+        self.pauses.append((self.pause_start, end))
+        self.pause_start = None
+        return end - self.pauses[-1][0]
+
+    @property
+    def total_paused(self):
+        return sum(end - start for start, end in self.pauses)
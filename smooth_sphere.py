@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:13:27
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+from psychopy import visual
+import numpy as np
+
+
+class SmoothSphere():
+    """
+    Draws a SphereGenerator sphere with one ElementArrayStim and computes the dot positions on
+    every screen tick, so the sphere can rotate with any speed instead of stepping through the
+    pre-rendered frames.
+
+    Every draw moves the sphere by degrees_per_tick in the given direction (+1 right, -1 left).
+    The angle is kept between draws, so the rotation goes on from where it was at a switch.
+    The dots are drawn from back to front in the order of the closest of nr_of_frames stored
+    angles (the same resolution the rendered frames have). All arrays are allocated once, a tick
+    only writes into them. What remains per tick are the psychopy setters of xys, sizes and colors,
+    which copy and check the arrays (benchmarks/bench_smooth_sphere.py measures them with a stand-in
+    that does the same). Writing into the arrays inside the ElementArrayStim would save that, but
+    they are not public and differ between psychopy versions.
+    """
+
+    def __init__(self, win, sphere, nr_of_frames, stim_size, degrees_per_tick, visual_module=visual):
+
+        self.sphere = sphere
+        self.nr_of_frames = nr_of_frames
+        self.step = np.deg2rad(degrees_per_tick)
+        self.angle = 0.0
+        n = sphere.nr_of_dots
+
+        # the sphere coordinates scaled to degrees of visual angle (the stimulus is 1x1)
+        x0, y0, z0 = sphere.points.T
+        self.x0 = np.ascontiguousarray(x0*sphere.radius*stim_size)
+        self.z0 = np.ascontiguousarray(z0*sphere.radius*stim_size)
+        self.y = np.ascontiguousarray(y0*sphere.radius*stim_size)
+        self.x0_depth = np.ascontiguousarray(x0)
+        self.z0_depth = np.ascontiguousarray(z0)
+        _, _, depth = sphere.project(sphere.frame_angles(nr_of_frames))
+        self.orders = np.argsort(depth, axis=1)
+
+        # luminance and size are linear in the depth: value = back + (front-back)*(depth+1)/2
+        back_luminance, _ = sphere.dot_attributes(np.full(n, -1.0))
+        front_luminance, _ = sphere.dot_attributes(np.full(n, 1.0))
+        self.luminance_back = back_luminance
+        self.luminance_slope = (front_luminance - back_luminance)/2
+        if sphere.dot_size_range is None:
+            self.size_back, self.size_slope = sphere.dot_size*stim_size, 0.0
+        else:
+            self.size_back = sphere.dot_size_range[0]*stim_size
+            self.size_slope = (sphere.dot_size_range[1] - sphere.dot_size_range[0])*stim_size/2
+
+        self.x = np.empty(n)
+        self.depth = np.empty(n)
+        self.buffer = np.empty(n)
+        self.xys = np.empty((n, 2))
+        self.sizes = np.empty(n)
+        self.colors = np.empty((n, 3))
+
+        self.update()
+        self.stim = visual_module.ElementArrayStim(win, units='deg', nElements=n, elementTex=None, elementMask='circle',
+                                                   xys=self.xys, sizes=self.sizes, colors=self.colors, colorSpace='rgb')
+
+    def update(self):
+        """ Writes the positions, sizes and colours (back to front) of the current angle into the buffers """
+        cos, sin = np.cos(self.angle), np.sin(self.angle)
+        np.multiply(self.x0, cos, out=self.x)
+        np.multiply(self.z0, sin, out=self.buffer)
+        self.x += self.buffer
+        np.multiply(self.z0_depth, cos, out=self.depth)
+        np.multiply(self.x0_depth, sin, out=self.buffer)
+        self.depth -= self.buffer
+
+        order = self.orders[int(round(self.angle/(2*np.pi)*self.nr_of_frames)) % self.nr_of_frames]
+        np.take(self.x, order, out=self.buffer)
+        self.xys[:, 0] = self.buffer
+        np.take(self.y, order, out=self.buffer)
+        self.xys[:, 1] = self.buffer
+        np.take(self.depth, order, out=self.buffer)
+        self.buffer += 1
+        # sizes and colours of the sorted dots (rgb colours go from -1 to 1)
+        np.multiply(self.buffer, self.size_slope, out=self.sizes)
+        self.sizes += self.size_back
+        np.take(self.luminance_slope, order, out=self.x)
+        self.buffer *= self.x
+        np.take(self.luminance_back, order, out=self.x)
+        self.buffer += self.x
+        self.buffer *= 2
+        self.buffer -= 1
+        self.colors[:] = self.buffer[:, None]
+
+    def draw(self, direction):
+        self.angle = (self.angle + direction*self.step) % (2*np.pi)
+        self.update()
+        # psychopy copies the arrays when they are set and updates the vertices at the next draw
+        # (about half of a tick with 5000 dots, see the docstring)
+        self.stim.xys = self.xys
+        self.stim.sizes = self.sizes
+        self.stim.colors = self.colors
+        self.stim.draw()
+
+
+class SmoothFrame():
+    """
+    Entry of the unique stimulus list for one frame of a rotation in the smooth rendering mode.
+    Every frame of a sequence draws the next tick of the sphere in the direction of the sequence,
+    the frame number itself only tells which sphere and direction is shown.
+    """
+
+    def __init__(self, sphere, direction):
+        self.sphere = sphere
+        self.direction = direction
+
+    def draw(self):
+        self.sphere.draw(self.direction)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 10:39:51
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import numpy as np
+
+
+class SphereGenerator():
+    """
+    Computes the rotating dot sphere in numpy instead of loading the bmps from the MATLAB code.
+
+    The dots are spread uniformly over the surface of a sphere that rotates around the vertical
+    axis and are projected orthographically. Half of the dots are black, half are white.
+    For the ambiguous sphere all dots have the same size and contrast, so there is no depth
+    information. For the unambiguous (control) sphere the contrast goes linearly from the 'at back'
+    to the 'at front' values and the dot size from dot_size_range[0] to dot_size_range[1].
+    Positions and sizes are given relative to the stimulus width (the image is 1x1, centre 0).
+    """
+
+    def __init__(self, nr_of_dots, seed, dot_size, contrasts=(0, 1, 0, 1), dot_size_range=None, radius=0.45):
+
+        # contrasts: black at back, white at back, black at front, white at front
+        self.nr_of_dots = nr_of_dots
+        self.dot_size = dot_size
+        self.contrasts = contrasts
+        self.dot_size_range = dot_size_range
+        self.radius = radius
+
+        # the sphere number is used as seed, so that every sphere number is a different (but fixed) sphere
+        rng = np.random.default_rng(seed)
+        height = rng.uniform(-1, 1, nr_of_dots)
+        azimuth = rng.uniform(0, 2*np.pi, nr_of_dots)
+        ring = np.sqrt(1 - height**2)
+        self.points = np.stack([ring*np.cos(azimuth), height, ring*np.sin(azimuth)], axis=1)
+        self.white = np.arange(nr_of_dots) % 2 == 1
+
+    @staticmethod
+    def frame_angles(nr_of_frames):
+        """ Rotation angles of one full turn, frame 0 is the starting position """
+        return 2*np.pi*np.arange(nr_of_frames)/nr_of_frames
+
+    def project(self, angles):
+        """
+        Returns x, y and depth (-1 back, 1 front) of all dots for every angle (angles x dots).
+        Positive angles move the front of the sphere to the right.
+        """
+        angles = np.asarray(angles, dtype=float)[:, None]
+        x0, y0, z0 = self.points.T
+        cos, sin = np.cos(angles), np.sin(angles)
+        x = self.radius*(x0*cos + z0*sin)
+        y = np.broadcast_to(self.radius*y0, x.shape)
+        depth = z0*cos - x0*sin
+        return x, y, depth
+
+    def dot_attributes(self, depth):
+        """ Luminance (0-1) and diameter of the dots for the given depth values """
+        black_back, white_back, black_front, white_front = self.contrasts
+        front = (depth + 1)/2
+        luminance = np.where(self.white, white_back + (white_front-white_back)*front, black_back + (black_front-black_back)*front)
+        if self.dot_size_range is None:
+            size = np.full(depth.shape, self.dot_size)
+        else:
+            size = self.dot_size_range[0] + (self.dot_size_range[1]-self.dot_size_range[0])*front
+        return luminance, size
+
+    def elements(self, nr_of_frames):
+        """
+        Positions (frames x dots x 2), sizes and luminances of all dots for all frames, sorted from
+        back to front within every frame, e.g. to be passed on to an ElementArrayStim
+        """
+        x, y, depth = self.project(self.frame_angles(nr_of_frames))
+        # the colour belongs to the dot, so the attributes are computed before sorting
+        luminance, size = self.dot_attributes(depth)
+        order = np.argsort(depth, axis=1)
+        x, y, size, luminance = [np.take_along_axis(values, order, axis=1) for values in (x, y, size, luminance)]
+        return np.stack([x, y], axis=2), size, luminance
+
+    def render(self, nr_of_frames, resolution, background=0.5):
+        """ Renders all frames into a uint8 stack (frames x resolution x resolution) """
+        xys, sizes, luminances = self.elements(nr_of_frames)
+        frames = np.full((nr_of_frames, resolution, resolution), np.round(background*255), dtype=np.uint8)
+
+        # pixel offsets of a square patch around every dot that fits the biggest dot
+        max_radius = int(np.ceil(sizes.max()*resolution/2))
+        offsets = np.arange(-max_radius, max_radius+1)
+        offset_y, offset_x = [o.ravel() for o in np.meshgrid(offsets, offsets, indexing='ij')]
+
+        for frame, xy, size, luminance in zip(frames, xys, sizes, luminances):
+            # dot centres in pixels (the image y axis points down)
+            centre_x = np.round((xy[:, 0] + 0.5)*resolution).astype(int)
+            centre_y = np.round((0.5 - xy[:, 1])*resolution).astype(int)
+            pixel_x = centre_x[:, None] + offset_x
+            pixel_y = centre_y[:, None] + offset_y
+            inside = (offset_x**2 + offset_y**2)[None, :] <= (size[:, None]*resolution/2)**2
+            inside &= (pixel_x >= 0) & (pixel_x < resolution) & (pixel_y >= 0) & (pixel_y < resolution)
+            values = np.broadcast_to(np.round(luminance*255).astype(np.uint8)[:, None], inside.shape)
+            # the dots are sorted from back to front, the later (front) writes cover the earlier ones
+            frame[pixel_y[inside], pixel_x[inside]] = values[inside]
+        return frames
+
+
+def spheres_from_settings(stimulus_settings):
+    """ The ambiguous and the unambiguous sphere with the parameters from the Stimulus settings """
+    ambiguous = SphereGenerator(stimulus_settings['Number dots'], stimulus_settings['Sphere number ambiguous'], stimulus_settings['Dot size'],
+                                contrasts=(stimulus_settings['Black at front'], stimulus_settings['White at front'])*2)
+    unambiguous = SphereGenerator(stimulus_settings['Number dots'], stimulus_settings['Sphere number unambiguous'], stimulus_settings['Dot size'],
+                                  contrasts=(stimulus_settings['Black at back'], stimulus_settings['White at back'],
+                                             stimulus_settings['Black at front'], stimulus_settings['White at front']),
+                                  dot_size_range=(stimulus_settings['Dot size min'], stimulus_settings['Dot size max']))
+    return ambiguous, unambiguous
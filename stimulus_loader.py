@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 10:38:01
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import os
+import re
+import json
+import time
+import hashlib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+opj = os.path.join
+
+
+def decode_image(path):
+    """ Decodes one image file into a uint8 array (height x width (x channels)) """
+    with Image.open(path) as image:
+        if image.mode not in ['L', 'RGB', 'RGBA']:
+            image = image.convert('RGB')
+        return np.asarray(image)
+
+
+def decode_images(paths, n_workers=8):
+    """ Decodes a list of image files in a thread pool and stacks them into one array """
+    with ThreadPoolExecutor(max_workers=n_workers) as pool:
+        frames = list(pool.map(decode_image, paths))
+    return np.stack(frames)
+
+
+def cache_key(name, params, paths):
+    """
+    Hash over the stimulus parameters (the ones that are encoded in the filenames) and the
+    path, inode, size, modification and change time of every file. The key only uses this
+    metadata, not the contents (that would mean reading all files again on every cache hit).
+    So it changes if a bmp is regenerated or restored with the old modification time (the change
+    time is always set by the file system), but also if the unchanged files are copied, checked
+    out again or touched. The frames are then decoded again and the old cache file is replaced.
+    """
+    key = hashlib.sha1()
+    key.update(name.encode())
+    key.update(json.dumps(params, sort_keys=True, default=str).encode())
+    for path in paths:
+        stat = os.stat(path)
+        key.update(f'{os.path.abspath(path)}:{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}:{stat.st_ctime_ns};'.encode())
+    return key.hexdigest()[:16]
+
+
+class FrameLoader():
+    """
+    Loads image sequences (e.g. the 190 frames of a sphere rotation) into one numpy array.
+
+    The images are decoded in parallel. If a cache directory is given, every decoded
+    sequence is stored there as a single .npy file. Later sessions with the same stimulus
+    parameters memory-map that file instead of decoding the images again.
+    The time spent in every loading step is summed up in load_times.
+    """
+
+    def __init__(self, cache_dir=None, n_workers=8):
+
+        self.cache_dir = cache_dir
+        self.n_workers = n_workers
+        self.load_times = {'decode': 0.0, 'cache hit': 0.0, 'texture creation': 0.0}
+
+        if self.cache_dir and not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    def load(self, name, paths, params):
+        """ Returns the frames of the files in paths, stacked along the first axis """
+
+        if not self.cache_dir:
+            start = time.perf_counter()
+            frames = decode_images(paths, self.n_workers)
+            self.load_times['decode'] += time.perf_counter() - start
+            return frames
+
+        start = time.perf_counter()
+        cache_file = opj(self.cache_dir, f'{name}_{cache_key(name, params, paths)}.npy')
+        if os.path.exists(cache_file):
+            frames = np.load(cache_file, mmap_mode='r')
+            self.load_times['cache hit'] += time.perf_counter() - start
+            return frames
+
+        frames = decode_images(paths, self.n_workers)
+        # write to a temporary file first, so that an aborted session does not leave a broken cache
+        tmp_file = cache_file[:-4] + '.tmp.npy'
+        np.save(tmp_file, frames)
+        os.replace(tmp_file, cache_file)
+        self.remove_stale(name, cache_file)
+        self.load_times['decode'] += time.perf_counter() - start
+        return frames
+
+    def remove_stale(self, name, cache_file):
+        """ Deletes the older cache files of the sequence, there is only one per sequence name """
+        stale = re.compile(re.escape(name) + r'_[0-9a-f]{16}\.npy$')
+        for filename in os.listdir(self.cache_dir):
+            path = opj(self.cache_dir, filename)
+            if stale.match(filename) and path != cache_file:
+                try:
+                    os.remove(path)
+                except OSError:
+                    # e.g. still memory mapped on windows, it is removed next time
+                    pass
+
+    def timed(self, step, function, *args):
+        """ Calls function and adds its duration to the given loading step """
+        start = time.perf_counter()
+        result = function(*args)
+        self.load_times[step] = self.load_times.get(step, 0.0) + time.perf_counter() - start
+        return result
+
+    def timed_texture_creation(self, create, frames):
+        """ Calls create (e.g. the ImageStim construction) for every frame and times it """
+        return self.timed('texture creation', lambda: [create(frame) for frame in frames])
+
+    def report(self):
+        print('stimulus loading times: ' + ', '.join(f'{step} {duration:.2f}s' for step, duration in self.load_times.items()))
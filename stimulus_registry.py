@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 10:36:13
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import numpy as np
+
+
+class StimulusRegistry():
+    """
+    Maps the stimulus names of a look-up list to their index in the unique stimulus list.
+
+    The look-up list itself stays a plain list (the order defines the indices), but
+    names are resolved with a dictionary instead of scanning the list. Frame sequences
+    (e.g. 'ambiguous_0' ... 'ambiguous_189') are stored as contiguous ranges, so that
+    all indices of a block can be computed with one vectorized call. Only cyclic sequences
+    (the sphere rotations) wrap around, e.g. a fading sequence ends with its last image.
+    """
+
+    def __init__(self, lookup_list):
+
+        self.lookup_list = lookup_list
+        self.name_to_index = {name: index for index, name in enumerate(lookup_list)}
+        self.sequences = {}
+
+        if len(self.name_to_index) != len(lookup_list):
+            raise ValueError('The look-up list contains duplicate stimulus names!')
+
+    def __len__(self):
+        return len(self.lookup_list)
+
+    def __contains__(self, name):
+        return name in self.name_to_index
+
+    def index(self, name):
+        """ Returns the index of a single stimulus name (same as lookup_list.index) """
+        try:
+            return self.name_to_index[name]
+        except KeyError:
+            raise ValueError(f'{name} is not in the stimulus look-up list') from None
+
+    def indices(self, names):
+        """ Returns the indices of a list of stimulus names as an int array """
+        return np.fromiter((self.index(name) for name in names), dtype=np.int32, count=len(names))
+
+    def register_sequence(self, prefix, length, cyclic=False):
+        """
+        Registers the frames '<prefix>_0' ... '<prefix>_<length-1>' as one sequence.
+        The frames have to be stored next to each other in the look-up list.
+        """
+        start = self.index(f'{prefix}_0')
+        stop = start + length
+        expected = [f'{prefix}_{i}' for i in range(length)]
+        if self.lookup_list[start:stop] != expected:
+            raise ValueError(f'The frames of the sequence {prefix} are not stored contiguously!')
+        self.sequences[prefix] = (start, length, cyclic)
+
+    def sequence_length(self, prefix):
+        return self.sequences[prefix][1]
+
+    def frames(self, prefix, frame_indices):
+        """
+        Resolves a whole array of frame numbers of a registered sequence in one call.
+        In a cyclic sequence the frame numbers are wrapped around the sequence length, so that
+        running phase counters can be passed in directly. Other sequences raise an IndexError
+        for frame numbers outside of the sequence.
+        """
+        start, length, cyclic = self.sequences[prefix]
+        frame_indices = np.asarray(frame_indices)
+        if cyclic:
+            frame_indices = np.mod(frame_indices, length)
+        elif frame_indices.size and (frame_indices.min() < 0 or frame_indices.max() >= length):
+            raise IndexError(f'Frame {frame_indices.max() if frame_indices.max() >= length else frame_indices.min()} '
+                             f'is not in the sequence {prefix} ({length} frames)')
+        return (start + frame_indices).astype(np.int32)
@@ -10,6 +10,11 @@ from psychopy import visual
 import numpy as np
 import os
 import re
+from PIL import Image
+from stimulus_registry import StimulusRegistry
+from texture_residency import TextureResidency
+from stimulus_store import StimulusStore, aliases
+from fading_blend import BlendFrame, blend_weights
 opj = os.path.join
 
 
@@ -23,7 +28,7 @@ class BRStimulus():
     Every trial begins with a short fixation period
     """
 
-    def __init__(self, settings, win, button_instructions, *args, **kwargs):
+    def __init__(self, settings, win, button_instructions, visual_module=visual, *args, **kwargs):
         
         # setting for loading the correct stimulus
         self.settings = settings
@@ -31,15 +36,23 @@ class BRStimulus():
         self.stim_size = self.settings['Stimulus settings']['Stimulus size']
         self.nr_fading_stimuli = self.settings['Stimulus settings']['Nr fading stimuli']
         self.transition_length = self.settings['Stimulus settings']['Transition length']
+        self.fading_mode = self.settings['Stimulus settings']['Fading mode']
+        self.blend_curve = self.settings['Stimulus settings']['Blend curve']
         self.break_stim_name = self.settings['Stimulus settings']['Break stimulus name']
         self.fixation_stim_name = self.settings['Stimulus settings']['Fixation stimulus name']
         self.screentick_conversion = self.settings['Task settings']['Screentick conversion']
         self.monitor_refreshrate = self.settings['Task settings']['Monitor refreshrate']
         self.screenticks_per_frame = int(self.monitor_refreshrate/self.screentick_conversion)
+        self.texture_residency = self.settings['Stimulus settings']['Texture residency']
+        self.resident_textures = self.settings['Stimulus settings']['Resident textures']
+        self.prefetch_phases = self.settings['Stimulus settings']['Prefetch phases']
+        self.residency = None
         self.win = win
+        self.visual = visual_module
         self.button_instructions = button_instructions
         self.unique_stimulus_list = self.load_stimuli()
         self.lookup_list = self.create_lookup_list()
+        self.registry = self.create_registry()
 
 
 
@@ -52,15 +65,18 @@ class BRStimulus():
         The color of the stimulus can either be red or blue. This alternates among blocks.
         """
 
+        # every image file is decoded once, the sequences that show the same file share its stimulus
+        self.store = StimulusStore(self.create_image_stim)
+
         # simple, unambiguous non-fading stimuli 
-        self.house_red = visual.ImageStim(self.win, image=self.path_to_stim+'house_red.bmp', units='deg', size=self.stim_size)
-        self.house_blue = visual.ImageStim(self.win, image=self.path_to_stim+'house_blue.bmp', units='deg', size=self.stim_size)
-        self.face_red = visual.ImageStim(self.win, image=self.path_to_stim+'face_red.bmp', units='deg', size=self.stim_size)
-        self.face_blue = visual.ImageStim(self.win, image=self.path_to_stim+'face_blue.bmp', units='deg', size=self.stim_size)
+        self.house_red = self.store.image_stim(self.path_to_stim+'house_red.bmp')
+        self.house_blue = self.store.image_stim(self.path_to_stim+'house_blue.bmp')
+        self.face_red = self.store.image_stim(self.path_to_stim+'face_red.bmp')
+        self.face_blue = self.store.image_stim(self.path_to_stim+'face_blue.bmp')
         # ambiguous stimuli
-        self.rivalry_redface = visual.ImageStim(self.win, image=self.path_to_stim+'rivalry_redface.bmp', units='deg', size=self.stim_size)
-        self.rivalry_redhouse = visual.ImageStim(self.win, image=self.path_to_stim+'rivalry_redhouse.bmp', units='deg', size=self.stim_size)
-        self.fixation_screen = visual.ImageStim(self.win, image=self.path_to_stim+'fixation_screen.bmp', units='deg', size=self.stim_size)
+        self.rivalry_redface = self.store.image_stim(self.path_to_stim+'rivalry_redface.bmp')
+        self.rivalry_redhouse = self.store.image_stim(self.path_to_stim+'rivalry_redhouse.bmp')
+        self.fixation_screen = self.store.image_stim(self.path_to_stim+'fixation_screen.bmp')
         # fading stimuli
         self.fading_bluehouse_2_redface = []
         self.fading_redhouse_2_blueface = []
@@ -68,23 +84,45 @@ class BRStimulus():
         self.fading_blueface_2_redhouse = []
         # for the break 
         text = self.button_instructions
-        self.break_stim = visual.TextStim(self.win, text=text)
+        self.break_stim = self.visual.TextStim(self.win, text=text)
         
         fading_step = 0
         self.images_per_combi = int(self.transition_length)
         transition_step = int(self.nr_fading_stimuli/self.images_per_combi)
+        hb2fr_files = []
+        hr2fb_files = []
         for i in range(self.images_per_combi):
-            self.fading_bluehouse_2_redface.append(visual.ImageStim(self.win, image=self.path_to_stim+f'fading/fading_hb2fr_{fading_step}.bmp', units='deg', size=self.stim_size))
-            self.fading_redhouse_2_blueface.append(visual.ImageStim(self.win, image=self.path_to_stim+f'fading/fading_hr2fb_{self.nr_fading_stimuli-1-fading_step}.bmp', units='deg', size=self.stim_size))
-            self.fading_redface_2_bluehouse.append(visual.ImageStim(self.win, image=self.path_to_stim+f'fading/fading_hb2fr_{self.nr_fading_stimuli-1-fading_step}.bmp', units='deg', size=self.stim_size))
-            self.fading_blueface_2_redhouse.append(visual.ImageStim(self.win, image=self.path_to_stim+f'fading/fading_hr2fb_{fading_step}.bmp', units='deg', size=self.stim_size))
+            hb2fr_files.append(self.path_to_stim+f'fading/fading_hb2fr_{fading_step}.bmp')
+            hr2fb_files.append(self.path_to_stim+f'fading/fading_hr2fb_{fading_step}.bmp')
             fading_step += transition_step
+        # the reversed sequences show the same files in reverse order, so every file is loaded once
+        fading_files = [hb2fr_files, hr2fb_files[::-1], hb2fr_files[::-1], hr2fb_files]
+
+        fading_lists = [self.fading_bluehouse_2_redface, self.fading_redhouse_2_blueface, self.fading_redface_2_bluehouse, self.fading_blueface_2_redhouse]
+        if self.fading_mode == 'blend':
+            # the transitions are blended from the plain images while drawing, no fading files are loaded
+            weights = blend_weights(self.images_per_combi, self.blend_curve)
+            endpoints = [(self.house_blue, self.face_red), (self.house_red, self.face_blue), (self.face_red, self.house_blue), (self.face_blue, self.house_red)]
+            for fading_list, (start, end) in zip(fading_lists, endpoints):
+                fading_list.extend(BlendFrame(start, end, weight) for weight in weights)
+        elif self.texture_residency:
+            # only the fading images of the next phases are loaded, the keys are the indices in the 
+            # unique stimulus list (the fading stimuli come after the 8 stimuli below), the same file is only resident once
+            all_fading_files = sum(fading_files, [])
+            self.residency = TextureResidency(lambda key: np.asarray(Image.open(all_fading_files[key-8]).convert('RGB')), self.create_image_stim,
+                                              self.resident_textures, self.prefetch_phases, aliases=aliases(all_fading_files, 8))
+            for i, fading_list in enumerate(fading_lists):
+                fading_list.extend(self.residency.stims(range(8+i*self.images_per_combi, 8+(i+1)*self.images_per_combi)))
+        else:
+            for fading_list, files in zip(fading_lists, fading_files):
+                fading_list.extend(self.store.image_stims(files))
+        self.store.report()
 
         # load a stimulus that can test the eye tracking data 
-        dots = [visual.Circle(self.win, lineColor='red', units='pix', size=70, pos=[-250,-250]),
-                visual.Circle(self.win, lineColor='red', units='pix', size=70, pos=[250,-250]),
-                visual.Circle(self.win, lineColor='red', units='pix', size=70, pos=[250,250]),
-                visual.Circle(self.win, lineColor='red', units='pix', size=70, pos=[-250,250])]
+        dots = [self.visual.Circle(self.win, lineColor='red', units='pix', size=70, pos=[-250,-250]),
+                self.visual.Circle(self.win, lineColor='red', units='pix', size=70, pos=[250,-250]),
+                self.visual.Circle(self.win, lineColor='red', units='pix', size=70, pos=[250,250]),
+                self.visual.Circle(self.win, lineColor='red', units='pix', size=70, pos=[-250,250])]
 
         self.eye_tracking_test = dots
 
@@ -92,6 +130,9 @@ class BRStimulus():
         unique_stimulus_list = unique_stimulus_list + self.fading_bluehouse_2_redface + self.fading_redhouse_2_blueface + self.fading_redface_2_bluehouse + self.fading_blueface_2_redhouse + self.eye_tracking_test 
         return unique_stimulus_list
 
+    def create_image_stim(self, image):
+        return self.visual.ImageStim(self.win, image=Image.fromarray(image), units='deg', size=self.stim_size)
+
     def create_lookup_list(self):
         # normal stimuli 0-4
         # rivalry stimuli 5-7
@@ -117,6 +158,13 @@ class BRStimulus():
         
         return lookup_list
 
+    def create_registry(self):
+        # name to index mapping, the fading transitions are registered as sequences
+        registry = StimulusRegistry(self.lookup_list)
+        for fading_color in ['hb2fr', 'hr2fb', 'fr2hb', 'fb2hr']:
+            registry.register_sequence(fading_color, self.images_per_combi)
+        return registry
+
     
 
 
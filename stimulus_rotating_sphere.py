@@ -7,9 +7,16 @@
 '''
 
 from psychopy import visual
+from PIL import Image
 import numpy as np
 import os
 import re
+from stimulus_registry import StimulusRegistry
+from stimulus_loader import FrameLoader
+from texture_atlas import TextureAtlas, AtlasFrame
+from texture_residency import TextureResidency
+from sphere_generator import spheres_from_settings
+from smooth_sphere import SmoothSphere, SmoothFrame
 opj = os.path.join
 
 
@@ -25,7 +32,7 @@ class RSStimulus():
     This safes us if-statements in the refresh loop
     """
 
-    def __init__(self, settings, win, button_instructions, *args, **kwargs):
+    def __init__(self, settings, win, button_instructions, visual_module=visual, *args, **kwargs):
         
         # setting for loading the correct stimulus
         self.settings = settings
@@ -46,10 +53,24 @@ class RSStimulus():
         self.white_at_front = self.settings['Stimulus settings']['White at front'] 
         self.dot_size_min = self.settings['Stimulus settings']['Dot size min'] 
         self.dot_size_max = self.settings['Stimulus settings']['Dot size max'] 
+        self.stimulus_cache = self.settings['Stimulus settings']['Stimulus cache']
+        self.loader_workers = self.settings['Stimulus settings']['Loader workers']
+        self.stimulus_source = self.settings['Stimulus settings']['Stimulus source']
+        self.background_luminance = self.settings['Stimulus settings']['Background luminance']
+        self.rendering_mode = self.settings['Stimulus settings']['Rendering mode']
+        self.rotation_speed = self.settings['Stimulus settings']['Rotation speed']
+        self.atlas_frame_size = self.settings['Stimulus settings']['Atlas frame size']
+        self.atlas_max_texture_size = self.settings['Stimulus settings']['Atlas max texture size']
+        self.texture_residency = self.settings['Stimulus settings']['Texture residency']
+        self.resident_textures = self.settings['Stimulus settings']['Resident textures']
+        self.prefetch_phases = self.settings['Stimulus settings']['Prefetch phases']
+        self.residency = None
         self.win = win
+        self.visual = visual_module
         self.button_instructions = button_instructions
         self.unique_stimulus_list = self.load_stimuli()
         self.lookup_list = self.create_lookup_list()
+        self.registry = self.create_registry()
 
         print('check if stimulus list and look-up list have the same length')
         print(len(self.unique_stimulus_list)==len(self.lookup_list))
@@ -61,40 +82,117 @@ class RSStimulus():
         """
 
         # here we load the images that were produced in the MATLAB code 
-        self.fixation_dot = visual.ImageStim(self.win, image=self.path_to_stim+'FixDot.bmp',  units='deg', size=self.stim_size)
-
-        # save the globe stimuli in different lists, since one rotation consists out of 190 images
-        self.ambiguous_stim_list = []
-        self.unambiguous_stim_list_right = []
-        self.unambiguous_stim_list_left = []
-
-        # we have a certain number of frames that make up one rotation of the sphere
-        for i in range(self.nr_of_frames):
-            filename_amb = f'Amb_{self.stimulus_resolution}x{self.stimulus_resolution}-{self.nr_of_frames}frames-{self.nr_of_dots}dots(size={self.dot_size})_{self.sphere_number_ambiguous}.{i+1}.bmp'
-            filename_unamb_right = f'Contr_Unamb_{self.black_at_back}BB_{self.white_at_back}WB_{self.black_at_front}BF_{self.white_at_front}WF_{self.dot_size_min}-{self.dot_size_max}DS_{self.stimulus_resolution}x{self.stimulus_resolution}-{self.nr_of_frames}frames-{self.nr_of_dots}dots(size={self.dot_size})_{self.sphere_number_unambiguous}.{i+1}.bmp'
-            filename_unamb_left = f'Contr_Unamb_{self.black_at_back}BB_{self.white_at_back}WB_{self.black_at_front}BF_{self.white_at_front}WF_{self.dot_size_min}-{self.dot_size_max}DS_{self.stimulus_resolution}x{self.stimulus_resolution}-{self.nr_of_frames}frames-{self.nr_of_dots}dots(size={self.dot_size})_{self.sphere_number_unambiguous}.{self.nr_of_frames-i}.bmp'
-            
-            self.ambiguous_stim_list.append(visual.ImageStim(self.win, image=self.path_to_stim+filename_amb, units='deg', size=self.stim_size))
-            self.unambiguous_stim_list_right.append(visual.ImageStim(self.win, image=self.path_to_stim+filename_unamb_right, units='deg', size=self.stim_size))
+        self.fixation_dot = self.visual.ImageStim(self.win, image=self.path_to_stim+'FixDot.bmp',  units='deg', size=self.stim_size)
+
+        loader = FrameLoader(self.stimulus_cache, self.loader_workers)
+        if self.rendering_mode == 'smooth':
+            # the dots are computed on every screen tick, no frames are loaded or rendered
+            pass
+        elif self.stimulus_source == 'procedural':
+            # compute the frames in memory with the same parameters that are encoded in the bmp filenames
+            ambiguous_sphere, unambiguous_sphere = spheres_from_settings(self.settings['Stimulus settings'])
+            ambiguous_frames = loader.timed('generate', ambiguous_sphere.render, self.nr_of_frames, self.stimulus_resolution, self.background_luminance)
+            unambiguous_frames = loader.timed('generate', unambiguous_sphere.render, self.nr_of_frames, self.stimulus_resolution, self.background_luminance)
+        else:
+            # the frames of both spheres are decoded in parallel (or read from the cache)
+            ambiguous_files = [self.path_to_stim+self.ambiguous_filename(i+1) for i in range(self.nr_of_frames)]
+            unambiguous_files = [self.path_to_stim+self.unambiguous_filename(i+1) for i in range(self.nr_of_frames)]
+            ambiguous_frames = loader.load('ambiguous', ambiguous_files, self.filename_parameters())
+            unambiguous_frames = loader.load('unambiguous', unambiguous_files, self.filename_parameters())
+
+        if self.rendering_mode == 'smooth':
+            self.create_smooth_spheres()
+        elif self.rendering_mode == 'atlas':
+            # one texture per sphere, the frames are selected by moving the texture coordinates
+            self.ambiguous_atlas = loader.timed('texture creation', TextureAtlas, self.win, ambiguous_frames, self.stim_size, self.atlas_max_texture_size, self.atlas_frame_size, self.visual)
+            self.unambiguous_atlas = loader.timed('texture creation', TextureAtlas, self.win, unambiguous_frames, self.stim_size, self.atlas_max_texture_size, self.atlas_frame_size, self.visual)
+            self.ambiguous_stim_list = [AtlasFrame(self.ambiguous_atlas, i) for i in range(self.nr_of_frames)]
+            self.unambiguous_stim_list_right = [AtlasFrame(self.unambiguous_atlas, i) for i in range(self.nr_of_frames)]
+            self.unambiguous_stim_list_left = [AtlasFrame(self.unambiguous_atlas, self.nr_of_frames-1-i) for i in range(self.nr_of_frames)]
+        elif self.texture_residency:
+            # only the textures of the next phases exist, the frames are read from the (memory mapped) cache or array when needed
+            frame_sources = [(ambiguous_frames, i) for i in range(self.nr_of_frames)]
+            frame_sources += [(unambiguous_frames, self.nr_of_frames-1-i) for i in range(self.nr_of_frames)]
+            frame_sources += [(unambiguous_frames, i) for i in range(self.nr_of_frames)]
+            self.residency = TextureResidency(lambda key: np.array(frame_sources[key][0][frame_sources[key][1]]), self.create_image_stim,
+                                              self.resident_textures, self.prefetch_phases)
+            # the keys are the indices in the unique stimulus list (ambiguous, left, right come first)
+            resident_stims = self.residency.stims(range(3*self.nr_of_frames))
+            self.ambiguous_stim_list = resident_stims[:self.nr_of_frames]
+            self.unambiguous_stim_list_left = resident_stims[self.nr_of_frames:2*self.nr_of_frames]
+            self.unambiguous_stim_list_right = resident_stims[2*self.nr_of_frames:]
+        else:
+            # save the globe stimuli in different lists, since one rotation consists out of 190 images
+            self.ambiguous_stim_list = loader.timed_texture_creation(self.create_image_stim, ambiguous_frames)
+            self.unambiguous_stim_list_right = loader.timed_texture_creation(self.create_image_stim, unambiguous_frames)
             # create the left rotation list separately since it takes longer if we do the indices counting backwards later on!
-            self.unambiguous_stim_list_left.append(visual.ImageStim(self.win, image=self.path_to_stim+filename_unamb_left, units='deg', size=self.stim_size))
+            self.unambiguous_stim_list_left = loader.timed_texture_creation(self.create_image_stim, unambiguous_frames[::-1])
+        loader.report()
+        self.load_times = loader.load_times
 
         # load a stimulus that can test the eye tracking data 
-        dots = [visual.Circle(self.win, lineColor='red', units='pix', size=70, pos=[-250,-250]),
-                visual.Circle(self.win, lineColor='red', units='pix', size=70, pos=[250,-250]),
-                visual.Circle(self.win, lineColor='red', units='pix', size=70, pos=[250,250]),
-                visual.Circle(self.win, lineColor='red', units='pix', size=70, pos=[-250,250])]
+        dots = [self.visual.Circle(self.win, lineColor='red', units='pix', size=70, pos=[-250,-250]),
+                self.visual.Circle(self.win, lineColor='red', units='pix', size=70, pos=[250,-250]),
+                self.visual.Circle(self.win, lineColor='red', units='pix', size=70, pos=[250,250]),
+                self.visual.Circle(self.win, lineColor='red', units='pix', size=70, pos=[-250,250])]
 
         self.eye_tracking_test = dots
 
         # for the break 
         text = self.button_instructions
-        self.break_stim = visual.TextStim(self.win, text=text)
+        self.break_stim = self.visual.TextStim(self.win, text=text)
         
         unique_stimulus_list = self.ambiguous_stim_list + self.unambiguous_stim_list_left + self.unambiguous_stim_list_right + [self.break_stim] + [self.fixation_dot] + self.eye_tracking_test
         return unique_stimulus_list
 
 
+    def create_smooth_spheres(self):
+        """
+        One ElementArrayStim per sphere (with the dots of the procedural sphere) that moves on every screen tick.
+        The frames of a sequence only choose the sphere and the direction: right and ambiguous turn right, left turns left.
+        """
+        refreshrate = self.settings['Task settings']['Monitor refreshrate']
+        if self.rotation_speed is None:
+            # the speed of the rendered frames (one frame every screenticks per frame)
+            screenticks_per_frame = int(refreshrate/self.settings['Task settings']['Screentick conversion'])
+            self.rotation_speed = 360/self.nr_of_frames*refreshrate/screenticks_per_frame
+        degrees_per_tick = self.rotation_speed/refreshrate
+        print(f'smooth rotation with {self.rotation_speed:.2f} deg/s ({degrees_per_tick:.3f} deg per screen tick)')
+
+        ambiguous_sphere, unambiguous_sphere = spheres_from_settings(self.settings['Stimulus settings'])
+        self.ambiguous_sphere = SmoothSphere(self.win, ambiguous_sphere, self.nr_of_frames, self.stim_size, degrees_per_tick, self.visual)
+        self.unambiguous_sphere = SmoothSphere(self.win, unambiguous_sphere, self.nr_of_frames, self.stim_size, degrees_per_tick, self.visual)
+        self.ambiguous_stim_list = [SmoothFrame(self.ambiguous_sphere, 1)]*self.nr_of_frames
+        self.unambiguous_stim_list_left = [SmoothFrame(self.unambiguous_sphere, -1)]*self.nr_of_frames
+        self.unambiguous_stim_list_right = [SmoothFrame(self.unambiguous_sphere, 1)]*self.nr_of_frames
+
+
+    def ambiguous_filename(self, frame):
+        return f'Amb_{self.stimulus_resolution}x{self.stimulus_resolution}-{self.nr_of_frames}frames-{self.nr_of_dots}dots(size={self.dot_size})_{self.sphere_number_ambiguous}.{frame}.bmp'
+
+
+    def unambiguous_filename(self, frame):
+        return f'Contr_Unamb_{self.black_at_back}BB_{self.white_at_back}WB_{self.black_at_front}BF_{self.white_at_front}WF_{self.dot_size_min}-{self.dot_size_max}DS_{self.stimulus_resolution}x{self.stimulus_resolution}-{self.nr_of_frames}frames-{self.nr_of_dots}dots(size={self.dot_size})_{self.sphere_number_unambiguous}.{frame}.bmp'
+
+
+    def filename_parameters(self):
+        """ The stimulus settings that are encoded in the filenames (used as cache key) """
+        return {'path': self.path_to_stim,
+                'resolution': self.stimulus_resolution,
+                'frames': self.nr_of_frames,
+                'dots': self.nr_of_dots,
+                'dot size': self.dot_size,
+                'sphere ambiguous': self.sphere_number_ambiguous,
+                'sphere unambiguous': self.sphere_number_unambiguous,
+                'contrasts': [self.black_at_back, self.white_at_back, self.black_at_front, self.white_at_front],
+                'dot size range': [self.dot_size_min, self.dot_size_max]}
+
+
+    def create_image_stim(self, frame):
+        """ Uploads one decoded frame as texture """
+        return self.visual.ImageStim(self.win, image=Image.fromarray(np.ascontiguousarray(frame)), units='deg', size=self.stim_size)
+
+
     def create_lookup_list(self):
         """ 
         Creating a look-up list that matches exactly the stimulus list created 
@@ -119,6 +217,17 @@ class RSStimulus():
         lookup_list = ambiguous_names + unambiguous_left_names + unambiguous_right_names + [self.break_stim_name] + [self.fixation_stim_name] + self.eyetracking_test_names
         return lookup_list
 
+
+    def create_registry(self):
+        """ 
+        Name to index mapping of the look-up list. The three rotations are registered as 
+        cyclic sequences, so that the frame indices of a whole block can be resolved at once
+        """
+        registry = StimulusRegistry(self.lookup_list)
+        for prefix in ['ambiguous', 'unambiguous_left', 'unambiguous_right']:
+            registry.register_sequence(prefix, self.nr_of_frames, cyclic=True)
+        return registry
+
     
 
 
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:15:51
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import numpy as np
+from PIL import Image
+
+
+class StimulusStore():
+    """
+    Image stimuli by filename: every file is decoded once, the sequences that show the same file
+    (e.g. a fading sequence and its reverse) share one stimulus (and texture). The stimulus lists
+    still have one entry per name, some entries are the same object.
+    create makes the stimulus from the decoded pixels (height x width x 3, uint8).
+    """
+
+    def __init__(self, create):
+        self.create = create
+        # filename -> stimulus
+        self.stims = {}
+        self.n_requests = 0
+
+    @staticmethod
+    def decode(filename):
+        with Image.open(filename) as image:
+            return np.asarray(image.convert('RGB'))
+
+    def image_stim(self, filename):
+        """ The stimulus of the file, created the first time the file is asked for """
+        self.n_requests += 1
+        stim = self.stims.get(filename)
+        if stim is None:
+            stim = self.stims[filename] = self.create(self.decode(filename))
+        return stim
+
+    def image_stims(self, filenames):
+        return [self.image_stim(filename) for filename in filenames]
+
+    def report(self):
+        print(f'stimulus store: {self.n_requests} image stimuli from {len(self.stims)} files (textures)')
+
+
+def aliases(filenames, first_key=0):
+    """
+    Maps the key of every file (first_key + position in filenames) to the key of the first entry
+    with the same path, for stimuli that are loaded later (the texture residency) and can therefore
+    not be compared by content at startup
+    """
+    first = {}
+    mapping = {}
+    for key, filename in enumerate(filenames, first_key):
+        mapping[key] = first.setdefault(filename, key)
+    return mapping
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 12:17:41
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import os
+import shutil
+import numpy as np
+from analysis import analyse_directory, run_analysis
+
+fixture = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'sub-1_ses-1_Logs_RS')
+
+
+def test_blocks_of_a_session():
+    summary = analyse_directory(fixture).set_index('block_type')
+    ambiguous = summary.loc['ambiguous']
+    # 1, 1, 2, 1 (the pause, the key pressed during it and the break button are no percepts)
+    assert ambiguous['n_responses'] == 4
+    assert ambiguous['n_switches'] == 3
+    assert ambiguous['switch_rate'] == 3/20*60
+    assert ambiguous['percept_mean'] == 5.0
+    assert ambiguous['percept_median'] == 6.0
+    assert np.isclose(ambiguous['key_duration_mean'], 0.25)
+
+    unambiguous = summary.loc['unambiguous']
+    assert unambiguous['n_stimulus_switches'] == 2
+    assert unambiguous['n_detected'] == 2
+    assert np.isclose(unambiguous['latency_mean'], 0.75)
+
+
+def test_summary_of_all_sessions(tmp_path):
+    shutil.copytree(fixture, tmp_path / os.path.basename(fixture))
+    summary = run_analysis(str(tmp_path), str(tmp_path / 'summary.tsv'), n_workers=1)
+    assert summary['block_type'].tolist() == ['ambiguous', 'unambiguous']
+    assert (summary['subject'] == 'sub-1').all()
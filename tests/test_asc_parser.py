@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 12:18:47
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import numpy as np
+import pytest
+from asc_parser import AscParser
+from tracker_queue import TrackerMessageQueue
+
+
+def sample(t, x, y=384.0, pupil=1000.0):
+    values = ['.' if np.isnan(v) else f'{v:.1f}' for v in (x, y, pupil)]
+    return f'{t}\t  ' + '\t  '.join(values) + '\t...\n'
+
+
+def write_asc(filename, messages):
+    """
+    Monocular 1000 Hz recording from 990 to 1299 ms. The gaze moves right with 500 px/s in the first
+    phase and left in the second, the third phase has 10 missing samples. messages maps the time
+    the message arrives to its text (MSG lines come after the sample of the same time).
+    """
+    lines = ['** CONVERTED FROM test.edf\n', 'START\t990 \tLEFT\tSAMPLES\tEVENTS\n']
+    x = 500.0
+    for t in range(990, 1300):
+        if t < 1100:
+            x += 0.5
+        elif t < 1200:
+            x -= 0.5
+        lines.append(sample(t, np.nan if 1250 <= t < 1260 else x))
+        if t in messages:
+            lines.append(f'MSG\t{t} {messages[t]}\n')
+    lines.append('END\t1299 \tSAMPLES\tEVENTS\tRES\t 38.00\t 38.00\n')
+    with open(filename, 'w') as f:
+        f.writelines(lines)
+
+
+# the second phase message waited 7 ms in the tracker queue
+messages = {1000: 'start_type-stim_trial-1_phase-0',
+            1107: '7 start_type-stim_trial-1_phase-1',
+            1150: 'start_type-ambiguous_trial-1_phase-1_key-1_time-1.15_duration-0.2',
+            1200: 'start_type-stim_trial-2_phase-0'}
+
+
+@pytest.mark.parametrize('chunk_lines', [1, 7, 53, 100000])
+def test_phases(tmp_path, chunk_lines):
+    write_asc(tmp_path / 'test.asc', messages)
+    phases, keys = AscParser(chunk_lines, max_offset=20).parse(tmp_path / 'test.asc')
+    assert phases['time'].tolist() == [1000, 1100, 1200]
+    assert phases['trial_index'].tolist() == [0, 0, 1]
+    # every sample from the (corrected) start of its phase on, also across the chunk boundaries
+    assert phases['n_samples'].tolist() == [100, 100, 100]
+    assert np.allclose(phases['missing'], [0, 0, 0.1])
+    assert phases['okn_direction'].tolist() == [1, -1, 0]
+    assert np.allclose(phases['slow_velocity'][:2], [500, -500])
+    assert np.allclose(phases['x'][:2], [500 + 0.5*np.arange(11, 111).mean(), 555 - 0.5*np.arange(1, 101).mean()])
+    assert keys[['time', 'key', 'rt', 'key_duration']].values.tolist() == [[1150, '1', 1.15, 0.2]]
+
+
+class AscTracker():
+    """ Fake EyeLink that writes the messages with the time they arrive, like the asc export """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.lines = {}
+
+    def sendMessage(self, msg):
+        self.lines[int(round(self.clock()*1000))] = msg
+
+
+class FakeClock():
+
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        return self.time
+
+
+def test_queue_offset_is_subtracted_once(tmp_path):
+    clock = FakeClock()
+    tracker = AscTracker(clock)
+    tracker_queue = TrackerMessageQueue(tracker, clock=clock)
+    # the messages are queued at 1.000 s and 1.100 s, the link sends them 4 ms later
+    with tracker_queue.lock:
+        clock.time = 1.0
+        tracker_queue.send('start_type-stim_trial-1_phase-0')
+        clock.time = 1.1
+        tracker_queue.send('start_type-stim_trial-1_phase-1')
+        clock.time = 1.104
+    tracker_queue.close()
+    assert list(tracker.lines) == [1104]
+    write_asc(tmp_path / 'test.asc', {1000: 'start_type-stim_trial-0_phase-0', 1104: tracker.lines[1104]})
+    phases, _ = AscParser(chunk_lines=50).parse(tmp_path / 'test.asc')
+    assert phases['time'].tolist() == [1000, 1100]
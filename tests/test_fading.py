@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 12:04:41
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import os
+import io
+import contextlib
+import numpy as np
+import pytest
+pytest.importorskip('psychopy')
+pytest.importorskip('exptools2')
+from PIL import Image
+from headless import HeadlessSession
+
+repository = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+fadings = ['hb2fr', 'fr2hb', 'hr2fb', 'fb2hr']
+
+
+def load_session(directory, **stimulus_settings):
+    """ A BR session with plain noise images (no fading bmps) """
+    path = os.path.join(directory, 'BR') + '/'
+    os.makedirs(path + 'fading')
+    rng = np.random.default_rng(0)
+    for name in ['house_red', 'house_blue', 'face_red', 'face_blue', 'rivalry_redface', 'rivalry_redhouse', 'fixation_screen']:
+        Image.fromarray(rng.integers(0, 256, (20, 20, 3), dtype=np.uint8)).save(path + name + '.bmp')
+    overrides = {'Task settings': {'Random seed': 1},
+                 'Stimulus settings': {'Stimulus path': path, 'Texture residency': False, **stimulus_settings}}
+    with contextlib.redirect_stdout(io.StringIO()):
+        return HeadlessSession('sub-1_ses-1', os.path.join(directory, 'output'), os.path.join(repository, 'settings_BR.yml'), 1, 'BR',
+                               eyetracker_on=False, settings_overrides=overrides)
+
+
+def test_blend_without_fading_stimuli(tmp_path):
+    # the blend mode does not use Nr fading stimuli, the transitions are there with 0 as well
+    session = load_session(tmp_path, **{'Fading mode': 'blend', 'Nr fading stimuli': 0})
+    transitions = [trial for trial in session.trial_list if trial.parameters['color_comb'] in fadings]
+    assert len(transitions) > 0
+    assert all(len(trial.schedule.durations) == session.nr_transition_phases for trial in transitions)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:59:25
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import os
+import io
+import contextlib
+import yaml
+import numpy as np
+import pytest
+pytest.importorskip('psychopy')
+pytest.importorskip('exptools2')
+from headless import HeadlessSession
+
+repository = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_session(directory, keys, **task_settings):
+    """ A short RS session with a small procedural sphere, run with the scripted key presses """
+    with open(os.path.join(repository, 'settings_RS.yml')) as f:
+        settings = yaml.safe_load(f)
+    overrides = {'Task settings': {'Blocks': 2, 'Random seed': 1, 'Stimulus duration ambiguous': 20, **task_settings},
+                 'Stimulus settings': {'Stimulus source': 'procedural', 'Stimulus cache': False, 'Stimulus resolution': 100}}
+    with contextlib.redirect_stdout(io.StringIO()):
+        session = HeadlessSession('sub-1_ses-1', str(directory), os.path.join(repository, 'settings_RS.yml'), 1, 'RS', keys=keys,
+                                  settings_overrides=overrides)
+        session.run()
+    return session
+
+
+def responses(session):
+    log = session.global_log
+    return log[log['response'].notna()].reset_index(drop=True)
+
+
+def test_responses_are_logged_on_press(tmp_path):
+    # the ambiguous block starts after the 5 s fixation
+    session = run_session(tmp_path, [(8.0, '1', 0.3), (9.0, '2', 0.005), (10.0, '1', 6.0)])
+    logged = responses(session)
+    assert logged['onset'].tolist() == [8.0, 9.0, 10.0]
+    # the durations are filled in when the keys go up
+    assert np.allclose(logged['key_duration'], [0.3, 0.005, 6.0])
+    # the eyetracker message is sent when the key goes down, the duration is not known yet
+    messages = [msg for _, msg in session.tracker.messages if '_key-' in msg]
+    assert messages[0].endswith('_key-1_time-8.0_duration-None')
+
+
+def test_pause_and_resume(tmp_path):
+    keys = [(8.0, '1', 0.3), (9.0, 'p', 0.1), (10.0, '2', 0.2), (11.0, 'p', 0.1), (12.0, '1', 0.2)]
+    session = run_session(tmp_path, keys)
+    logged = responses(session)
+    assert logged['event_type'].tolist() == ['ambiguous', 'pause', 'paused_response', 'ambiguous']
+    assert logged['onset'].tolist() == [8.0, 9.0, 10.0, 12.0]
+    assert np.allclose(logged['key_duration'], [0.3, 2.0, 0.2, 0.2])
+    assert session.state.running
+    # the pause is added to the session timer, the trials keep their durations
+    assert abs(session.virtual_time.now() - (session.planned_duration() + 2.0)) < 0.05
+
+
+def test_quit_during_a_pause(tmp_path):
+    session = run_session(tmp_path, [(9.0, 'p', 0.1), (9.5, '2', 0.1), (10.0, 'q', 0.1)])
+    assert session.state.aborting
+    logged = responses(session)
+    assert logged['event_type'].tolist() == ['pause', 'paused_response']
+    assert np.allclose(logged['key_duration'], [1.0, 0.1])
+    # the session ends with the trial that was paused, the logs are saved
+    assert session.virtual_time.now() < 10.1
+    assert os.path.exists(os.path.join(tmp_path, 'sub-1_ses-1_events.tsv'))
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:59:25
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import types
+from input_thread import InputThread
+
+
+class Key():
+
+    def __init__(self, name, rt):
+        self.name = name
+        self.rt = rt
+        self.duration = None
+
+
+class Keyboard():
+    """ psychopy Keyboard with timestamped presses, the keys are pressed and released by the test """
+
+    def __init__(self):
+        self.clock = types.SimpleNamespace(getTime=lambda: 0.0)
+        self.keys = []
+
+    def press(self, name, rt):
+        self.keys.append(Key(name, rt))
+
+    def release(self, name, duration):
+        [key for key in self.keys if key.name == name and key.duration is None][0].duration = duration
+
+    def getKeys(self, waitRelease=True, clear=True):
+        keys = [key for key in self.keys if key.duration is not None or not waitRelease]
+        if clear:
+            self.keys = [key for key in self.keys if key not in keys]
+        return keys
+
+
+def test_down_on_press_and_up_on_release():
+    keyboard = Keyboard()
+    input_thread = InputThread(keyboard, threaded=False)
+    keyboard.press('1', 1.25)
+    events = input_thread.events()
+    assert [(event.kind, event.name, event.rt) for event in events] == [('down', '1', 1.25)]
+    assert events[0].duration is None
+    # nothing new while the key is held
+    assert input_thread.events() == []
+    keyboard.release('1', 0.4)
+    assert [(event.kind, event.name, event.rt, event.duration) for event in input_thread.events()] == [('up', '1', 1.25, 0.4)]
+    input_thread.close()
+
+
+def test_press_and_release_between_two_polls():
+    keyboard = Keyboard()
+    input_thread = InputThread(keyboard, threaded=False)
+    keyboard.press('2', 3.0)
+    keyboard.release('2', 0.005)
+    keyboard.press('2', 3.1)
+    events = [(event.kind, event.rt, event.duration) for event in input_thread.events()]
+    assert events == [('down', 3.0, None), ('up', 3.0, 0.005), ('down', 3.1, None)]
+    input_thread.close()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:57:18
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import time
+import numpy as np
+import pytest
+from percept_durations import PerceptDurations, cut_to_total
+
+# one hour at 30 stimulus frames per second
+hour = 3600*30
+
+
+@pytest.mark.parametrize('distribution', PerceptDurations.distributions)
+def test_one_hour_block_in_milliseconds(distribution):
+    durations = PerceptDurations(distribution, 3*30, 15, minimum=20)
+    rng = np.random.default_rng(0)
+    times = []
+    for _ in range(5):
+        start = time.perf_counter()
+        block = durations.block(rng, hour)
+        times.append(time.perf_counter() - start)
+        assert block.sum() == hour
+        assert block.min() >= 20
+    # the best of five, a busy test machine should not fail it
+    assert min(times) < 0.01
+
+
+@pytest.mark.parametrize('distribution', PerceptDurations.distributions)
+def test_fitted_to_samples(distribution):
+    samples = np.random.default_rng(1).gamma(4, 25, 500)
+    block = PerceptDurations(distribution, 0, samples=samples, minimum=5).block(np.random.default_rng(0), hour)
+    assert block.sum() == hour
+    assert abs(block.mean() - samples.mean()) < 0.1*samples.mean()
+
+
+def test_cut_to_total():
+    assert cut_to_total(np.array([10, 10, 10]), 25).tolist() == [10, 10, 5]
+    assert cut_to_total(np.array([10, 10, 10]), 20).tolist() == [10, 10]
+    # a rest shorter than the minimum goes to the last percept
+    assert cut_to_total(np.array([10, 10, 10]), 22, minimum=5).tolist() == [10, 12]
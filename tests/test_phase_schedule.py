@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 12:05:36
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+from phase_schedule import PhaseSchedule
+
+
+def test_scalar_stimulus_repeated():
+    schedule = PhaseSchedule(3, 5, 'frames', 4)
+    assert schedule.durations.tolist() == [3, 3, 3, 3]
+    assert schedule.stimulus_indices.tolist() == [5, 5, 5, 5]
+
+
+def test_negative_number_of_phases():
+    # a percept shorter than the transition leaves nothing before the fading
+    schedule = PhaseSchedule(3, 5, 'frames', -5)
+    assert len(schedule) == 0
+    assert schedule.durations.tolist() == []
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:56:15
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import numpy as np
+import pytest
+from rotation_phase import RotationPhase
+
+
+def random_block(rng):
+    """ Random number of frames per turn, start position, percept durations and directions """
+    nr_of_frames = int(rng.choice([3, 7, 190]))
+    n_percepts = int(rng.integers(1, 40))
+    n_frames = rng.integers(1, 3*nr_of_frames, n_percepts)
+    if rng.random() < 0.5:
+        # the unambiguous blocks alternate, the first direction depends on the trial number
+        directions = np.where(np.arange(n_percepts) % 2 == int(rng.integers(2)), 1, -1)
+    else:
+        directions = rng.choice([-1, 1], n_percepts)
+    return RotationPhase(nr_of_frames, int(rng.integers(nr_of_frames))), n_frames, directions
+
+
+def steps(positions, start, nr_of_frames):
+    """ Movement from frame to frame (from the start position to the first frame as well), wrapped to -1, 0, +1 """
+    moves = np.diff(np.concatenate([[start], positions]))
+    return (moves + 1) % nr_of_frames - 1
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_continuous_at_every_switch(seed):
+    rotation, n_frames, directions = random_block(np.random.default_rng(seed))
+    start = rotation.position
+    positions = rotation.positions(n_frames, directions)
+    assert len(positions) == n_frames.sum()
+    assert ((positions >= 0) & (positions < rotation.nr_of_frames)).all()
+    # every frame (including the first one after a switch) is one position away from the frame before
+    # and moves in the direction of its percept, so the direction flips exactly at the switches
+    moves = steps(positions, start, rotation.nr_of_frames)
+    assert (moves == np.repeat(directions, n_frames)).all()
+    first_frames = np.cumsum(n_frames)[:-1]
+    switches = first_frames[directions[1:] != directions[:-1]]
+    assert (moves[switches] == -moves[switches-1]).all()
+    assert rotation.position == positions[-1]
+    assert rotation.position == (start + (n_frames*directions).sum()) % rotation.nr_of_frames
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_block_frames(seed):
+    rotation, n_frames, directions = random_block(np.random.default_rng(seed))
+    nr_of_frames = rotation.nr_of_frames
+    expected = RotationPhase(nr_of_frames, rotation.position).positions(n_frames, directions)
+    frames = rotation.block(n_frames, directions)
+    assert [len(f) for f in frames] == n_frames.tolist()
+    # the left sequence is the right one in reverse, back to the positions of the sphere
+    positions = np.concatenate([f if direction > 0 else nr_of_frames - 1 - f for f, direction in zip(frames, directions)])
+    assert (positions == expected).all()
+    for f in frames:
+        # within a percept the frame number of its sequence goes up by one (wrapping after a full turn)
+        assert (np.diff(f) % nr_of_frames == 1).all()
+
+
+def test_next_block_continues():
+    rng = np.random.default_rng(0)
+    rotation = RotationPhase(190)
+    first = rotation.positions(rng.integers(1, 200, 9), np.where(np.arange(9) % 2 == 0, 1, -1))
+    second = rotation.positions(rng.integers(1, 200, 9), np.where(np.arange(9) % 2 == 0, 1, -1))
+    assert (second[0] - first[-1]) % 190 == 1
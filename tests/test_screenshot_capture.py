@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 12:15:44
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import types
+import numpy as np
+from PIL import Image
+from screenshot_capture import ScreenshotCapture
+
+
+class FakeGLCapture(ScreenshotCapture):
+    """ The pixel buffers are numpy arrays, a read copies the frame that is on the screen """
+
+    def __init__(self, *args, **kwargs):
+        self.screen = None
+        self.mapped = []
+        super().__init__(*args, **kwargs)
+
+    def create_pbos(self, n_pbos):
+        return [np.zeros_like(self.buffers[0]) for _ in range(n_pbos)]
+
+    def start_read(self, pbo):
+        pbo[:] = self.screen
+
+    def copy_pbo(self, pbo, buffer):
+        self.mapped.append(self.flip)
+        buffer[:] = pbo
+
+    def delete_pbos(self):
+        pass
+
+
+def run(capture, n_flips, requests):
+    """ Flips frames whose pixels are the frame number, requests maps flip -> (name, n_frames) """
+    for flip in range(n_flips):
+        capture.flip = flip
+        capture.screen = np.full_like(capture.buffers[0], flip)
+        capture.on_flip()
+        if flip in requests:
+            capture.request(*requests[flip])
+    capture.close()
+
+
+def test_mapped_after_the_read_lag(tmp_path):
+    capture = FakeGLCapture(types.SimpleNamespace(size=(8, 6)), str(tmp_path), n_buffers=4, n_pbos=3, read_lag=2)
+    run(capture, 10, {2: ('shot', 3)})
+    # read on flips 3, 4 and 5, mapped two flips later
+    assert capture.mapped == [5, 6, 7]
+    for i, flip in enumerate([3, 4, 5]):
+        assert (np.asarray(Image.open(tmp_path / f'shot_{i:03d}.png')) == flip).all()
+    assert capture.n_saved == 3
+    assert capture.n_skipped == 0
+
+
+def test_skipped_when_all_pixel_buffers_are_in_use(tmp_path):
+    # the third frame of the burst would need a third pixel buffer, the reads left are mapped by close
+    capture = FakeGLCapture(types.SimpleNamespace(size=(8, 6)), str(tmp_path), n_buffers=8, n_pbos=2, read_lag=3)
+    run(capture, 5, {0: ('burst', 3)})
+    assert capture.n_skipped == 1
+    assert capture.n_saved == 2
+    assert capture.mapped == [4, 4]
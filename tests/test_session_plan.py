@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:56:52
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import os
+import yaml
+import pytest
+pytest.importorskip('psychopy')
+pytest.importorskip('exptools2')
+from session_plan import compile_plan, SessionPlan
+from headless import HeadlessSession
+
+repository = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_settings(directory, **task_settings):
+    """ settings_RS.yml with a small procedural sphere (no bmps needed) """
+    with open(os.path.join(repository, 'settings_RS.yml')) as f:
+        settings = yaml.safe_load(f)
+    settings['Stimulus settings'].update({'Stimulus source': 'procedural', 'Stimulus cache': False, 'Stimulus resolution': 100})
+    settings['Task settings'].update(task_settings)
+    filename = os.path.join(directory, 'settings_RS.yml')
+    with open(filename, 'w') as f:
+        yaml.safe_dump(settings, f)
+    return filename
+
+
+def load_session(directory, settings_file, plan_file):
+    return HeadlessSession('sub-1_ses-1', os.path.join(directory, 'output'), settings_file, 1, 'RS', eyetracker_on=False, plan_file=plan_file)
+
+
+def test_unchanged_settings(tmp_path, capsys):
+    settings_file = write_settings(tmp_path, **{'Event stream': True, 'Frame timing': True})
+    plan_file = compile_plan('sub-1', 'ses-1', 'RS', settings_file=settings_file, directory=tmp_path)
+    capsys.readouterr()
+    session = load_session(tmp_path, settings_file, plan_file)
+    assert 'the settings changed' not in capsys.readouterr().out
+    plan = SessionPlan.load(plan_file)
+    assert len(session.trial_list) == len(plan)
+    assert session.seed == plan.meta['seed']
+
+
+def test_changed_settings(tmp_path):
+    settings_file = write_settings(tmp_path)
+    plan_file = compile_plan('sub-1', 'ses-1', 'RS', settings_file=settings_file, directory=tmp_path)
+    settings_file = write_settings(tmp_path, **{'Blocks': 4})
+    with open(settings_file) as f:
+        assert not SessionPlan.load(plan_file).fits(yaml.safe_load(f))
+    with pytest.raises(ValueError, match='settings changed'):
+        load_session(tmp_path, settings_file, plan_file)
+
+
+def test_changed_timing_mode(tmp_path):
+    # both seconds modes give exptools2 seconds, the durations are not the same
+    settings_file = write_settings(tmp_path, **{'Timing mode': 'frame-locked seconds'})
+    plan_file = compile_plan('sub-1', 'ses-1', 'RS', settings_file=settings_file, directory=tmp_path)
+    settings_file = write_settings(tmp_path, **{'Timing mode': 'seconds'})
+    with pytest.raises(ValueError, match='frame-locked seconds timing'):
+        load_session(tmp_path, settings_file, plan_file)
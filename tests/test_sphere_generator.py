@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:28:33
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import os
+import sys
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sphere_generator import SphereGenerator, spheres_from_settings
+
+# the stimulus settings of settings_RS.yml at a lower resolution, frames of the stored file
+stimulus_settings = {'Number dots': 350, 'Sphere number ambiguous': 1, 'Sphere number unambiguous': 5, 'Dot size': 0.02,
+                     'Black at back': 0.25, 'White at back': 0.75, 'Black at front': 0, 'White at front': 1,
+                     'Dot size min': 0.012, 'Dot size max': 0.028}
+nr_of_frames = 190
+resolution = 120
+background = 0.73
+stored_frames = [0, 1, 47, 95]
+reference_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'sphere_frames.npz')
+
+
+def render():
+    ambiguous, unambiguous = spheres_from_settings(stimulus_settings)
+    return {'ambiguous': ambiguous.render(nr_of_frames, resolution, background)[stored_frames],
+            'unambiguous': unambiguous.render(nr_of_frames, resolution, background)[stored_frames]}
+
+
+def test_stored_frames():
+    reference = np.load(reference_file)
+    for name, frames in render().items():
+        assert frames.shape == reference[name].shape
+        difference = np.abs(frames.astype(np.int16) - reference[name])
+        # a dot edge can round to the neighbouring pixel on another platform
+        assert (difference > 1).mean() < 0.002, name
+        assert np.abs(frames.mean() - reference[name].mean()) < 0.1, name
+
+
+def test_dot_attributes_follow_the_dots():
+    sphere = SphereGenerator(200, 5, 0.02, contrasts=(0.25, 0.75, 0, 1), dot_size_range=(0.012, 0.028))
+    xys, sizes, luminances = sphere.elements(nr_of_frames)
+    x, y, depth = sphere.project(sphere.frame_angles(nr_of_frames))
+    luminance, size = sphere.dot_attributes(depth)
+    order = np.argsort(depth, axis=1)
+    assert np.allclose(xys[:, :, 0], np.take_along_axis(x, order, axis=1))
+    assert np.allclose(luminances, np.take_along_axis(luminance, order, axis=1))
+    assert np.allclose(sizes, np.take_along_axis(size, order, axis=1))
+    # back to front, black and white dots keep their colour in every frame
+    assert (np.diff(np.take_along_axis(depth, order, axis=1), axis=1) >= 0).all()
+    assert ((luminances < 0.5).sum(axis=1) == 100).all()
+
+
+def test_one_rotation():
+    sphere = SphereGenerator(50, 1, 0.02)
+    x, y, depth = sphere.project(sphere.frame_angles(nr_of_frames) + 2*np.pi)
+    x0, y0, depth0 = sphere.project(sphere.frame_angles(nr_of_frames))
+    assert np.allclose(x, x0) and np.allclose(depth, depth0)
+    # positive angles move the front dots to the right
+    x1, _, depth1 = sphere.project([0.01])
+    front = depth0[0] > 0.5
+    assert (x1[0][front] > x0[0][front]).all()
+
+
+if __name__ == '__main__':
+    # python tests/test_sphere_generator.py writes the stored frames again (after an intended change of the sphere)
+    np.savez_compressed(reference_file, **render())
+    print('written', reference_file)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:27:05
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import os
+import time
+import shutil
+import numpy as np
+from PIL import Image
+from stimulus_loader import FrameLoader
+
+
+def write_frames(directory, values):
+    paths = []
+    for i, value in enumerate(values):
+        paths.append(os.path.join(directory, f'frame.{i+1}.bmp'))
+        Image.fromarray(np.full((8, 8), value, dtype=np.uint8)).save(paths[-1])
+    return paths
+
+
+def test_cache_hit(tmp_path):
+    paths = write_frames(tmp_path, [10, 20, 30])
+    loader = FrameLoader(str(tmp_path / 'cache'), 2)
+    frames = loader.load('ambiguous', paths, {'frames': 3})
+    assert frames[:, 0, 0].tolist() == [10, 20, 30]
+    assert len(os.listdir(tmp_path / 'cache')) == 1
+    cached = loader.load('ambiguous', paths, {'frames': 3})
+    assert isinstance(cached, np.memmap)
+    assert (np.asarray(cached) == frames).all()
+
+
+def test_restored_files_with_the_old_modification_time(tmp_path):
+    paths = write_frames(tmp_path, [10, 20, 30])
+    loader = FrameLoader(str(tmp_path / 'cache'), 2)
+    loader.load('ambiguous', paths, {'frames': 3})
+
+    # a stimulus set of the same size, restored with the modification times of the old files
+    os.makedirs(tmp_path / 'backup')
+    backup = write_frames(tmp_path / 'backup', [40, 50, 60])
+    for old, new in zip(paths, backup):
+        stat = os.stat(old)
+        os.utime(new, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    time.sleep(0.01)
+    for old, new in zip(paths, backup):
+        shutil.copy2(new, old)
+    assert [os.stat(path).st_mtime_ns for path in paths] == [os.stat(path).st_mtime_ns for path in backup]
+
+    frames = loader.load('ambiguous', paths, {'frames': 3})
+    assert frames[:, 0, 0].tolist() == [40, 50, 60]
+
+
+def test_copied_stimulus_set(tmp_path):
+    paths = write_frames(tmp_path, [10, 20, 30])
+    loader = FrameLoader(str(tmp_path / 'cache'), 2)
+    loader.load('ambiguous', paths, {'frames': 3})
+    shutil.copytree(tmp_path, tmp_path / 'copy', ignore=shutil.ignore_patterns('cache'))
+    copied = [os.path.join(tmp_path, 'copy', os.path.basename(path)) for path in paths]
+    loader.load('ambiguous', copied, {'frames': 3})
+    # the copy gets its own cache file, the one of the old files is deleted
+    assert len(os.listdir(tmp_path / 'cache')) == 1
+    frames = loader.load('ambiguous', copied, {'frames': 3})
+    assert isinstance(frames, np.memmap)
+
+
+def test_other_sequences_are_kept(tmp_path):
+    paths = write_frames(tmp_path, [10, 20, 30])
+    loader = FrameLoader(str(tmp_path / 'cache'), 2)
+    loader.load('unambiguous', paths[:2], {'frames': 2})
+    loader.load('ambiguous', paths, {'frames': 3})
+    loader.load('ambiguous', paths, {'frames': 4})
+    assert sorted(name[:-21] for name in os.listdir(tmp_path / 'cache')) == ['ambiguous', 'unambiguous']
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:26:41
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import numpy as np
+import pytest
+from stimulus_registry import StimulusRegistry
+
+
+def registry():
+    lookup_list = ['break'] + [f'ambiguous_{i}' for i in range(5)] + [f'hb2fr_{i}' for i in range(3)]
+    registry = StimulusRegistry(lookup_list)
+    registry.register_sequence('ambiguous', 5, cyclic=True)
+    registry.register_sequence('hb2fr', 3)
+    return registry
+
+
+def test_cyclic_sequence_wraps():
+    assert registry().frames('ambiguous', [3, 4, 5, 11, -1]).tolist() == [4, 5, 1, 2, 5]
+
+
+def test_sequence_frames():
+    assert registry().frames('hb2fr', np.arange(3)).tolist() == [6, 7, 8]
+
+
+@pytest.mark.parametrize('frames', [[0, 1, 2, 3], [-1]])
+def test_frames_outside_of_a_sequence(frames):
+    with pytest.raises(IndexError):
+        registry().frames('hb2fr', frames)
+
+
+def test_duplicate_names():
+    with pytest.raises(ValueError):
+        StimulusRegistry(['a', 'b', 'a'])
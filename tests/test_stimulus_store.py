@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 12:21:37
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import numpy as np
+from PIL import Image
+from stimulus_store import StimulusStore, aliases
+
+
+def test_every_file_is_decoded_once(tmp_path):
+    files = []
+    for step in range(3):
+        files.append(str(tmp_path / f'fading_hb2fr_{step}.bmp'))
+        Image.fromarray(np.full((4, 4, 3), step, dtype=np.uint8)).save(files[-1])
+    created = []
+    store = StimulusStore(lambda pixels: created.append(pixels) or len(created) - 1)
+    # a sequence and its reverse
+    forward = store.image_stims(files)
+    backward = store.image_stims(files[::-1])
+    assert forward == backward[::-1]
+    assert [pixels[0, 0, 0] for pixels in created] == [0, 1, 2]
+    assert store.n_requests == 6
+
+
+def test_aliases():
+    assert aliases(['a', 'b', 'b', 'a'], 8) == {8: 8, 9: 9, 10: 9, 11: 8}
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:28:01
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import types
+import numpy as np
+import pytest
+from texture_atlas import TextureAtlas, pack_atlas, atlas_columns, atlas_shape
+from sphere_generator import SphereGenerator
+
+
+class GratingStim():
+    """ Keeps the arguments, so the texture coordinates can be computed without a window """
+
+    def __init__(self, win, tex, sf, size, phase, **kwargs):
+        self.tex = np.asarray(tex)
+        self.sf = np.asarray(sf, dtype=float)
+        self.size = np.array([size, size], dtype=float)
+        self.phase = np.asarray(phase, dtype=float)
+
+    def draw(self):
+        pass
+
+
+def frames(n_frames, height, width):
+    # every frame is filled with its own number
+    return np.broadcast_to(np.arange(n_frames, dtype=np.uint8)[:, None, None], (n_frames, height, width)).copy()
+
+
+def test_atlas_size():
+    # 190 frames of 800x800: 10 columns give 8192x16384, the smallest power of two atlas
+    assert atlas_columns(190, 800, 800) == 10
+    assert atlas_shape(190, 800, 800, 10) == (16384, 8192)
+    for n_frames, size in [(190, 400), (190, 256), (7, 100), (1, 64)]:
+        columns = atlas_columns(n_frames, size, size)
+        height, width = atlas_shape(n_frames, size, size, columns)
+        assert height <= 16384 and width <= 16384
+        assert min(np.prod(atlas_shape(n_frames, size, size, c)) for c in range(1, min(n_frames, 16384//size)+1)
+                   if atlas_shape(n_frames, size, size, c)[0] <= 16384) == height*width
+
+
+def test_frames_do_not_fit():
+    with pytest.raises(ValueError):
+        # 3 columns of 300 pixels fit into 1024, 34 rows do not
+        pack_atlas(np.zeros((100, 300, 300), dtype=np.uint8), 1024)
+
+
+def test_pack_atlas():
+    atlas, grid = pack_atlas(frames(7, 30, 20), 256)
+    assert atlas.shape == atlas_shape(7, 30, 20, atlas_columns(7, 30, 20, 256))
+    for frame, (row, column) in enumerate(grid):
+        assert (atlas[row*30:(row+1)*30, column*20:(column+1)*20] == frame).all()
+
+
+@pytest.mark.parametrize('n_frames, height, width', [(190, 40, 40), (7, 30, 20), (1, 16, 16)])
+def test_texture_coordinates(n_frames, height, width):
+    visual_module = types.SimpleNamespace(GratingStim=GratingStim)
+    atlas = TextureAtlas(None, frames(n_frames, height, width), 5, 1024, visual_module=visual_module)
+    atlas_height, atlas_width = atlas.atlas.shape[:2]
+    cycles = atlas.stim.sf*atlas.stim.size
+    for cell in range(n_frames):
+        atlas.draw_cell(cell)
+        # psychopy: texture coordinates +-cycles/2 - phase + 0.5, t=0 is the bottom row of the image
+        left, right = 0.5 - atlas.stim.phase[0] + np.array([-1, 1])*cycles[0]/2
+        bottom, top = 0.5 - atlas.stim.phase[1] + np.array([-1, 1])*cycles[1]/2
+        x0, x1 = np.round(np.array([left, right])*atlas_width).astype(int)
+        y0, y1 = np.round((1 - np.array([top, bottom]))*atlas_height).astype(int)
+        assert (x1 - x0, y1 - y0) == (width, height)
+        assert (atlas.atlas[y0:y1, x0:x1] == cell).all()
+
+
+def render_cell(atlas, cell):
+    """
+    The stimulus as the GratingStim draws it (interpolate=False): every pixel takes the texel at
+    the texture coordinates of its centre
+    """
+    atlas.draw_cell(cell)
+    atlas_height, atlas_width = atlas.atlas.shape[:2]
+    cycles = atlas.stim.sf*atlas.stim.size
+    left = 0.5 - atlas.stim.phase[0] - cycles[0]/2
+    top = 0.5 - atlas.stim.phase[1] + cycles[1]/2
+    s = left + (np.arange(atlas.frame_width) + 0.5)/atlas.frame_width*cycles[0]
+    t = top - (np.arange(atlas.frame_height) + 0.5)/atlas.frame_height*cycles[1]
+    columns = np.floor(s*atlas_width).astype(int)
+    rows = np.floor((1 - t)*atlas_height).astype(int)
+    return atlas.atlas[rows[:, None], columns[None, :]]
+
+
+def test_rendered_frames():
+    # the frames of a procedural sphere, every frame drawn from the atlas has the pixels of the frame
+    sphere_frames = SphereGenerator(200, 1, 0.03).render(47, 60)
+    atlas = TextureAtlas(None, sphere_frames, 5, 1024, visual_module=types.SimpleNamespace(GratingStim=GratingStim))
+    for cell, frame in enumerate(sphere_frames):
+        assert (render_cell(atlas, cell) == frame).all()
+        assert (atlas.cell_image(cell) == frame).all()
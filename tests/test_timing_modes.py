@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:49:47
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import types
+import numpy as np
+from timing_modes import SecondsTiming, FrameLockedSecondsTiming
+
+refreshrate = 120
+
+
+class Screen():
+    """ Flips on the ticks of the refresh rate, each flip up to jitter ticks early or late """
+
+    def __init__(self, jitter=0, dropped_flips=(), seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.jitter = jitter
+        self.dropped_flips = set(dropped_flips)
+        self.n_flips = 0
+        self.ticks = 0
+        self.time = 0.0
+
+    def flip(self):
+        self.ticks += 2 if self.n_flips in self.dropped_flips else 1
+        self.n_flips += 1
+        self.time = (self.ticks + self.rng.uniform(-self.jitter, self.jitter))/refreshrate
+
+
+class Clock():
+    """ The parts of the psychopy clock that exptools2 and the timing modes use """
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.last_reset = screen.time
+
+    def getTime(self):
+        return self.screen.time - self.last_reset
+
+    def reset(self):
+        self.last_reset = self.screen.time
+
+    def add(self, t):
+        self.last_reset += t
+
+
+def run(timing, durations, screen, break_at=()):
+    """
+    The phase loop of the exptools2 seconds timing, returns the tick of every phase onset.
+    A phase in break_at ends after its first frame like with a break button (the timer is reset).
+    """
+    session = types.SimpleNamespace(timer=Clock(screen))
+    onsets = []
+    for phase, duration in enumerate(durations):
+        on_flip = True
+        session.timer.add(duration)
+        while session.timer.getTime() < 0:
+            screen.flip()
+            if on_flip:
+                onsets.append(screen.ticks)
+                timing.on_phase_start(session)
+                on_flip = False
+            if phase in break_at:
+                break
+        if phase in break_at:
+            session.timer.reset()
+    return np.array(onsets)
+
+
+def test_exact_flips():
+    durations = np.random.default_rng(1).integers(1, 30, 200)/refreshrate
+    planned = 1 + np.concatenate([[0], np.cumsum(durations[:-1]*refreshrate)]).round()
+    assert (run(FrameLockedSecondsTiming(refreshrate, 4), durations, Screen()) == planned).all()
+    # the phase ends fall right on the flips, in seconds timing the float errors add or skip frames
+    onsets = run(SecondsTiming(refreshrate, 4), durations, Screen())
+    assert len(onsets) != len(planned) or (onsets != planned).any()
+
+
+def test_flip_jitter_after_a_break_button():
+    durations = np.full(300, 4/refreshrate)
+    # phase 10 ends after one frame, the timer is reset on its flip
+    planned = 1 + 4*np.arange(300)
+    planned[11:] -= 3
+    for seed in range(5):
+        onsets = run(FrameLockedSecondsTiming(refreshrate, 4), durations, Screen(0.1, seed=seed), break_at=[10])
+        assert (onsets == planned).all()
+
+
+def test_dropped_flips_are_caught_up():
+    durations = np.full(100, 4/refreshrate)
+    planned = 1 + 4*np.arange(100)
+    onsets = run(FrameLockedSecondsTiming(refreshrate, 4), durations, Screen(0.1, dropped_flips=[20, 21, 50]))
+    # the phases with the dropped flips start late, the next ones are shorter until they are back on time
+    assert (onsets - planned).max() > 0
+    assert (onsets[15:] == planned[15:]).all()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 11:55:22
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import threading
+from tracker_queue import TrackerMessageQueue, QueuedTracker
+from asc_parser import msg_pattern
+
+
+class BlockedTracker():
+    """ Fake EyeLink, sendMessage waits until the link is opened """
+
+    def __init__(self):
+        self.link = threading.Event()
+        self.sending = threading.Event()
+        self.messages = []
+
+    def sendMessage(self, msg):
+        self.sending.set()
+        self.link.wait()
+        self.messages.append(msg)
+
+
+class FakeClock():
+
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        return self.time
+
+
+def test_offset_only_when_the_message_waited():
+    tracker = BlockedTracker()
+    clock = FakeClock()
+    tracker_queue = TrackerMessageQueue(tracker, clock=clock)
+    tracker_queue.send('start_type-stim_trial-1_phase-0')
+    tracker.link.set()
+    tracker_queue.flush()
+    tracker.link.clear()
+    tracker_queue.send('start_type-stim_trial-1_phase-1')
+    clock.time = 0.012
+    tracker.link.set()
+    tracker_queue.close()
+    assert tracker.messages == ['start_type-stim_trial-1_phase-0', '12 start_type-stim_trial-1_phase-1']
+    # the asc parser reads both forms
+    for msg, offset in zip(tracker.messages, [None, '12']):
+        match = msg_pattern.match(f'MSG\t1000 {msg}')
+        assert match['offset'] == offset
+        assert match['text'].startswith('start_type-stim_trial-1')
+
+
+def test_full_queue_keeps_the_order():
+    tracker = BlockedTracker()
+    tracker_queue = TrackerMessageQueue(tracker, maxsize=4, clock=FakeClock())
+    # one message is taken by the thread, four fill the queue, the last two do not fit
+    messages = [f'start_type-stim_trial-1_phase-{phase}' for phase in range(7)]
+    tracker_queue.send(messages[0])
+    tracker.sending.wait()
+    for msg in messages[1:]:
+        tracker_queue.send(msg)
+    tracker.link.set()
+    tracker_queue.close()
+    assert tracker_queue.n_dropped == 2
+    assert tracker.messages == messages[:5]
+
+
+class RecordingTracker():
+    """ Fake EyeLink that records every call with the thread it came from """
+
+    def __init__(self):
+        self.calls = []
+
+    def sendMessage(self, msg):
+        self.calls.append(('message', msg, threading.current_thread().name))
+
+    def sendCommand(self, cmd):
+        self.calls.append(('command', cmd, threading.current_thread().name))
+
+    def stopRecording(self):
+        self.calls.append(('stop', None, threading.current_thread().name))
+
+
+def test_one_thread_talks_to_the_tracker():
+    tracker = RecordingTracker()
+    tracker_queue = TrackerMessageQueue(tracker, clock=FakeClock())
+    queued = QueuedTracker(tracker_queue)
+    queued.sendCommand("record_status_message 'trial 1'")
+    queued.sendMessage('start_type-stim_trial-1_phase-0')
+    # the other calls wait for the queued messages
+    queued.stopRecording()
+    assert [call[:2] for call in tracker.calls] == [('command', "record_status_message 'trial 1'"),
+                                                   ('message', 'start_type-stim_trial-1_phase-0'), ('stop', None)]
+    assert [call[2] for call in tracker.calls[:2]] == ['tracker messages']*2
+    tracker_queue.close()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 10:39:01
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+from PIL import Image
+import numpy as np
+
+
+def next_power_of_two(value):
+    return 1 << int(np.ceil(np.log2(value)))
+
+
+def atlas_shape(n_frames, height, width, columns):
+    """ Height and width (powers of two) of the atlas with the frames in the given number of columns """
+    rows = int(np.ceil(n_frames/columns))
+    return next_power_of_two(rows*height), next_power_of_two(columns*width)
+
+
+def atlas_columns(n_frames, height, width, max_texture_size=16384):
+    """
+    The number of columns with the least padding (the smallest atlas) that fits into
+    max_texture_size, 0 if the frames do not fit at all
+    """
+    best_columns, best_size = 0, None
+    for columns in range(1, min(n_frames, max_texture_size // width) + 1):
+        atlas_height, atlas_width = atlas_shape(n_frames, height, width, columns)
+        if atlas_height <= max_texture_size and (best_size is None or atlas_height*atlas_width < best_size):
+            best_columns, best_size = columns, atlas_height*atlas_width
+    return best_columns
+
+
+def pack_atlas(frames, max_texture_size=16384):
+    """
+    Packs a stack of frames (n x height x width (x channels)) into one image with
+    the frames laid out row by row. The atlas is padded to powers of two, because
+    psychopy only accepts those for GratingStim textures.
+    Returns the atlas and the (row, column) grid position of every frame.
+    """
+    n_frames, height, width = frames.shape[:3]
+    columns = atlas_columns(n_frames, height, width, max_texture_size)
+    if columns == 0:
+        raise ValueError(f'{n_frames} frames of {width}x{height} do not fit into a {max_texture_size}x{max_texture_size} texture, '
+                         'reduce the Atlas frame size in the settings file!')
+    atlas_height, atlas_width = atlas_shape(n_frames, height, width, columns)
+
+    atlas = np.zeros((atlas_height, atlas_width) + frames.shape[3:], dtype=frames.dtype)
+    grid = np.stack(np.divmod(np.arange(n_frames), columns), axis=1)
+    for frame, (row, column) in zip(frames, grid):
+        atlas[row*height:(row+1)*height, column*width:(column+1)*width] = frame
+    return atlas, grid
+
+
+def resize_frames(frames, frame_size):
+    """ Scales all frames down to frame_size x frame_size pixels """
+    return np.stack([np.asarray(Image.fromarray(np.ascontiguousarray(frame)).resize((frame_size, frame_size), Image.BILINEAR)) for frame in frames])
+
+
+class TextureAtlas():
+    """
+    All frames of one sphere rotation in a single texture.
+
+    The atlas is drawn with a GratingStim: the spatial frequency is set so that exactly one
+    cell of the atlas covers the stimulus and the phase moves the texture coordinates to the
+    cell of the current frame. Changing the frame therefore only changes two numbers instead
+    of binding a different texture.
+    The atlas is padded to powers of two, so it can need more texture memory than the separate
+    frames (about 10% for 190 frames of 800x800), see padding.
+    """
+
+    def __init__(self, win, frames, stim_size, max_texture_size=16384, frame_size=None, visual_module=None):
+        if visual_module is None:
+            # only here, the packing and the texture coordinates can be tested without psychopy
+            from psychopy import visual as visual_module
+
+        if frame_size and frame_size != frames.shape[1]:
+            frames = resize_frames(frames, frame_size)
+
+        self.n_frames, self.frame_height, self.frame_width = frames.shape[:3]
+        self.atlas, self.grid = pack_atlas(frames, max_texture_size)
+        atlas_height, atlas_width = self.atlas.shape[:2]
+        # the padding to powers of two can make the atlas bigger than the separate frames
+        self.padding = atlas_height*atlas_width/(self.n_frames*self.frame_height*self.frame_width) - 1
+        print(f'texture atlas {atlas_width}x{atlas_height} for {self.n_frames} frames of {self.frame_width}x{self.frame_height} '
+              f'({self.padding:.0%} more pixels than the separate frames)')
+
+        # extent of one cell in texture coordinates (t=0 is the bottom of the image in OpenGL)
+        cell_width = self.frame_width/atlas_width
+        cell_height = self.frame_height/atlas_height
+        left = self.grid[:, 1]*cell_width
+        top = 1 - self.grid[:, 0]*cell_height
+        # psychopy computes the texture coordinates as +-cycles/2 - phase + 0.5
+        self.phases = np.stack([0.5 - (left + cell_width/2), 0.5 - (top - cell_height/2)], axis=1)
+
+        self.stim = visual_module.GratingStim(win, tex=Image.fromarray(self.atlas), mask=None, units='deg', size=stim_size,
+                                       sf=[cell_width/stim_size, cell_height/stim_size], phase=self.phases[0], interpolate=False)
+        self.current_cell = 0
+
+    def draw_cell(self, cell):
+        if cell != self.current_cell:
+            self.stim.phase = self.phases[cell]
+            self.current_cell = cell
+        self.stim.draw()
+
+    def cell_image(self, cell):
+        """ The pixels of one cell as they are stored in the atlas """
+        row, column = self.grid[cell]
+        return self.atlas[row*self.frame_height:(row+1)*self.frame_height, column*self.frame_width:(column+1)*self.frame_width]
+
+
+class AtlasFrame():
+    """
+    Entry of the unique stimulus list that draws one cell of an atlas, so that the
+    session can draw it like every other stimulus
+    """
+
+    def __init__(self, atlas, cell):
+        self.atlas = atlas
+        self.cell = cell
+
+    def draw(self):
+        self.atlas.draw_cell(self.cell)
+
+
+def compare_rendering(win, reference_stimuli, atlas_frames):
+    """
+    Draws every frame once with the per-ImageStim path and once from the atlas and
+    returns the largest absolute pixel difference of every frame.
+    The window can be invisible (e.g. on a headless machine with xvfb).
+    """
+    differences = []
+    for reference, atlas_frame in zip(reference_stimuli, atlas_frames):
+        rendered = []
+        for stim in [reference, atlas_frame]:
+            win.clearBuffer()
+            stim.draw()
+            rendered.append(np.asarray(win.getMovieFrame(buffer='back'), dtype=np.int16))
+            win.movieFrames = []
+        differences.append(np.abs(rendered[0] - rendered[1]).max())
+    win.clearBuffer()
+    return np.array(differences)
+
+
+if __name__ == '__main__':
+    # python texture_atlas.py settings_RS.yml
+    # renders every sphere frame in an invisible window with both rendering modes and compares them
+    import sys
+    import copy
+    import yaml
+    from psychopy import visual, monitors
+    from stimulus_rotating_sphere import RSStimulus
+
+    with open(sys.argv[1]) as f:
+        settings = yaml.safe_load(f)
+    monitor = monitors.Monitor('atlas_check', width=settings['monitor']['width'], distance=settings['monitor']['distance'])
+    monitor.setSizePix(settings['window']['size'])
+    win = visual.Window(size=settings['window']['size'], monitor=monitor, units='deg', color=settings['window']['color'],
+                        colorSpace=settings['window'].get('colorSpace', 'rgb'), fullscr=False, visible=False)
+
+    stimuli = {}
+    for mode in ['images', 'atlas']:
+        mode_settings = copy.deepcopy(settings)
+        mode_settings['Stimulus settings']['Rendering mode'] = mode
+        mode_settings['Stimulus settings']['Atlas frame size'] = None
+        stimuli[mode] = RSStimulus(mode_settings, win, '')
+
+    for sequence in ['ambiguous_stim_list', 'unambiguous_stim_list_left', 'unambiguous_stim_list_right']:
+        differences = compare_rendering(win, getattr(stimuli['images'], sequence), getattr(stimuli['atlas'], sequence))
+        print(f'{sequence}: largest pixel difference {differences.max()} (frames with differences: {np.count_nonzero(differences)})')
+    win.close()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 10:54:23
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ResidentStim():
+    """
+    Entry of the unique stimulus list whose stimulus (and texture) only exists while it is
+    resident, so that the session can draw it like every other stimulus
+    """
+
+    def __init__(self, residency, key):
+        self.residency = residency
+        self.key = key
+
+    def draw(self):
+        self.residency.get(self.key).draw()
+
+
+class TextureResidency():
+    """
+    Keeps only the stimuli of the next phases in memory instead of all frames.
+
+    update() is called when the phase changes, with the stimulus indices of the next phases.
+    The pixels of the ones that are not resident are decoded on a worker thread (decode), the
+    stimuli are created on the main thread (create), because the textures have to be made in
+    the OpenGL context of the window. Only creations_per_update stimuli are created per call,
+    so that the frame time stays short. The least recently drawn stimuli that are not needed
+    in the next phases are deleted when there are more than max_resident.
+    A stimulus that is drawn before it was prefetched is created right away (counted in n_misses).
+    aliases maps keys that show the same image to one key, so that the image is only resident once.
+    """
+
+    def __init__(self, decode, create, max_resident=64, prefetch=16, creations_per_update=2, n_workers=1, aliases=None):
+
+        self.decode = decode
+        self.create = create
+        self.max_resident = max(max_resident, prefetch+1)
+        self.prefetch = prefetch
+        self.aliases = aliases or {}
+        self.creations_per_update = creations_per_update
+        self.executor = ThreadPoolExecutor(n_workers, thread_name_prefix='texture prefetch')
+        # least recently drawn first
+        self.resident = collections.OrderedDict()
+        self.pending = {}
+        self.keys = set()
+        self.upcoming = ()
+        self.n_created = 0
+        self.n_misses = 0
+        self.n_evicted = 0
+
+    def stims(self, keys):
+        """ Stimulus list entries for the given keys (indices of the unique stimulus list) """
+        keys = [self.aliases.get(key, key) for key in keys]
+        self.keys.update(keys)
+        return [ResidentStim(self, key) for key in keys]
+
+    def get(self, key):
+        stim = self.resident.get(key)
+        if stim is None:
+            self.n_misses += 1
+            future = self.pending.pop(key, None)
+            stim = self.add(key, future.result() if future is not None else self.decode(key))
+        self.resident.move_to_end(key)
+        return stim
+
+    def add(self, key, pixels):
+        stim = self.create(pixels)
+        self.resident[key] = stim
+        self.n_created += 1
+        self.evict()
+        return stim
+
+    def update(self, upcoming):
+        """ upcoming are the stimulus indices of the next phases, starting with the current one """
+        self.upcoming = [key for key in dict.fromkeys(self.aliases.get(int(key), int(key)) for key in upcoming) if key in self.keys][:self.prefetch]
+        for key in self.upcoming:
+            if key not in self.resident and key not in self.pending:
+                self.pending[key] = self.executor.submit(self.decode, key)
+
+        # the textures are created in the order they are needed
+        created = 0
+        for key in self.upcoming:
+            if created == self.creations_per_update:
+                break
+            future = self.pending.get(key)
+            if future is not None and future.done():
+                del self.pending[key]
+                self.add(key, future.result())
+                created += 1
+
+    def evict(self):
+        upcoming = set(self.upcoming)
+        for key in list(self.resident):
+            if len(self.resident) <= self.max_resident:
+                break
+            if key not in upcoming:
+                del self.resident[key]
+                self.n_evicted += 1
+
+    def report(self):
+        print(f'texture residency: {self.n_created} stimuli created, {self.n_misses} not prefetched in time, {self.n_evicted} evicted')
+
+    def close(self):
+        self.executor.shutdown(wait=False)
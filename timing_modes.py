@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 10:42:36
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import numpy as np
+
+
+class FramesTiming():
+    """
+    Phase durations are counted in screen ticks (exptools2 'frames' timing).
+    Every flip is one tick, so a dropped frame delays everything that comes after it.
+    """
+
+    name = 'frames'
+    exptools_timing = 'frames'
+
+    def __init__(self, monitor_refreshrate, screenticks_per_frame):
+        self.monitor_refreshrate = monitor_refreshrate
+        self.screenticks_per_frame = screenticks_per_frame
+        # duration of one phase that shows one stimulus frame
+        self.frame_duration = screenticks_per_frame
+
+    def n_phases(self, seconds):
+        """ Number of stimulus frames (phases) that fit into the given duration """
+        return int(seconds*self.monitor_refreshrate/self.screenticks_per_frame)
+
+    def single_phase(self, seconds):
+        """ Duration value of one phase that lasts the given time """
+        return int(round(seconds*self.monitor_refreshrate))
+
+    def on_phase_start(self, session):
+        """ Called on the first flip of every phase, after exptools2 added the phase to the session timer """
+        pass
+
+
+class SecondsTiming(FramesTiming):
+    """
+    Phase durations are given in seconds (exptools2 'seconds' timing). The phases run until
+    the session timer passes their end, so dropped frames do not add up over a block.
+    """
+
+    name = 'seconds'
+    exptools_timing = 'seconds'
+
+    def __init__(self, monitor_refreshrate, screenticks_per_frame):
+        super().__init__(monitor_refreshrate, screenticks_per_frame)
+        self.frame_duration = 1/monitor_refreshrate*screenticks_per_frame
+
+    def single_phase(self, seconds):
+        return seconds
+
+
+class FrameLockedSecondsTiming(SecondsTiming):
+    """
+    Seconds timing where every phase is a whole number of screen ticks and the end of every
+    phase is kept in the middle between two flips, so small flip jitter can not add or skip a frame.
+    exptools2 ends a phase on the first flip at or after its end. When a phase starts (on its first
+    flip) and its end is less than a quarter tick from a flip, it is counted as on that flip and
+    moved to the middle before it. The phases are whole ticks, so this is only needed for the first
+    phase and after a timer reset (a break button) or a pause, the other ends keep their seconds.
+    This works as long as the flips come less than an eighth of a tick early or late.
+    """
+
+    name = 'frame-locked seconds'
+
+    def single_phase(self, seconds):
+        return round(seconds*self.monitor_refreshrate)/self.monitor_refreshrate
+
+    def on_phase_start(self, session):
+        # end of the phase in ticks after this flip
+        ticks_to_end = -session.timer.getTime()*self.monitor_refreshrate
+        flip = np.round(ticks_to_end)
+        if abs(ticks_to_end - flip) < 0.25:
+            session.timer.add((flip - 0.5 - ticks_to_end)/self.monitor_refreshrate)
+
+
+timing_modes = {mode.name: mode for mode in [FramesTiming, SecondsTiming, FrameLockedSecondsTiming]}
+
+
+def create_timing(mode, monitor_refreshrate, screenticks_per_frame):
+    if mode not in timing_modes:
+        raise ValueError(f'Unknown timing mode {mode}, choose one of {list(timing_modes)}')
+    return timing_modes[mode](monitor_refreshrate, screenticks_per_frame)
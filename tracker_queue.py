@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+'''
+@time    :   2026/10/18 10:50:47
+@author  :   rosagross
+@contact :   grossmann.rc@gmail.com
+'''
+
+import time
+import queue
+import threading
+
+
+class TrackerMessageQueue():
+    """
+    Sends the eyetracker messages and commands from a background thread.
+
+    send() and send_command() are called in the frame loop and only put the message (together
+    with the current time) into a bounded queue. The thread sends them in order and, if a message
+    waited in the queue, puts the waiting time (in ms) in front of it. The EyeLink subtracts this
+    offset from the time the message arrived, so the message gets the time of the send() call.
+    If the queue is full (the link is slower than the messages come in), the message is dropped
+    and counted, the frame loop never waits for the link. close() sends everything that is still
+    queued.
+    pylink is not thread-safe, the thread holds the lock while it talks to the tracker and every
+    other call has to go through QueuedTracker, which takes the same lock.
+    """
+
+    def __init__(self, tracker, maxsize=1024, clock=time.perf_counter):
+        self.tracker = tracker
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.queue = queue.Queue(maxsize)
+        self.n_queued = 0
+        self.n_dropped = 0
+        self.closed = False
+        self.thread = threading.Thread(target=self.send_messages, name='tracker messages', daemon=True)
+        self.thread.start()
+
+    def put(self, kind, text):
+        if self.closed:
+            # the thread is gone, the main thread is the only one left that uses the tracker
+            getattr(self.tracker, kind)(text)
+            return
+        try:
+            self.queue.put_nowait((self.clock(), kind, text))
+            self.n_queued += 1
+        except queue.Full:
+            self.n_dropped += 1
+
+    def send(self, msg):
+        self.put('sendMessage', msg)
+
+    def send_command(self, cmd):
+        self.put('sendCommand', cmd)
+
+    def send_messages(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            timestamp, kind, text = item
+            with self.lock:
+                if kind == 'sendMessage':
+                    offset = int(round((self.clock() - timestamp)*1000))
+                    self.tracker.sendMessage(f'{offset} {text}' if offset != 0 else text)
+                else:
+                    self.tracker.sendCommand(text)
+            self.queue.task_done()
+
+    def flush(self):
+        """ Waits until all queued messages were sent """
+        self.queue.join()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        # the sentinel is queued behind the remaining messages
+        self.queue.put(None)
+        self.thread.join()
+        if self.n_dropped > 0:
+            print(f'tracker queue: {self.n_dropped} of {self.n_queued + self.n_dropped} eyetracker messages were dropped (queue full)')
+
+
+class QueuedTracker():
+    """
+    Takes the place of the session tracker while the queue runs, so that exptools2 and the
+    experiment use the tracker from one thread only: messages and commands go through the queue,
+    every other call (e.g. the recording and the edf file) waits until the queue is sent and takes
+    the lock of the queue thread.
+    """
+
+    def __init__(self, tracker_queue):
+        self.tracker_queue = tracker_queue
+
+    def sendMessage(self, msg):
+        self.tracker_queue.send(msg)
+
+    def sendCommand(self, cmd):
+        self.tracker_queue.send_command(cmd)
+
+    def __getattr__(self, name):
+        attribute = getattr(self.tracker_queue.tracker, name)
+        if not callable(attribute):
+            return attribute
+
+        def locked(*args, **kwargs):
+            # the queued messages go first
+            if not self.tracker_queue.closed:
+                self.tracker_queue.flush()
+            with self.tracker_queue.lock:
+                return attribute(*args, **kwargs)
+        return locked
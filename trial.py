@@ -12,6 +12,7 @@ from exptools2.core.trial import Trial
 from psychopy.hardware import keyboard
 import os
 import re
+from phase_schedule import PhaseSchedule
 opj = os.path.join
 
 
@@ -25,49 +26,131 @@ class BPTrial(Trial):
     Every trial begins with a 10s break.
     """
 
-    def __init__(self, session, trial_nr, block_ID, block_type, trial_type, color_comb, phase_duration, timing, stimulus_index_list, *args, **kwargs):
+    def __init__(self, session, trial_nr, block_ID, block_type, trial_type, color_comb, phase_duration, timing, stimulus_index_list=None, *args, **kwargs):
         
-        super().__init__(session, trial_nr, phase_duration,
+        # the phases are either given as PhaseSchedule or as durations plus stimulus indices
+        if isinstance(phase_duration, PhaseSchedule):
+            schedule = phase_duration
+        else:
+            schedule = PhaseSchedule(phase_duration, stimulus_index_list, timing)
+
+        # exptools2 would copy the durations into a list (one object per phase), so the trial 
+        # is set up without phases and gets the arrays of the schedule afterwards
+        super().__init__(session, trial_nr, [],
                          parameters={'block_type': block_type,
                                      'trial_type': trial_type,
                                      'trial_nr': trial_nr, 
                                      'block_ID' : block_ID,
                                      'color_comb': color_comb,
-                                     'phase_length' : len(phase_duration)}, 
+                                     'phase_length' : len(schedule)}, 
                          timing=timing,
                          verbose=False, *args, **kwargs)
+        self.schedule = schedule
+        self.phase_durations = schedule.durations
+        self.phase_names = schedule.names
+        self.n_phase = len(schedule)
         
         # store if it is a ambiguous trial or unambiguous trial 
         self.ID = trial_nr
         self.block_ID = block_ID
         self.block_type = block_type
         self.trial_type = trial_type # this can be either house_face, house or face
-        self.stimulus_index_list = stimulus_index_list
+        self.stimulus_index_list = schedule.stimulus_indices
         
+
+    def run(self):
+        # exptools2 adds the durations to the session timer, float32 durations would make the timer
+        # float32 (numpy 2) and it would drift by whole ticks over a session. This copy is also
+        # writable, exptools2 shortens the first phase of the first trial by one frame (in both timings)
+        if self.timing == 'seconds':
+            self.phase_durations = self.schedule.durations.astype(np.float64)
+        elif self.session.first_trial:
+            self.phase_durations = np.array(self.phase_durations)
+
+        if self.session.frame_timer is None:
+            super().run()
+        else:
+            self.session.frame_timer.start_trial()
+            super().run()
+            self.session.frame_timer.end_trial(self)
+        # only the schedule is kept in the trial list
+        self.phase_durations = self.schedule.durations
+
             
     def draw(self):
         ''' This tells what happens in the trial, and this is defined in the session itself. '''
         self.session.draw_stimulus()
 
 
+    def log_phase_info(self, phase=None):
+        phase = self.phase if phase is None else phase
+
+        # with the tracker queue the session tracker is a QueuedTracker, so the phase message of exptools2 is queued
+        super().log_phase_info(phase=phase)
+        self.session.timing.on_phase_start(self.session)
+
+        if self.session.event_stream is not None:
+            # the row that exptools2 just added to the global log
+            global_log = self.session.global_log
+            self.session.event_stream.write({'record': 'phase', 'trial_nr': self.trial_nr, 'onset': global_log['onset'].iat[-1], 
+                                             'event_type': self.phase_names[phase], 'phase': phase, 'response': None,
+                                             'nr_frames': global_log['nr_frames'].iat[-1], **self.parameters})
+
+
+    def log_event(self, event_type, t, duration, name):
+        '''
+        Logs a button press (or pause) in the responses, the event stream and the eyetracker.
+        Returns the index of the response.
+        '''
+        # the responses are added to the global log when the session closes
+        index = self.session.responses.append(event_type, self.trial_nr, t, duration, self.phase, 
+                                              name, self.session.response_button, self.parameters)
+        if self.session.event_stream is not None:
+            self.session.event_stream.write({'record': 'response', 'event_type': event_type, 'trial_nr': self.trial_nr, 'onset': t, 
+                                             'key_duration': duration, 'phase': self.phase, 'response': name, 
+                                             'response_button': self.session.response_button, 'nr_frames': 0, **self.parameters})
+
+        if self.eyetracker_on:  # send message to eyetracker
+            msg = f'start_type-{event_type}_trial-{self.trial_nr}_phase-{self.phase}_key-{name}_time-{t}_duration-{duration}'
+            # queued if the session has a tracker queue
+            self.session.tracker.sendMessage(msg)
+        return index
+
+
     def get_events(self):
         """ Logs responses/triggers """
 
-        keys = self.session.kb.getKeys(waitRelease=True)
-        for thisKey in keys:
+        # get_events is called right after every flip
+        if self.session.frame_timer is not None:
+            self.session.frame_timer.record(self.phase)
+        if self.session.screenshots is not None:
+            self.session.screenshots.on_flip()
+
+        for thisKey in self.session.get_keys():
 
             if thisKey==self.session.exit_key:  # it is equivalent to the string 'q'
                 print("End experiment!")
 
-                if self.session.settings['Task settings']['Screenshot']==True:
+                if self.session.screenshots is not None:
                     print('\nSCREENSHOT\n')
-                    self.session.win.saveMovieFrames(opj(self.session.screen_dir, self.session.output_str+'_Screenshot.png'))
-                self.session.close()
-                self.session.quit()
+                    self.session.screenshots.capture_now(self.session.output_str+'_Screenshot')
+                # the session closes after this trial (see run)
+                self.session.state.abort()
+                self.exit_trial = True
+                return
+
+            elif (thisKey=='s') & (self.session.screenshots is not None):
+                # the next frames are captured after their flip
+                self.session.screenshots.request(self.session.output_str+f'_Screenshot_{self.trial_type}', self.session.screenshot_burst)
+
+            elif thisKey == 'p':
+                # the pause screen is shown until p is pressed again, the pause is logged with its duration
+                start, duration = self.session.run_pause()
+                self.log_event('pause', start, duration, thisKey.name)
+                if self.session.state.aborting:
+                    self.exit_trial = True
+                    return
 
-            elif (thisKey=='s') & (self.session.settings['Task settings']['Screenshot']==True):
-                self.session.win.getMovieFrame()
-                self.session.win.saveMovieFrames(opj(self.session.screen_dir, self.session.output_str+f'_Screenshot_{self.trial_type}.png'))
             else: 
                 # the button press onset in the global experiment time
                 t = thisKey.rt
@@ -75,27 +158,10 @@ class BPTrial(Trial):
                     self.session.ambiguous_responses += 1
                     self.session.total_responses += 1
 
-                event_type = self.trial_type
-                idx = self.session.global_log.shape[0]     
-    
-                self.session.global_log.loc[idx, 'event_type'] = event_type
-                self.session.global_log.loc[idx, 'trial_nr'] = self.trial_nr   
-                self.session.global_log.loc[idx, 'onset'] = t
-                self.session.global_log.loc[idx, 'key_duration'] = thisKey.duration
-                self.session.global_log.loc[idx, 'phase'] = self.phase
-                self.session.global_log.loc[idx, 'response'] = thisKey.name
-                self.session.global_log.loc[idx, 'response_button'] = self.session.response_button
-                self.session.global_log.loc[idx, 'nr_frames'] = 0
-
-                for param, val in self.parameters.items():
-                    self.session.global_log.loc[idx, param] = val
-
-                if self.eyetracker_on:  # send message to eyetracker
-                    msg = f'start_type-{event_type}_trial-{self.trial_nr}_phase-{self.phase}_key-{thisKey.name}_time-{t}_duration-{thisKey.duration}'
-                    self.session.tracker.sendMessage(msg)
-
-                if thisKey.name == 'p':
-                    input('PAUSE. Press enter to continue.')
+                index = self.log_event(self.trial_type, t, thisKey.duration, thisKey.name)
+                if thisKey.duration is None:
+                    # the key is still down, its duration is logged when it goes up
+                    self.session.pressed[(thisKey.name, t)] = index
 
                 if thisKey.name in self.session.break_buttons:
                     print('NEXT PHASE')